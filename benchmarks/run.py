@@ -0,0 +1,363 @@
+"""End-to-end scaling benchmark for Staerium Server.
+
+For every size a synthetic configuration is generated (see ``sunproj.py``) and
+a fresh Python process loads it through ``STAERIUM_CONFIG`` and drives the whole
+stack against an unconnected ``XKNX`` instance, whose outgoing telegram queue
+stands in for the bus:
+
+* ``config_load`` - ``config_loader.load_config`` on the generated XML
+* ``config_cached`` - the same from the compiled configuration cache
+* ``startup_pass`` - device registration and the first evaluation of all sectors
+* ``ingest_mode`` / ``ingest_sensor`` - ``KNX.telegram_received`` for On/Auto and
+  brightness/irradiance telegrams (per-call latency)
+* ``sun_sweep`` - azimuth/elevation telegrams across the day, latency from ingest
+  until the re-evaluation pass finished
+* ``outbound`` - writes produced by the sweep until the fake bus received them
+* ``time_programs`` - building the schedule and firing one simulated day
+
+Results (throughput, p50/p99 latency, peak RSS and the size of the runtime
+state record per sector after the sweep) are written as JSON.
+``--shards N`` runs the sector engine in N worker processes (``ShardWorkers``).
+``--geometries N`` makes the sectors share N distinct geometries (by default
+every sector has its own horizon/ceiling profile).
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/run.py --sizes 10 100 1000 10000
+    PYTHONPATH=src python benchmarks/run.py --sizes 10000 --shards 4
+    PYTHONPATH=src python benchmarks/run.py --sizes 10000 --geometries 50
+    PYTHONPATH=src python benchmarks/run.py --compare benchmarks/results/<old>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARK_DIR.parent
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+SWEEP_STEPS = 200
+
+
+def _stage(samples: list[float] | None = None, *, count: int | None = None, seconds: float | None = None) -> dict[str, Any]:
+    """Summarise a stage from per-operation samples and/or a count over a duration."""
+
+    result: dict[str, Any] = {}
+    if samples:
+        p50, p99 = np.percentile(samples, [50, 99])
+        result.update(p50_ms=p50 * 1000, p99_ms=p99 * 1000)
+        count = len(samples) if count is None else count
+        seconds = float(sum(samples)) if seconds is None else seconds
+    result["count"] = count
+    result["seconds"] = seconds
+    result["throughput"] = count / seconds if count and seconds else None
+    return result
+
+
+async def _until(predicate, timeout: float = 600.0) -> None:
+    import asyncio
+
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step did not complete")
+        await asyncio.sleep(0)
+
+
+async def _drive(stages: dict[str, Any]) -> float:
+    """Run the stages into ``stages``; returns the bytes of runtime state per sector."""
+
+    import asyncio
+
+    import pytz
+    from xknx import XKNX
+    from xknx.dpt import DPTArray, DPTBinary
+    from xknx.telegram import GroupAddress, Telegram
+    from xknx.telegram.apci import GroupValueWrite
+
+    from myapp import KNX, SectorRunner, TimeProgramRunner, codec, configuration, shards, sun
+
+    def telegram(address: str, payload) -> Telegram:
+        return Telegram(destination_address=GroupAddress(address), payload=GroupValueWrite(payload))
+
+    xknx = XKNX()
+    SectorRunner.xknx = xknx
+    bus_count = 0
+
+    async def fake_bus() -> None:
+        nonlocal bus_count
+        while True:
+            await xknx.telegrams.get()
+            bus_count += 1
+
+    def engine_idle() -> bool:
+        if shards.active():
+            return shards.idle()
+        # Passes run without awaiting, so a cleared wake-up event means the pass finished.
+        return SectorRunner._wakeup is not None and not SectorRunner._wakeup.is_set()
+
+    async def engine_settled() -> None:
+        # Waiting on the workers' replies instead of polling leaves the CPU to them.
+        if shards.active():
+            await shards.wait_idle()
+        else:
+            await _until(engine_idle)
+
+    sectors = configuration.sectors
+    tasks = [asyncio.create_task(fake_bus()), asyncio.create_task(SectorRunner.outbound_queue.run())]
+    started = time.perf_counter()
+    tasks.append(asyncio.create_task(shards.run() if shards.active() else SectorRunner.run()))
+    await engine_settled()
+    stages["startup_pass"] = _stage(count=len(sectors), seconds=time.perf_counter() - started)
+    KNX.build_dispatch_table()
+
+    # Force every sector on through its On/Auto address so louvre tracking runs.
+    samples = []
+    for sector in sectors:
+        message = telegram(sector["OnAutoAddress"], DPTBinary(0))
+        begin = time.perf_counter()
+        KNX.telegram_received(message)
+        samples.append(time.perf_counter() - begin)
+    stages["ingest_mode"] = _stage(samples)
+    await engine_settled()
+
+    samples = []
+    sensors = sorted({sector["BrightnessAddress"] for sector in sectors} | {sector["IrradianceAddress"] for sector in sectors})
+    for value in (45000.0, 150.0, 20000.0, 250.0):
+        payload = DPTArray(codec.encode_dpt9(value))
+        for address in sensors:
+            message = telegram(address, payload)
+            begin = time.perf_counter()
+            KNX.telegram_received(message)
+            samples.append(time.perf_counter() - begin)
+    stages["ingest_sensor"] = _stage(samples)
+
+    await _until(lambda: SectorRunner.outbound_queue.depth == 0 and SectorRunner.outbound_queue.in_flight == 0)
+    sent_before = SectorRunner.outbound_queue.sent
+    bus_before = bus_count
+    samples = []
+    cpu_started = time.process_time()
+    workers_cpu = shards.stats()["cpu_seconds"]
+    sweep_started = time.perf_counter()
+    for step in range(SWEEP_STEPS):
+        fraction = step / (SWEEP_STEPS - 1)
+        azimuth = 90.0 + 180.0 * fraction
+        elevation = 5.0 + 55.0 * float(np.sin(np.pi * fraction))
+        begin = time.perf_counter()
+        KNX.telegram_received(telegram(configuration.azimuth_address, DPTArray(codec.encode_dpt14(azimuth))))
+        KNX.telegram_received(telegram(configuration.elevation_address, DPTArray(codec.encode_dpt14(elevation))))
+        await engine_settled()
+        samples.append(time.perf_counter() - begin)
+    stages["sun_sweep"] = _stage(samples, count=len(samples) * len(sectors), seconds=time.perf_counter() - sweep_started)
+    stages["sun_sweep"]["unit"] = "sector evaluations"
+    # CPU per process, to tell engine work from IPC where there are fewer cores than processes:
+    # with a core each, the sweep takes about as long as the busiest process.
+    stages["sun_sweep"]["cpu_main_seconds"] = time.process_time() - cpu_started
+    stages["sun_sweep"]["cpu_worker_seconds"] = [
+        after - before for before, after in zip(workers_cpu, shards.stats()["cpu_seconds"])
+    ]
+
+    await _until(lambda: SectorRunner.outbound_queue.depth == 0 and SectorRunner.outbound_queue.in_flight == 0)
+    outbound = SectorRunner.outbound_queue.stats()
+    stages["outbound"] = _stage(count=bus_count - bus_before, seconds=time.perf_counter() - sweep_started)
+    stages["outbound"].update(
+        writes=SectorRunner.outbound_queue.sent - sent_before,
+        superseded=outbound["superseded"],
+        latency_mean_ms=outbound["latency_mean"] * 1000,
+        latency_max_ms=outbound["latency_max"] * 1000,
+    )
+    # Every sector has been evaluated with louvre tracking, so all state fields are in use.
+    state_bytes = sum(sys.getsizeof(state) for state in SectorRunner.sectors.values()) / len(SectorRunner.sectors)
+
+    timezone = pytz.timezone(sun.tz)
+    begin = time.perf_counter()
+    entries = TimeProgramRunner._build_schedule(timezone)
+    schedule = TimeProgramRunner.Schedule(entries, timezone)
+    build_seconds = time.perf_counter() - begin
+    now = TimeProgramRunner._current_time(timezone)
+    samples = []
+    fired = 0
+    for minute in range(1, 24 * 60 + 1):
+        moment = now + datetime.timedelta(minutes=minute)
+        begin = time.perf_counter()
+        for entry in schedule.pop_due(moment):
+            TimeProgramRunner._dispatch_command(entry, moment)
+            fired += 1
+        samples.append(time.perf_counter() - begin)
+    stages["time_programs"] = _stage(samples, count=fired)
+    stages["time_programs"].update(commands=len(entries), build_seconds=build_seconds)
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return state_bytes
+
+
+def worker(sectors: int, result_path: Path, shard_count: int = 0) -> None:
+    """Run every stage in this process; configuration comes from ``STAERIUM_CONFIG``."""
+
+    import asyncio
+
+    stages: dict[str, Any] = {}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        from myapp.config_loader import load_config
+
+        begin = time.perf_counter()
+        load_config()
+        stages["config_load"] = _stage(count=sectors, seconds=time.perf_counter() - begin)
+
+        begin = time.perf_counter()
+        load_config()
+        stages["config_cached"] = _stage(count=sectors, seconds=time.perf_counter() - begin)
+
+        begin = time.perf_counter()
+        import myapp.main  # noqa: F401 - the engine modules; the package (and config) is already loaded
+
+        stages["import"] = _stage(count=1, seconds=time.perf_counter() - begin)
+        from myapp import shards
+
+        if shard_count > 1:
+            shards.start(shard_count)
+        try:
+            state_bytes = asyncio.run(_drive(stages))
+        finally:
+            shards.stop()
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss /= 1024
+    result = {
+        "sectors": sectors,
+        "shards": shard_count,
+        "peak_rss_mb": peak_rss / 1024,
+        "state_bytes_per_sector": state_bytes,
+        "stages": stages,
+    }
+    result_path.write_text(json.dumps(result))
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: list[int], seed: int = 0, shard_count: int = 0, geometries: int | None = None) -> dict[str, Any]:
+    """Benchmark every size in its own process and return the combined report."""
+
+    sys.path.insert(0, str(BENCHMARK_DIR))
+    import sunproj
+
+    report: dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "shards": shard_count,
+            "geometries": geometries,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            config_path = sunproj.write(Path(directory) / f"sectors_{size}.sunproj", size, seed, geometries)
+            result_path = Path(directory) / f"result_{size}.json"
+            env = dict(os.environ, STAERIUM_CONFIG=str(config_path), CONFIG_CACHE_DIR=str(Path(directory) / "cache"))
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, (str(REPO_ROOT / "src"), env.get("PYTHONPATH"))))
+            print(f"Benchmarking {size} sectors ...", flush=True)
+            subprocess.run(
+                [sys.executable, __file__, "--worker", str(size), "--result", str(result_path), "--shards", str(shard_count)],
+                env=env,
+                check=True,
+            )
+            result = json.loads(result_path.read_text())
+            report["results"].append(result)
+            _print_result(result)
+    return report
+
+
+def _print_result(result: dict[str, Any]) -> None:
+    print(f"  peak RSS {result['peak_rss_mb']:.1f} MB, sector state {result['state_bytes_per_sector']:.0f} bytes/sector")
+    for name, stage in result["stages"].items():
+        parts = [f"{stage['seconds']:.4f} s"]
+        if stage.get("throughput"):
+            parts.append(f"{stage['throughput']:.0f}/s")
+        if "p50_ms" in stage:
+            parts.append(f"p50 {stage['p50_ms']:.3f} ms, p99 {stage['p99_ms']:.3f} ms")
+        if stage.get("cpu_worker_seconds"):
+            parts.append(f"CPU main {stage['cpu_main_seconds']:.2f} s, workers " + "/".join(f"{cpu:.2f}" for cpu in stage["cpu_worker_seconds"]) + " s")
+        print(f"  {name:<15} " + ", ".join(parts))
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> None:
+    """Print throughput and p99 ratios (new/old) for sizes present in both reports."""
+
+    previous = {result["sectors"]: result for result in old["results"]}
+    for result in new["results"]:
+        before = previous.get(result["sectors"])
+        if before is None:
+            continue
+        print(f"{result['sectors']} sectors (vs {old['meta'].get('revision')}):")
+        for name, stage in result["stages"].items():
+            old_stage = before["stages"].get(name, {})
+            ratios = []
+            if stage.get("throughput") and old_stage.get("throughput"):
+                ratios.append(f"throughput x{stage['throughput'] / old_stage['throughput']:.2f}")
+            if stage.get("p99_ms") and old_stage.get("p99_ms"):
+                ratios.append(f"p99 x{stage['p99_ms'] / old_stage['p99_ms']:.2f}")
+            if ratios:
+                print(f"  {name:<15} " + ", ".join(ratios))
+        print(f"  peak RSS x{result['peak_rss_mb'] / before['peak_rss_mb']:.2f}")
+        if before.get("state_bytes_per_sector"):
+            print(f"  sector state x{result['state_bytes_per_sector'] / before['state_bytes_per_sector']:.2f}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Staerium Server scaling benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier result file to compare against")
+    parser.add_argument("--shards", type=int, default=0, help="evaluate sectors in this many worker processes")
+    parser.add_argument("--geometries", type=int, help="number of distinct sector geometries (default: one per sector)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        worker(args.worker, args.result, args.shards)
+        return
+
+    report = run(args.sizes, args.seed, args.shards, args.geometries)
+    output = args.output
+    if output is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = BENCHMARK_DIR / "results" / f"{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+    if args.compare is not None:
+        compare(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
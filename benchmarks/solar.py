@@ -0,0 +1,112 @@
+"""Micro-benchmark of the solar position engines.
+
+Measures the per-call cost of one sun position (what the server does every
+``SunTickInterval``) and the per-sample cost of a whole day at the ephemeris
+step, for the native engine (``myapp.solar``) and, when installed, pvlib.
+Each engine runs in its own process so the import time and memory reported
+are those of that engine alone.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/solar.py
+    PYTHONPATH=src python benchmarks/solar.py --engines native --number 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCHMARK_DIR.parent
+ENGINES = ("native", "pvlib")
+LATITUDE = 47.377672
+LONGITUDE = 8.518703
+TIMEZONE = "Europe/Zurich"
+# 2026-06-21 00:00 Europe/Zurich
+DAY_START = 1781992800.0
+DAY_STEP = 30
+
+
+def _native(number: int) -> dict[str, Any]:
+    begin = time.perf_counter()
+    import numpy as np
+
+    from myapp.solar import solar_position
+
+    imported = time.perf_counter() - begin
+    single = lambda: solar_position(DAY_START + 43200.0, LATITUDE, LONGITUDE)  # noqa: E731
+    times = DAY_START + DAY_STEP * np.arange(86400 // DAY_STEP + 1)
+    day = lambda: solar_position(times, LATITUDE, LONGITUDE)  # noqa: E731
+    return _measure(imported, single, day, len(times), number)
+
+
+def _pvlib(number: int) -> dict[str, Any]:
+    begin = time.perf_counter()
+    import pandas as pd
+    from pvlib.location import Location
+
+    imported = time.perf_counter() - begin
+    site = Location(LATITUDE, LONGITUDE, tz=TIMEZONE)
+    moment = pd.DatetimeIndex([pd.Timestamp(DAY_START + 43200.0, unit="s", tz="UTC")])
+    single = lambda: site.get_solarposition(moment)  # noqa: E731
+    times = pd.date_range(pd.Timestamp(DAY_START, unit="s", tz="UTC"), periods=86400 // DAY_STEP + 1, freq=f"{DAY_STEP}s")
+    day = lambda: site.get_solarposition(times)  # noqa: E731
+    return _measure(imported, single, day, len(times), max(1, number // 1000))
+
+
+def _measure(imported: float, single, day, samples: int, number: int) -> dict[str, Any]:
+    single()
+    per_call = min(timeit.repeat(single, number=number, repeat=5)) / number
+    day_runs = max(1, number // 1000)
+    per_day = min(timeit.repeat(day, number=day_runs, repeat=5)) / day_runs
+    return {
+        "import_s": imported,
+        "call_us": per_call * 1e6,
+        "day_ms": per_day * 1e3,
+        "sample_us": per_day / samples * 1e6,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def worker(engine: str, number: int) -> None:
+    result = _native(number) if engine == "native" else _pvlib(number)
+    print(json.dumps(result))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Solar position engine micro-benchmark")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--number", type=int, default=10000, help="scalar calls per repetition")
+    parser.add_argument("--worker", choices=ENGINES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        worker(args.worker, args.number)
+        return
+
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT / "src"), os.environ.get("PYTHONPATH")])))
+    for engine in args.engines:
+        command = [sys.executable, __file__, "--worker", engine, "--number", str(args.number)]
+        completed = subprocess.run(command, env=environment, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{engine:<7} failed: {completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else completed.returncode}")
+            continue
+        result = json.loads(completed.stdout.splitlines()[-1])
+        print(
+            f"{engine:<7} import {result['import_s']:.3f} s, {result['call_us']:.1f} us per call, "
+            f"day at {DAY_STEP} s {result['day_ms']:.2f} ms ({result['sample_us']:.3f} us per sample), "
+            f"peak RSS {result['peak_rss_mb']:.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
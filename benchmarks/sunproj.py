@@ -0,0 +1,206 @@
+"""Synthetic Staerium configurations for the scaling benchmarks.
+
+Generates ``.sunproj`` XML in the schema read by ``myapp.config_loader`` with
+any number of sectors. Every sector gets horizon and ceiling points, louvre
+tracking and its own actuator addresses; brightness/irradiance sensors are
+shared by groups of ten sectors (one weather station per facade), which keeps
+10 000 sectors inside the 65 536 KNX group addresses. One time program with
+five commands is generated per ten sectors.
+
+By default every sector gets its own random horizon/ceiling profile. With
+``--geometries N`` the sectors share N distinct geometries (orientation,
+louvres and profiles), like the repeated windows of a real facade.
+
+Usage::
+
+    python benchmarks/sunproj.py 1000 -o /tmp/building.sunproj
+    python benchmarks/sunproj.py 1000 --geometries 20 -o /tmp/building.sunproj
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import uuid
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+
+SECTORS_PER_SENSOR = 10
+SECTORS_PER_PROGRAM = 10
+COMMANDS_PER_PROGRAM = 5
+
+# Main groups 0 and 1 hold the global addresses; sectors start at main group 2.
+_FIRST_MAIN = 2
+
+
+class _Addresses:
+    def __init__(self) -> None:
+        self._next = 0
+
+    def __call__(self) -> str:
+        index = self._next
+        self._next += 1
+        main = _FIRST_MAIN + index // 2048
+        if main > 31:
+            raise ValueError("configuration needs more group addresses than KNX provides")
+        return f"{main}/{(index // 256) % 8}/{index % 256}"
+
+
+def _add(parent: ET.Element, tag: str, text: object = "") -> ET.Element:
+    element = ET.SubElement(parent, tag)
+    element.text = "" if text is None else str(text).lower() if isinstance(text, bool) else str(text)
+    return element
+
+
+_PROFILE_XS = range(-90, 91, 30)
+
+
+def _profile(rng: random.Random, low: int, high: int) -> list[int]:
+    return [rng.randint(low, high) for _ in _PROFILE_XS]
+
+
+def _points(parent: ET.Element, tag: str, ys: list[int]) -> None:
+    points = ET.SubElement(parent, tag)
+    for x, y in zip(_PROFILE_XS, ys):
+        point = ET.SubElement(points, "Point")
+        _add(point, "X", x)
+        _add(point, "Y", y)
+
+
+def _geometries(count: int, seed: int) -> list[dict[str, object]]:
+    rng = random.Random(f"geometry-{seed}")
+    return [
+        {
+            "Orientation": rng.choice((90, 135, 180, 225, 270)),
+            "LouvreSpacing": rng.choice((60, 70, 80)),
+            "LouvreDepth": rng.choice((70, 80, 90)),
+            "HorizonPoints": _profile(rng, 0, 25),
+            "CeilingPoints": _profile(rng, 60, 90),
+        }
+        for _ in range(count)
+    ]
+
+
+def generate(sectors: int, seed: int = 0, geometries: int | None = None) -> ET.ElementTree:
+    """Return a configuration tree with ``sectors`` sectors.
+
+    ``geometries`` limits the number of distinct sector geometries (default:
+    every sector has its own profiles).
+    """
+
+    rng = random.Random(seed)
+    uid = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))  # noqa: E731
+    address = _Addresses()
+    pool = _geometries(geometries, seed) if geometries else []
+
+    root = ET.Element("Konfiguration")
+    for tag, value in (
+        ("Version", "1.0.0"),
+        ("Latitude", 47.377672),
+        ("Longitude", 8.518703),
+        ("AzElOption", "BusAzEl"),
+        ("TimeAddress", "1/0/0"),
+        ("DateAddress", "1/0/1"),
+        ("AzimuthAddress", "1/0/2"),
+        ("ElevationAddress", "1/0/3"),
+        ("AzimuthDPT", "14.007"),
+        ("ElevationDPT", "14.007"),
+        ("AzElTimezone", "Europe/Zurich"),
+        ("KnxConnectionType", "TUNNELING"),
+        ("KnxIndividualAddress", "15.15.255"),
+        ("KnxGatewayIp", "127.0.0.1"),
+        ("KnxGatewayPort", 3671),
+        ("KnxMulticastGroup", "224.0.23.12"),
+        ("KnxMulticastPort", 3671),
+        ("KnxAutoReconnect", False),
+        ("KnxAutoReconnectWait", 5),
+    ):
+        _add(root, tag, value)
+
+    sector_list = ET.SubElement(root, "Sectors")
+    brightness = irradiance = ""
+    for index in range(sectors):
+        if index % SECTORS_PER_SENSOR == 0:
+            brightness, irradiance = address(), address()
+        sector = ET.SubElement(sector_list, "Sector")
+        shape = pool[index % len(pool)] if pool else None
+        for tag, value in (
+            ("GUID", uid()),
+            ("Name", f"Sector {index + 1}"),
+            ("Orientation", shape["Orientation"] if shape else rng.choice((90, 135, 180, 225, 270))),
+            ("HorizonLimit", True),
+            ("LouvreTracking", True),
+            ("LouvreSpacing", shape["LouvreSpacing"] if shape else rng.choice((60, 70, 80))),
+            ("LouvreDepth", shape["LouvreDepth"] if shape else rng.choice((70, 80, 90))),
+            ("LouvreAngleAtZero", 90),
+            ("LouvreAngleAtHundred", 3),
+            ("LouvreMinimumChange", 5),
+            ("LouvreBuffer", 5),
+            ("UseBrightness", True),
+            ("UseIrradiance", True),
+            ("BrightnessAddress", brightness),
+            ("HeightAddress", address()),
+            ("LouvreAngleAddress", address()),
+            ("SunBoolAddress", address()),
+            ("BrightnessUpperThreshold", 40000),
+            ("BrightnessUpperDelay", 30),
+            ("BrightnessLowerThreshold", 30000),
+            ("BrightnessLowerDelay", 60),
+            ("IrradianceAddress", irradiance),
+            ("IrradianceUpperThreshold", 200),
+            ("IrradianceUpperDelay", 10),
+            ("IrradianceLowerThreshold", 100),
+            ("IrradianceLowerDelay", 20),
+            ("BrightnessIrradianceLink", rng.choice(("And", "Or"))),
+            ("OnAutoAddress", address()),
+            ("OnAutoBehavior", "Auto"),
+            ("OffAutoAddress", address()),
+            ("OffAutoBehavior", "Auto"),
+            ("FacadeAddress", ""),
+            ("FacadeStart", ""),
+            ("FacadeEnd", ""),
+        ):
+            _add(sector, tag, value)
+        _points(sector, "HorizonPoints", shape["HorizonPoints"] if shape else _profile(rng, 0, 25))
+        _points(sector, "CeilingPoints", shape["CeilingPoints"] if shape else _profile(rng, 60, 90))
+
+    programs = ET.SubElement(root, "TimePrograms")
+    for index in range(max(1, sectors // SECTORS_PER_PROGRAM)):
+        program = ET.SubElement(programs, "TimeProgram")
+        _add(program, "GUID", uid())
+        _add(program, "Name", f"Program {index + 1}")
+        commands = ET.SubElement(program, "Commands")
+        for _ in range(COMMANDS_PER_PROGRAM):
+            command = ET.SubElement(commands, "Command")
+            one_bit = rng.random() < 0.5
+            _add(command, "Type", "1bit" if one_bit else "1byte")
+            _add(command, "Weekdays", rng.randint(1, 127))
+            _add(command, "Time", f"{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}")
+            _add(command, "Value", rng.randint(0, 1) if one_bit else rng.randint(0, 255))
+            _add(command, "GroupAddress", address())
+
+    ET.indent(root)
+    return ET.ElementTree(root)
+
+
+def write(path: str | Path, sectors: int, seed: int = 0, geometries: int | None = None) -> Path:
+    """Write a synthetic configuration with ``sectors`` sectors to ``path``."""
+
+    path = Path(path)
+    generate(sectors, seed, geometries).write(path, encoding="UTF-8", xml_declaration=True)
+    return path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sectors", type=int)
+    parser.add_argument("-o", "--output", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--geometries", type=int, help="number of distinct sector geometries (default: one per sector)")
+    args = parser.parse_args(argv)
+    write(args.output, args.sectors, args.seed, args.geometries)
+
+
+if __name__ == "__main__":
+    main()
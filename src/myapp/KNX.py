@@ -1,210 +1,219 @@
 import datetime
-import math
-import threading
 import sys
 from pathlib import Path
 
 import pytz
-import struct, math
+from xknx.telegram import GroupAddress
 
 if __package__ in {None, ""}:
     package_root = Path(__file__).resolve().parent.parent
     if str(package_root) not in sys.path:
         sys.path.insert(0, str(package_root))
-    from myapp import SectorRunner, configuration, sun  # type: ignore
+    from myapp import SectorRunner, TimeProgramRunner, clock, codec, configuration, hysteresis, ingest, metrics, sun  # type: ignore
 else:
-    from . import SectorRunner, configuration, sun  # type: ignore
-
-def decode_dpt9(byte_pair):
-    hi, lo = byte_pair            # hi = erstes Byte (MEEEEMMM), lo = zweites Byte (MMMMMMMM)
-    value = (hi << 8) | lo        # 16-bit zusammenbauen
-    if value == 0x7FFF: # Sentinel für "invalid"
-        return math.nan
-    E = (value >> 11) & 0xF # Exponent (Bits 14..11)
-    m_raw = ((value & 0x8000) >> 4) | (value & 0x0700) | (value & 0x00FF) # Mantisse (12 Bit, Zweierkomplement): Bit15 + Bits10..8 + Bits7..0
-    M = m_raw - 0x1000 if (m_raw & 0x800) else m_raw # Zweierkomplement auf vorzeichenbehaftet wandeln (12 Bit)
-    return 0.01 * M * (1 << E)
-
-def decode_dpt8(byte_pair):
-    hi, lo = byte_pair            # hi = erstes Byte (MEEEEMMM), lo = zweites Byte (MMMMMMMM)
-    value = (hi << 8) | lo        # 16-bit zusammenbauen
-    if value > 32767:
-        value -= 65536
-    return value
-
-def decode_dpt14(byte_quad):
-    b = bytes(byte_quad)
-    if len(b) != 4:
-        raise ValueError("DPT14 requires exactly 4 bytes") 
-    uint = struct.unpack('!I', b)[0] # KNX uses big-endian (network) byte order; interpret as IEEE 754 single-precision
-    if uint == 0x7FFFFFFF:  # KNX "invalid" sentinel
-        return math.nan
-    return struct.unpack('!f', b)[0]
+    from . import SectorRunner, TimeProgramRunner, clock, codec, configuration, hysteresis, ingest, metrics, sun  # type: ignore
+
+_dispatch = None
+_address_classes = {}
+# xknx hands received telegrams to ingest_queue.put; main runs ingest_queue.run(telegram_received).
+ingest_queue = ingest.IngestQueue(configuration.ingest_buffer_size, _address_classes)
+# Sharded mode (see shards.py): raw address -> callable(telegram) forwarding sector
+# telegrams to the worker processes that own those sectors.
+routes = None
+_DECODE_FAILED = object()
+
+# Metric labels for decode errors and received telegrams.
+_DECODER_DPT = {
+    codec.decode_dpt8: "8",
+    codec.decode_dpt9: "9",
+    codec.decode_dpt14: "14",
+    codec.decode_dpt5_angle: "5",
+    codec.raw: "raw",
+    codec.unsupported: "unsupported",
+}
+
+
+def build_dispatch_table():
+    """Index telegram handlers by raw group address.
+
+    Each entry maps the raw ``GroupAddress`` value to a list of
+    ``(decoder, handler, args)`` tuples. Addresses shared by several sectors fan
+    out to every subscriber while each decoder runs only once per telegram.
+    """
+    global _dispatch
+    table = {}
+    classes = {}
+
+    def add(address, decoder, handler, *args):
+        if not address:
+            return
+        raw = GroupAddress(address).raw
+        table.setdefault(raw, []).append((decoder, handler, args))
+        classes.setdefault(raw, _handler_class(handler, args))
+
+    if configuration.az_el_option == "BusTime":
+        add(configuration.time_address, codec.raw, _handle_bus_time)
+        add(configuration.date_address, codec.raw, _handle_bus_date)
+
+    if configuration.az_el_option == "BusAzEl":
+        add(configuration.azimuth_address, codec.decoder(configuration.azimuth_dpt), _handle_azimuth)
+        add(configuration.elevation_address, codec.decoder(configuration.elevation_dpt), _handle_elevation)
+
+    for sector in configuration.sectors:
+        if sector["UseBrightness"]:
+            add(sector["BrightnessAddress"], codec.decode_dpt9, _handle_sensor, sector, "brightness")
+        if sector["UseIrradiance"]:
+            add(sector["IrradianceAddress"], codec.decode_dpt9, _handle_sensor, sector, "irradiance")
+        add(sector["OnAutoAddress"], codec.raw, _handle_on_auto, sector)
+        add(sector["OffAutoAddress"], codec.raw, _handle_off_auto, sector)
+
+    _address_classes.clear()
+    _address_classes.update(classes)
+    _dispatch = table
+    return table
+
+
+def _handler_class(handler, args):
+    if handler is _handle_sensor:
+        return args[1]
+    return {
+        _handle_bus_time: "time",
+        _handle_bus_date: "date",
+        _handle_azimuth: "azimuth",
+        _handle_elevation: "elevation",
+    }.get(handler, "mode")
+
 
 def telegram_received(telegram):
     try:
         """Callback for received KNX telegrams."""
         if configuration.Debug: print(f"Received KNX telegram: {telegram}")
 
-        if configuration.az_el_option == "BusTime":
-            if str(telegram.destination_address) == configuration.time_address:
-                try:
-                    hour = telegram.payload.value.value[0] & 0b00011111
-                    minute = telegram.payload.value.value[1] & 0b00111111
-                    second = telegram.payload.value.value[2] & 0b00111111
-                except Exception as e:
-                    print(f"Error decoding time from bus: {e}")
-                    return
-                print(f"Time from bus: {hour}:{minute}:{second}")
-                current_year = (datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta).year
-                current_month = (datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta).month
-                current_day = (datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta).day
-                internal_year = (datetime.datetime.now(pytz.timezone(sun.tz))).year
-                internal_month = (datetime.datetime.now(pytz.timezone(sun.tz))).month
-                internal_day = (datetime.datetime.now(pytz.timezone(sun.tz))).day
-                internal_hour = (datetime.datetime.now(pytz.timezone(sun.tz))).hour
-                internal_minute = (datetime.datetime.now(pytz.timezone(sun.tz))).minute
-                internal_second = (datetime.datetime.now(pytz.timezone(sun.tz))).second
-                sun.timedelta = datetime.datetime(internal_year,internal_month,internal_day,internal_hour,internal_minute,internal_second) - datetime.datetime(current_year,current_month,current_day,hour,minute,second)
-                print(f"Time difference: {sun.timedelta}")
-                sun.calculate_solar_position()
-
-            if str(telegram.destination_address) == configuration.date_address:
-                try:
-                    day = telegram.payload.value.value[0] & 0b00011111
-                    month = telegram.payload.value.value[1] & 0b00001111
-                    raw_year = telegram.payload.value.value[2] & 0b01111111
-                except Exception as e:
-                    print(f"Error decoding date from bus: {e}")
-                    return
-                if raw_year >= 90:
-                    year = 1900 + raw_year
-                else:
-                    year = 2000 + raw_year
-                print(f"Date from bus: {year}-{month}-{day}")
-                current_hour = (datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta).hour
-                current_minute = (datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta).minute
-                current_second = (datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta).second
-                internal_year = (datetime.datetime.now(pytz.timezone(sun.tz))).year
-                internal_month = (datetime.datetime.now(pytz.timezone(sun.tz))).month
-                internal_day = (datetime.datetime.now(pytz.timezone(sun.tz))).day
-                internal_hour = (datetime.datetime.now(pytz.timezone(sun.tz))).hour
-                internal_minute = (datetime.datetime.now(pytz.timezone(sun.tz))).minute
-                internal_second = (datetime.datetime.now(pytz.timezone(sun.tz))).second
-                sun.timedelta = datetime.datetime(internal_year,internal_month,internal_day,internal_hour,internal_minute,internal_second) - datetime.datetime(year,month,day,current_hour,current_minute,current_second)
-                print(f"Time difference: {sun.timedelta}")
-                print(f"Current time: {datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta}")
-
-        if configuration.az_el_option == "BusAzEl":
-            if str(telegram.destination_address) == configuration.azimuth_address:
-                try:
-                    if configuration.azimuth_dpt == 5.003:
-                        azimuth = telegram.payload.value.value[0] / 255 * 360
-                    elif configuration.azimuth_dpt == 8.011:
-                        azimuth = decode_dpt8(telegram.payload.value.value)
-                    elif configuration.azimuth_dpt == 14.007:
-                        azimuth = decode_dpt14(telegram.payload.value.value)
-                except Exception as e:
-                    print(f"Error decoding azimuth from bus: {e}")
-                    return
-                print(f"Azimuth from bus: {azimuth}°")
-                sun.current_azimuth = azimuth
-
-            if str(telegram.destination_address) == configuration.elevation_address:
-                try:
-                    if configuration.elevation_dpt == 5.003:
-                        elevation = telegram.payload.value.value[0] / 255 * 360
-                    elif configuration.elevation_dpt == 8.011:
-                        elevation = decode_dpt8(telegram.payload.value.value)
-                    elif configuration.elevation_dpt == 14.007:
-                        elevation = decode_dpt14(telegram.payload.value.value)
-                except Exception as e:
-                    print(f"Error decoding elevation from bus: {e}")
-                    return
-                print(f"Elevation from bus: {elevation}°")
-                sun.current_elevation = elevation
+        address = telegram.destination_address
+        if not isinstance(address, GroupAddress):
+            return
+        table = _dispatch if _dispatch is not None else build_dispatch_table()
+        handlers = table.get(address.raw)
+        if metrics.enabled:
+            metrics.telegrams_received.inc(_address_classes.get(address.raw, "other"))
+        if routes is not None and address.raw in routes:
+            routes[address.raw](telegram)
+            return
+        if handlers is None:
+            return
+        payload = getattr(telegram.payload, "value", None)
+        if payload is None:
+            return  # GroupValueRead carries no value
 
-        for sector in configuration.sectors:
-            if str(telegram.destination_address) == sector["BrightnessAddress"] and sector["UseBrightness"]:
-                try:
-                    val = decode_dpt9(telegram.payload.value.value)
-                except Exception as e:
-                    print(f"Error decoding telegram payload: {e}")
-                    return
-                print(f"Brightness from bus for {sector['Name']}: {val} Lux")
-                with SectorRunner.sectors_lock:
-                    sector_state = SectorRunner.sectors[sector["GUID"]]
-                    sector_state["Brightness"] = val
-                    if val > sector["BrightnessUpperThreshold"] and sector_state.get("brightness_state", 1) == 1:
-                        sector_state["brightness_state"] = 3
-                        sector_state["brightness_timer_on"] = threading.Timer(sector["BrightnessUpperDelay"], SectorRunner.set_brightness_state, args=(sector["GUID"], 4))
-                        sector_state["brightness_timer_on"].daemon = True
-                        sector_state["brightness_timer_on"].start()
-                    elif val > sector["BrightnessUpperThreshold"] and sector_state.get("brightness_state", 1) == 2:
-                        sector_state["brightness_state"] = 4
-                        sector_state["brightness_timer_off"].cancel()
-                    elif val < sector["BrightnessLowerThreshold"] and sector_state.get("brightness_state", 1) == 3:
-                        sector_state["brightness_state"] = 1
-                        sector_state["brightness_timer_on"].cancel()
-                    elif val < sector["BrightnessLowerThreshold"] and sector_state.get("brightness_state", 1) == 4:
-                        sector_state["brightness_state"] = 2
-                        sector_state["brightness_timer_off"] = threading.Timer(sector["BrightnessLowerDelay"], SectorRunner.set_brightness_state, args=(sector["GUID"], 1))
-                        sector_state["brightness_timer_off"].daemon = True
-                        sector_state["brightness_timer_off"].start()
-
-            if str(telegram.destination_address) == sector["IrradianceAddress"] and sector["UseIrradiance"]:
+        decoded = {}
+        for decoder, handler, args in handlers:
+            if decoder in decoded:
+                val = decoded[decoder]
+            else:
                 try:
-                    val = decode_dpt9(telegram.payload.value.value)
+                    val = decoder(payload.value)
                 except Exception as e:
-                    print(f"Error decoding telegram payload: {e}")
-                    return
-                print(f"Irradiance from bus for {sector['Name']}: {val} Lux")
-                with SectorRunner.sectors_lock:
-                    sector_state = SectorRunner.sectors[sector["GUID"]]
-                    sector_state["Irradiance"] = val
-                    if val > sector["IrradianceUpperThreshold"] and sector_state.get("irradiance_state", 1) == 1:
-                        sector_state["irradiance_state"] = 3
-                        sector_state["irradiance_timer_on"] = threading.Timer(sector["IrradianceUpperDelay"], SectorRunner.set_irradiance_state, args=(sector["GUID"], 4))
-                        sector_state["irradiance_timer_on"].daemon = True
-                        sector_state["irradiance_timer_on"].start()
-                    elif val > sector["IrradianceUpperThreshold"] and sector_state.get("irradiance_state", 1) == 2:
-                        sector_state["irradiance_state"] = 4
-                        sector_state["irradiance_timer_off"].cancel()
-                    elif val < sector["IrradianceLowerThreshold"] and sector_state.get("irradiance_state", 1) == 3:
-                        sector_state["irradiance_state"] = 1
-                        sector_state["irradiance_timer_on"].cancel()
-                    elif val < sector["IrradianceLowerThreshold"] and sector_state.get("irradiance_state", 1) == 4:
-                        sector_state["irradiance_state"] = 2
-                        sector_state["irradiance_timer_off"] = threading.Timer(sector["IrradianceLowerDelay"], SectorRunner.set_irradiance_state, args=(sector["GUID"], 1))
-                        sector_state["irradiance_timer_off"].daemon = True
-                        sector_state["irradiance_timer_off"].start()
-            
-            if str(telegram.destination_address) == sector["OnAutoAddress"]:
-                try:
-                    val = telegram.payload.value.value
-                except Exception as e:
-                    print(f"Error decoding telegram payload: {e}")
-                    return
-                if sector["OnAutoBehavior"] == "Auto":
-                    mode = val
-                else:
-                    mode = not val
-                if configuration.Debug: print(f"Sector {sector['Name']} set to {'Auto' if mode else 'On'} mode from bus")
-                with SectorRunner.sectors_lock:
-                    SectorRunner.sectors[sector["GUID"]]["Mode"] = "Auto" if mode else "On"
-
-            if str(telegram.destination_address) == sector["OffAutoAddress"]:
-                try:
-                    val = telegram.payload.value.value == 1
-                except Exception as e:
-                    print(f"Error decoding telegram payload: {e}")
-                    return
-                if sector["OffAutoBehavior"] == "Auto":
-                    mode = val
-                else:
-                    mode = not val
-                if configuration.Debug: print(f"Sector {sector['Name']} set to {'Auto' if mode else 'Off'} mode from bus")
-                with SectorRunner.sectors_lock:
-                    SectorRunner.sectors[sector["GUID"]]["Mode"] = "Auto" if mode else "Off"
+                    print(f"Error decoding telegram payload for {address}: {e}")
+                    if metrics.enabled:
+                        metrics.decode_errors.inc(_DECODER_DPT.get(decoder, "other"))
+                    val = _DECODE_FAILED
+                decoded[decoder] = val
+            if val is not _DECODE_FAILED:
+                handler(val, *args)
     except Exception as e:
         print(f"Error processing telegram: {e}")
+
+
+def _handle_bus_time(value):
+    try:
+        hour = value[0] & 0b00011111
+        minute = value[1] & 0b00111111
+        second = value[2] & 0b00111111
+    except Exception as e:
+        print(f"Error decoding time from bus: {e}")
+        return
+    print(f"Time from bus: {hour}:{minute}:{second}")
+    internal = clock.now(pytz.timezone(sun.tz)).replace(tzinfo=None)
+    current = sun.offset()
+    current_date = (internal - current).date()
+    # The telegram has no date: take the bus day (around midnight) that is closest to the current offset.
+    candidates = [
+        internal - datetime.datetime.combine(current_date + datetime.timedelta(days=days), datetime.time(hour, minute, second))
+        for days in (-1, 0, 1)
+    ]
+    _sync_bus_clock(min(candidates, key=lambda candidate: abs(candidate - current)))
+
+
+def _handle_bus_date(value):
+    try:
+        day = value[0] & 0b00011111
+        month = value[1] & 0b00001111
+        raw_year = value[2] & 0b01111111
+    except Exception as e:
+        print(f"Error decoding date from bus: {e}")
+        return
+    if raw_year >= 90:
+        year = 1900 + raw_year
+    else:
+        year = 2000 + raw_year
+    print(f"Date from bus: {year}-{month}-{day}")
+    internal = clock.now(pytz.timezone(sun.tz)).replace(tzinfo=None)
+    current = sun.offset()
+    # The time of day stays as it is; only a different date moves the offset (by whole days).
+    measured = internal - datetime.datetime.combine(datetime.date(year, month, day), (internal - current).time())
+    if abs(measured - current) < datetime.timedelta(hours=12):
+        return
+    _sync_bus_clock(measured)
+    print(f"Current time: {clock.now(pytz.timezone(sun.tz)) - sun.offset()}")
+
+
+def _sync_bus_clock(measured):
+    """Apply a bus clock reading; the sun position and time programs only follow a step right away."""
+    stepped = sun.sync_bus_time(measured.total_seconds())
+    print(f"Time difference: {sun.timedelta}")
+    if stepped:
+        sun.calculate_solar_position()
+        SectorRunner.notify()
+        TimeProgramRunner.reschedule()
+
+
+def _handle_azimuth(azimuth):
+    print(f"Azimuth from bus: {azimuth}°")
+    sun.current_azimuth = azimuth
+    SectorRunner.notify()
+
+
+def _handle_elevation(elevation):
+    print(f"Elevation from bus: {elevation}°")
+    sun.current_elevation = elevation
+    SectorRunner.notify()
+
+
+def _handle_sensor(val, sector, channel):
+    if configuration.Debug: print(f"{hysteresis.CHANNELS[channel]} from bus for {sector['Name']}: {val} Lux")
+    sector_state = SectorRunner.sectors[sector["GUID"]]
+    sector_state[hysteresis.CHANNELS[channel]] = val
+    state_changed = hysteresis.apply(sector, sector_state, channel, val, SectorRunner.hysteresis_timers, SectorRunner.set_hysteresis_state)
+    if state_changed:
+        SectorRunner.notify(sector["GUID"])
+
+
+def _handle_on_auto(val, sector):
+    if sector["OnAutoBehavior"] == "Auto":
+        mode = val
+    else:
+        mode = not val
+    if configuration.Debug: print(f"Sector {sector['Name']} set to {'Auto' if mode else 'On'} mode from bus")
+    SectorRunner.sectors[sector["GUID"]].Mode = "Auto" if mode else "On"
+    SectorRunner.notify(sector["GUID"])
+
+
+def _handle_off_auto(val, sector):
+    val = val == 1
+    if sector["OffAutoBehavior"] == "Auto":
+        mode = val
+    else:
+        mode = not val
+    if configuration.Debug: print(f"Sector {sector['Name']} set to {'Auto' if mode else 'Off'} mode from bus")
+    SectorRunner.sectors[sector["GUID"]].Mode = "Auto" if mode else "Off"
+    SectorRunner.notify(sector["GUID"])
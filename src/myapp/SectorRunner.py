@@ -3,230 +3,361 @@ import asyncio
 import math
 import time
 
-from . import configuration, sun
-import threading
+from . import configuration, geometry, horizon, hysteresis, louvre, metrics, outbound, sun, timers
+from .sector_state import SectorState
 
 xknx = None
 
 loop_count = 10000
 lps = 0
 
+# GUID -> SectorState. Only written on the event loop (telegram handlers, timers, reloads), so no lock.
 sectors = {}
-sectors_lock = threading.Lock()
+
+# Brightness/irradiance delays of all sectors share one timer heap on the event loop.
+hysteresis_timers = timers.TimerHeap()
+
+# Louvre lookup tables per geometry class (see geometry.py), kept across configuration reloads.
+louvre_tables = {}
+
+# Sector evaluation only enqueues writes; main drains this queue towards xknx.
+outbound_queue = outbound.OutboundQueue(configuration.outbound_concurrency, configuration.telegram_rate, configuration.telegram_burst)
+
+# Set in sharded mode (see shards.py), where the sectors are evaluated by worker processes.
+notify_hook = None
+
+_loop = None
+_wakeup = None
+_dirty = set()
+_all_dirty = False
+# Set by run(); replaced by reconfigure() when the configuration is reloaded.
+_geometry = None
+_sectors_by_guid = {}
+
+# Output address -> state key of the xknx device writing it.
+OUTPUT_DEVICES = {"HeightAddress": "HeightSender", "LouvreAngleAddress": "LouvreAngleSender", "SunBoolAddress": "SunBoolSender"}
 
 for sector in configuration.sectors:
-    sectors[sector["GUID"]] = {}
-    sectors[sector["GUID"]]["Mode"] = "Auto"
+    sectors[sector["GUID"]] = SectorState()
 
 def calculate_lps():
-    lps_timer = threading.Timer(10.0, calculate_lps)
-    lps_timer.daemon = True
-    lps_timer.start()
     global lps 
     global loop_count
     lps = loop_count / 10
-    if lps < 1:
-        print(f"Server is running really slow! Please check your configuration and hardware. (LPS = {lps})")
-    else:
-        if configuration.Debug: print(f"LPS: {lps}")
+    if configuration.Debug:
+        stats = outbound_queue.stats()
+        print(f"Evaluation passes per second: {lps}, pending hysteresis timers: {hysteresis_timers.pending}, "
+              f"outbound queue: {stats['depth']} pending (sun {stats['backlog_sun']}, louvre {stats['backlog_louvre']}, "
+              f"program {stats['backlog_program']}), {stats['superseded']} superseded, {stats['send_rate']:.1f} telegrams/s, "
+              f"latency avg {stats['latency_mean'] * 1000:.1f} ms / max {stats['latency_max'] * 1000:.1f} ms")
     loop_count = 0
 
 
-def set_brightness_state(guid, state):
-    with sectors_lock:
-        sectors[guid]["brightness_state"] = state
-    if configuration.Debug: print(f"Sector {guid} brightness state set to {state}")
+def set_hysteresis_state(guid, channel, state):
+    """Timer callback: a brightness/irradiance delay expired."""
+    sector_state = sectors[guid]
+    sector_state[f"{channel}_state"] = state
+    sector_state.pop(f"{channel}_timer", None)
+    if configuration.Debug: print(f"Sector {guid} {channel} state set to {state}")
+    notify(guid)
+
+
+def notify(guid=None):
+    """Request re-evaluation of one sector, or of every sector when ``guid`` is None.
+
+    Safe to call from any thread; the sector engine picks the request up on its
+    event loop. Calls made before the engine is running are ignored because the
+    first pass evaluates every sector anyway.
+    """
+    if notify_hook is not None:
+        notify_hook(guid)
+        return
+    loop = _loop
+    if loop is None:
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        _mark_dirty(guid)
+    else:
+        loop.call_soon_threadsafe(_mark_dirty, guid)
 
-def set_irradiance_state(guid, state):
-    with sectors_lock:
-        sectors[guid]["irradiance_state"] = state
-    if configuration.Debug: print(f"Sector {guid} irradiance state set to {state}")
 
+def _mark_dirty(guid):
+    global _all_dirty
+    if guid is None:
+        _all_dirty = True
+    else:
+        _dirty.add(guid)
+    _wakeup.set()
 
 
-def start(loop):
-    global sun
-    global loop_count
-    calculate_lps()
+def _register_devices():
     for sector in configuration.sectors:
-        guid = sector["GUID"]
-
-        if sector["HeightAddress"] != "":
-            height_sender = NumericValue(xknx=xknx, name=f"{guid}_height", group_address=sector["HeightAddress"], respond_to_read=True, value_type=5)
-        else:
-            height_sender = NumericValue(xknx=xknx, name=f"{guid}_height", group_address=None, respond_to_read=True, value_type=5)
-        xknx.devices.async_add(height_sender)
-        with sectors_lock:
-            sectors[guid]["HeightSender"] = height_sender
+        _register_sector_devices(sector)
 
-        if sector["LouvreAngleAddress"] != "":
-            louvre_sender = NumericValue(xknx=xknx, name=f"{guid}_louvre_angle", group_address=sector["LouvreAngleAddress"], respond_to_read=True, value_type=5)
-        else:
-            louvre_sender = NumericValue(xknx=xknx, name=f"{guid}_louvre_angle", group_address=None, respond_to_read=True, value_type=5)
-        xknx.devices.async_add(louvre_sender)
-        with sectors_lock:
-            sectors[guid]["LouvreAngleSender"] = louvre_sender
-
-        if sector["SunBoolAddress"] != "":
-            sun_bool_sender = Switch(xknx=xknx, name=f"{guid}_sun_bool", group_address=sector["SunBoolAddress"], respond_to_read=True)
-        else:
-            print(f"Warning: Sector {sector['GUID']} has no SunBoolAddress defined. Sun state will not be sent to KNX for this sector.")
-            sun_bool_sender = Switch(xknx=xknx, name=f"{guid}_sun_bool", group_address=None, respond_to_read=True)
-        xknx.devices.async_add(sun_bool_sender)
-        with sectors_lock:
-            sectors[guid]["SunBoolSender"] = sun_bool_sender
 
+def _register_sector_devices(sector):
+    guid = sector["GUID"]
 
-    while True:
-        loop_count = loop_count + 1
-        if configuration.az_el_option != "BusAzEl":
-            sun.calculate_solar_position()
-        for sector in configuration.sectors:
-            guid = sector["GUID"]
-            with sectors_lock:
-                sector_state = sectors[guid]
-                brightness_state = sector_state.get("brightness_state", 1)
-                irradiance_state = sector_state.get("irradiance_state", 1)
-                mode_state = sector_state.get("Mode")
-                sun_bool_sender = sector_state.get("SunBoolSender")
-                height_sender = sector_state.get("HeightSender")
-                louvre_sender = sector_state.get("LouvreAngleSender")
-
-            relative_azimuth = (sun.current_azimuth - sector["Orientation"])
-            if relative_azimuth > 180:
-                relative_azimuth = relative_azimuth - 360
-            brightness_active = brightness_state == 4
-            irradiance_active = irradiance_state == 4
-            if sector["UseBrightness"]:
-                if sector["UseIrradiance"]:
-                    if sector["BrightnessIrradianceLink"] == "And":
-                        sun_state = (brightness_active and irradiance_active and mode_state == "Auto") or (mode_state == "On")
-                    else:
-                        sun_state = ((brightness_active or irradiance_active) and mode_state == "Auto") or (mode_state == "On")
-                else:
-                    sun_state = (brightness_active and mode_state == "Auto") or (mode_state == "On")
-            else:
-                sun_state = (irradiance_active and mode_state == "Auto") or (mode_state == "On")
-            
-            # Sun shines on facade check
-            if sun_state and (not (relative_azimuth >= -90 and relative_azimuth <= 90)) and sun.current_elevation >= 0:
-                sun_state = False
-            
-            # Horizon limit check
-            if sun_state and sector["HorizonLimit"]:
-                if horizon_limit_check(sector, relative_azimuth, sun.current_elevation) == False:
-                    sun_state = False
-
-            #Send KNX updates if state changed
-            state_changed = False
-            with sectors_lock:
-                current_state = sectors[guid].get("sun_state", None)
-                if sun_state != current_state:
-                    sectors[guid]["sun_state"] = sun_state
-                    state_changed = True
-
-            if state_changed:
-                print(f"Sector {sector['GUID']} sun state changed to {'On' if sun_state else 'Off'}")
-                if sun_state:
-                    if sun_bool_sender:
-                        future = asyncio.run_coroutine_threadsafe(sun_bool_sender.set_on(), loop)
-                        future.result()
-                    if height_sender:
-                        future = asyncio.run_coroutine_threadsafe(height_sender.set(255), loop)
-                        future.result()
-                else:
-                    if sun_bool_sender:
-                        future = asyncio.run_coroutine_threadsafe(sun_bool_sender.set_off(), loop)
-                        future.result()
-
-            # Louvre tracking
-            elif sector["LouvreTracking"] and sun_state and louvre_sender:
-                angle_deg = louvre_angle_calculation(sector["LouvreSpacing"], sector["LouvreDepth"], relative_azimuth, sun.current_elevation)
-                # Map calculated angle (degrees) to 0-100% between sector-defined zero and hundred angles,
-                # then convert that percent to the device value (0-255) expected by NumericValue (value_type=5).
-                zero_deg = sector.get("LouvreAngleAtZero", 0.0)
-                hundred_deg = sector.get("LouvreAngleAtHundred", 90.0)
-                span = hundred_deg - zero_deg
-                if span == 0:
-                    angle_percent = 100.0 if angle_deg >= hundred_deg else 0.0
-                else:
-                    angle_percent = (angle_deg - zero_deg) / span * 100.0
-
-                with sectors_lock:
-                    previous_angle_deg = sectors[guid].get("angle_deg", 0)
-                    if previous_angle_deg < angle_deg:
-                        angle_direction = "opening"
-                    elif previous_angle_deg > angle_deg:
-                        angle_direction = "closing"
-                    else:
-                        angle_direction = sectors[guid].get("angle_direction", "closing")
-                    sectors[guid]["angle_direction"] = angle_direction
-                    sectors[guid]["angle_deg"] = angle_deg
-                
-                if angle_direction == "opening":
-                    angle_percent = angle_percent + sector.get("LouvreBuffer", 0)
-                else:
-                    angle_percent = angle_percent + sector.get("LouvreBuffer", 0) + sector.get("LouvreMinimumChange", 1)
-
-                # clamp 0..100
-                angle_percent = max(0.0, min(100.0, angle_percent))
-                # convert percent (0-100) to 0-255 for the NumericValue device
-                angle_bytes = int(round(angle_percent * 255.0 / 100.0))
-
-                should_send_angle = False
-                with sectors_lock:
-                    last_angle_bytes = sectors[guid].get("angle_bytes_sent", 180)
-                    if abs(last_angle_bytes - angle_bytes) >= sector.get("LouvreMinimumChange", 1):
-                        sectors[guid]["angle_bytes_sent"] = angle_bytes
-                        should_send_angle = True
-
-                if should_send_angle:
-                    future = asyncio.run_coroutine_threadsafe(louvre_sender.set(angle_bytes), loop)
-                    future.result()
-                    print(f"Sector {sector['GUID']} louvre angle deg={angle_deg:.2f} => {angle_percent:.1f}% => bytes={angle_bytes}")
-        time.sleep(0.001)
+    if sector["HeightAddress"] != "":
+        height_sender = NumericValue(xknx=xknx, name=f"{guid}_height", group_address=sector["HeightAddress"], respond_to_read=True, value_type=5)
+    else:
+        height_sender = NumericValue(xknx=xknx, name=f"{guid}_height", group_address=None, respond_to_read=True, value_type=5)
+    xknx.devices.async_add(height_sender)
+    sectors[guid].HeightSender = height_sender
 
+    if sector["LouvreAngleAddress"] != "":
+        louvre_sender = NumericValue(xknx=xknx, name=f"{guid}_louvre_angle", group_address=sector["LouvreAngleAddress"], respond_to_read=True, value_type=5)
+    else:
+        louvre_sender = NumericValue(xknx=xknx, name=f"{guid}_louvre_angle", group_address=None, respond_to_read=True, value_type=5)
+    xknx.devices.async_add(louvre_sender)
+    sectors[guid].LouvreAngleSender = louvre_sender
 
-def horizon_limit_check(sector, relative_azimuth, current_elevation):
-    def _interpolate(points, target_x, is_ceiling=False):
-        if not points:
-            return None
+    if sector["SunBoolAddress"] != "":
+        sun_bool_sender = Switch(xknx=xknx, name=f"{guid}_sun_bool", group_address=sector["SunBoolAddress"], respond_to_read=True)
+    else:
+        print(f"Warning: Sector {sector['GUID']} has no SunBoolAddress defined. Sun state will not be sent to KNX for this sector.")
+        sun_bool_sender = Switch(xknx=xknx, name=f"{guid}_sun_bool", group_address=None, respond_to_read=True)
+    xknx.devices.async_add(sun_bool_sender)
+    sectors[guid].SunBoolSender = sun_bool_sender
+
+
+def _remove_sector_devices(sector_state):
+    for key in OUTPUT_DEVICES.values():
+        device = sector_state.pop(key, None)
+        if device is not None and xknx is not None:
+            xknx.devices.async_remove(device)
+
+
+def _build_geometry():
+    classes = geometry.GeometryClasses(configuration.sectors, configuration.louvre_table_resolution, louvre_tables)
+    # Drop the tables of classes that no longer exist.
+    for key in set(louvre_tables) - set(classes.keys):
+        del louvre_tables[key]
+    if configuration.Debug:
+        print(f"{len(configuration.sectors)} sectors in {len(classes)} geometry classes, {len(louvre_tables)} louvre lookup tables")
+    return classes
+
+
+def prepare():
+    """Register the KNX devices and group the sectors; returns their geometry classes."""
+    _register_devices()
+    return _build_geometry()
+
+
+def evaluate_pass(pending, geometry_classes):
+    """Evaluate ``pending`` sectors for the current sun position.
+
+    The geometric part is evaluated once per geometry class and sun position
+    (see geometry.py); only the mode and sensor logic runs per sector.
+    """
+    exposed = geometry_classes.evaluate(sun.current_azimuth, sun.current_elevation)
+    index = geometry_classes.index
+    if metrics.enabled:
+        for sector in pending:
+            sector_started = time.perf_counter()
+            class_index = index[sector["GUID"]]
+            _evaluate_sector(sector, exposed[class_index], geometry_classes, class_index)
+            metrics.sector_evaluation.observe(time.perf_counter() - sector_started)
+    else:
+        for sector in pending:
+            class_index = index[sector["GUID"]]
+            _evaluate_sector(sector, exposed[class_index], geometry_classes, class_index)
 
-        sorted_points = sorted(points, key=lambda point: point.get("X", 0))
 
-        if target_x <= sorted_points[0].get("X", 0):
-            return sorted_points[0].get("Y")
+async def run():
+    """Run the sector engine on the current event loop.
 
-        if target_x >= sorted_points[-1].get("X", 0):
-            return sorted_points[-1].get("Y")
+    Sectors are evaluated once at startup and afterwards only when one of their
+    inputs changes: a new sun position, a hysteresis transition or a mode change
+    (see :func:`notify`). Between those events the task sleeps.
+    """
+    global _loop
+    global _wakeup
+    global loop_count
+    global _geometry
+    global _sectors_by_guid
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    calculate_lps()
+    lps_reporter = asyncio.create_task(_lps_reporter())
+    _geometry = prepare()
+    _sectors_by_guid = {sector["GUID"]: sector for sector in configuration.sectors}
+
+    sun_ticker = None
+    if configuration.az_el_option != "BusAzEl":
+        sun.calculate_solar_position()
+        sun_ticker = asyncio.create_task(_sun_ticker())
+    _mark_dirty(None)
+
+    try:
+        while True:
+            await _wakeup.wait()
+            _wakeup.clear()
+            pending = take_pending(_sectors_by_guid)
+
+            loop_count = loop_count + 1
+            started = time.monotonic()
+            evaluate_pass(pending, _geometry)
+            elapsed = time.monotonic() - started
+            if elapsed > configuration.sun_tick_interval:
+                print(f"Server is running really slow! Please check your configuration and hardware. (Evaluation of {len(pending)} sectors took {elapsed:.2f} s)")
+    finally:
+        lps_reporter.cancel()
+        if sun_ticker is not None:
+            sun_ticker.cancel()
+
+
+def take_pending(sectors_by_guid):
+    """Return the sectors marked dirty since the last call and reset the marks."""
+    global _all_dirty
+    if _all_dirty:
+        pending = configuration.sectors
+    else:
+        pending = [sectors_by_guid[guid] for guid in _dirty if guid in sectors_by_guid]
+    _all_dirty = False
+    _dirty.clear()
+    return pending
+
+
+def reconfigure(new_sectors):
+    """Apply a reloaded sector list, diffed against the current one by GUID.
+
+    Removed sectors lose their devices, timers and state; added sectors start
+    like at startup. Changed sectors keep their mode and hysteresis state and
+    are re-evaluated with the new settings. Their devices are only replaced when
+    an output address changed (and then the current state is sent again).
+    Unchanged sectors are not touched. Call on the event loop; returns the
+    added, removed and changed GUIDs.
+    """
+    global _geometry
+    global _sectors_by_guid
+    current = {sector["GUID"]: sector for sector in configuration.sectors}
+    incoming = {sector["GUID"]: sector for sector in new_sectors}
+    added = [guid for guid in incoming if guid not in current]
+    removed = [guid for guid in current if guid not in incoming]
+    changed = [guid for guid in incoming if guid in current and _settings_of(current[guid]) != _settings_of(incoming[guid])]
+    running = _loop is not None
+
+    for guid in removed:
+        sector_state = sectors.pop(guid, SectorState())
+        for channel in hysteresis.CHANNELS:
+            timer = sector_state.pop(f"{channel}_timer", None)
+            if timer is not None:
+                timer.cancel()
+        _remove_sector_devices(sector_state)
+
+    for guid in changed:
+        if running and any(current[guid][key] != incoming[guid][key] for key in OUTPUT_DEVICES):
+            sector_state = sectors[guid]
+            sector_state.pop("sun_state", None)
+            sector_state.pop("angle_bytes_sent", None)
+            _remove_sector_devices(sector_state)
+            _register_sector_devices(incoming[guid])
+
+    # Unchanged sectors keep their (identical) dicts.
+    configuration.sectors = [current[guid] if guid in current and guid not in changed else sector for guid, sector in incoming.items()]
+    for guid in added:
+        sectors[guid] = SectorState()
+        if running:
+            _register_sector_devices(incoming[guid])
+
+    if running:
+        _geometry = _build_geometry()
+        _sectors_by_guid = {sector["GUID"]: sector for sector in configuration.sectors}
+        for guid in added + changed:
+            notify(guid)
+    return added, removed, changed
+
+
+def _settings_of(sector):
+    # Compiled profiles follow from the point lists and do not compare by value.
+    return {key: value for key, value in sector.items() if key not in horizon.PROFILE_KEYS.values()}
+
+
+async def _lps_reporter():
+    """Report the evaluation passes per second (and with Debug the queue statistics) every 10 s."""
+    while True:
+        await asyncio.sleep(10.0)
+        calculate_lps()
 
-        for lower, upper in zip(sorted_points, sorted_points[1:]):
-            lower_x = lower.get("X", 0)
-            upper_x = upper.get("X", 0)
 
-            if lower_x <= target_x <= upper_x:
-                lower_y = lower.get("Y")
-                upper_y = upper.get("Y")
+async def _sun_ticker():
+    """Recalculate the sun position periodically and wake sectors when it moved."""
+    while True:
+        await asyncio.sleep(configuration.sun_tick_interval)
+        previous = (sun.current_azimuth, sun.current_elevation)
+        sun.calculate_solar_position()
+        if (sun.current_azimuth, sun.current_elevation) != previous:
+            notify()
+
+
+def _evaluate_sector(sector, exposed, geometry_classes, class_index):
+    state = sectors[sector["GUID"]]
+    mode_state = state.Mode
+
+    brightness_active = state.brightness_state == 4
+    irradiance_active = state.irradiance_state == 4
+    if sector["UseBrightness"]:
+        if sector["UseIrradiance"]:
+            if sector["BrightnessIrradianceLink"] == "And":
+                sun_state = (brightness_active and irradiance_active and mode_state == "Auto") or (mode_state == "On")
+            else:
+                sun_state = ((brightness_active or irradiance_active) and mode_state == "Auto") or (mode_state == "On")
+        else:
+            sun_state = (brightness_active and mode_state == "Auto") or (mode_state == "On")
+    else:
+        sun_state = (irradiance_active and mode_state == "Auto") or (mode_state == "On")
+    
+    # Sun shines on facade and horizon limit checks (shared by the sector's geometry class)
+    if sun_state and not exposed:
+        sun_state = False
+
+    #Send KNX updates if state changed
+    if sun_state != state.sun_state:
+        state.sun_state = sun_state
+        print(f"Sector {sector['GUID']} sun state changed to {'On' if sun_state else 'Off'}")
+        sun_bool_sender = state.SunBoolSender
+        if sun_state:
+            if sun_bool_sender:
+                outbound_queue.submit(sun_bool_sender, True)
+            if state.HeightSender:
+                outbound_queue.submit(state.HeightSender, 255)
+        else:
+            if sun_bool_sender:
+                outbound_queue.submit(sun_bool_sender, False)
+
+    # Louvre tracking
+    elif sector["LouvreTracking"] and sun_state and state.LouvreAngleSender:
+        angle_deg = geometry_classes.louvre_angle(class_index)
+
+        previous_angle_deg = state.angle_deg
+        if previous_angle_deg < angle_deg:
+            angle_direction = "opening"
+        elif previous_angle_deg > angle_deg:
+            angle_direction = "closing"
+        else:
+            angle_direction = state.angle_direction
+        state.angle_direction = angle_direction
+        state.angle_deg = angle_deg
 
-                if upper_x == lower_x:
-                    if is_ceiling:
-                        if upper_y < lower_y:
-                            return lower_y
-                        else:
-                            return upper_y
-                    else:
-                        if upper_y < lower_y:
-                            return upper_y
-                        else:
-                            return lower_y
+        # The angle mapped to 0-100 % between the sector's zero and hundred angles, plus buffer,
+        # clamped and converted to the device value (0-255) expected by NumericValue (value_type=5).
+        angle_bytes = geometry_classes.louvre_bytes(class_index, angle_direction)
 
-                fraction = (target_x - lower_x) / (upper_x - lower_x)
-                return lower_y + fraction * (upper_y - lower_y)
+        if abs(state.angle_bytes_sent - angle_bytes) >= sector.get("LouvreMinimumChange", 1):
+            state.angle_bytes_sent = angle_bytes
+            outbound_queue.submit(state.LouvreAngleSender, angle_bytes, priority=outbound.PRIORITY_LOUVRE)
+            angle_percent = louvre.angle_percent(sector, angle_deg, angle_direction)
+            print(f"Sector {sector['GUID']} louvre angle deg={angle_deg:.2f} => {angle_percent:.1f}% => bytes={angle_bytes}")
 
-        return None
 
-    horizon_value = _interpolate(sector.get("HorizonPoints", []), relative_azimuth, is_ceiling=False)
-    ceiling_value = _interpolate(sector.get("CeilingPoints", []), relative_azimuth, is_ceiling=True)
+def horizon_limit_check(sector, relative_azimuth, current_elevation):
+    horizon_value = horizon.sector_profile(sector, "HorizonPoints")(relative_azimuth)
+    ceiling_value = horizon.sector_profile(sector, "CeilingPoints")(relative_azimuth)
 
     if horizon_value is not None and current_elevation < horizon_value:
         return False
@@ -238,11 +369,5 @@ def horizon_limit_check(sector, relative_azimuth, current_elevation):
 
 
 def louvre_angle_calculation(louvre_spacing, louvre_depth, relative_azimuth, current_elevation):
-    current_elevation_rad = math.radians(current_elevation)
-    relative_azimuth_rad = math.radians(relative_azimuth)
-    tany = math.tan(current_elevation_rad)/math.cos(relative_azimuth_rad)
-    for i in range(511, 0, -1):
-        louvre_angle_rad = math.radians(i * 90 / 511)
-        if tany > (louvre_spacing - math.cos(louvre_angle_rad) * louvre_depth) / (math.sin(louvre_angle_rad) * louvre_depth):
-            return i * 90 / 511
-    return 90
+    """Return the cut-off louvre angle in degrees; see :func:`louvre.cutoff_angle`."""
+    return louvre.cutoff_angle(louvre_spacing, louvre_depth, relative_azimuth, current_elevation)
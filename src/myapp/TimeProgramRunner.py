@@ -1,51 +1,158 @@
 import asyncio
 import datetime
-import time
+import functools
+import heapq
+import itertools
 
 import pytz
 from xknx.devices import NumericValue, Switch
 
-from . import SectorRunner, configuration, sun
+from . import SectorRunner, clock, configuration, outbound, sun
 
 
-def start(loop):
+# Longest single sleep; bounds the delay after a system clock correction.
+_MAX_SLEEP = 3600.0
+
+_changed = None
+_schedule = None
+
+
+async def run():
+    """Fire time program commands on the current event loop.
+
+    Commands sit in a min-heap keyed by their next run; the task sleeps until
+    the head is due (or :func:`reschedule` is called) and only touches the
+    commands that actually fire.
+    """
+    global _changed
+    global _schedule
     timezone = pytz.timezone(sun.tz)
     scheduled_commands = _build_schedule(timezone)
     if not scheduled_commands:
+        # Keep running: a configuration reload may add commands.
         print("No valid time program commands configured.")
-        return
-
-    print(f"{len(scheduled_commands)} time program command(s) scheduled.")
-    while True:
-        now = _current_time(timezone)
-        due_commands = [entry for entry in scheduled_commands if entry["next_run"] <= now]
-        for entry in due_commands:
-            _dispatch_command(entry, loop, now)
-            entry["next_run"] = _compute_next_run(entry, timezone, reference=now + datetime.timedelta(seconds=1))
-
-        now = _current_time(timezone)
-        next_delta = min((entry["next_run"] - now).total_seconds() for entry in scheduled_commands)
-        sleep_for = max(0.05, min(next_delta, 60.0))
-        time.sleep(sleep_for)
+    else:
+        print(f"{len(scheduled_commands)} time program command(s) scheduled.")
+    schedule = _schedule = Schedule(scheduled_commands, timezone)
+    _changed = asyncio.Event()
+    offset = sun.timedelta
+    try:
+        while True:
+            now = _current_time(timezone)
+            for entry in schedule.pop_due(now):
+                _dispatch_command(entry, now)
+            if abs((sun.timedelta - offset).total_seconds()) > sun.bus_clock.step_threshold:
+                # The bus clock stepped: overdue commands fired above, the rest follow the new time.
+                # Smaller corrections (jitter, drift) keep the schedule.
+                offset = sun.timedelta
+                schedule.rebuild(now)
+                if configuration.Debug: print(f"Time program schedule rebuilt for bus time offset {offset}")
+
+            next_run = schedule.next_run()
+            next_delta = (next_run - _current_time(timezone)).total_seconds() if next_run is not None else _MAX_SLEEP
+            _changed.clear()
+            try:
+                await asyncio.wait_for(_changed.wait(), timeout=max(0.0, min(next_delta, _MAX_SLEEP)))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        _changed = None
+        _schedule = None
+
+
+def reschedule():
+    """Wake the scheduler, e.g. after ``sun.timedelta`` changed. Call on the event loop."""
+    if _changed is not None:
+        _changed.set()
+
+
+class Schedule:
+    """Min-heap of time program entries ordered by ``next_run``."""
+
+    def __init__(self, entries, timezone):
+        self.entries = entries
+        self.timezone = timezone
+        self._counter = itertools.count()
+        self._heap = []
+        self._heapify()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _heapify(self):
+        self._heap = [(entry["next_run"], next(self._counter), entry) for entry in self.entries]
+        heapq.heapify(self._heap)
+
+    def next_run(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Return the entries due at ``now`` in firing order and schedule their next run."""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            entry = heap[0][2]
+            entry["last_run"] = entry["next_run"]
+            entry["next_run"] = _compute_next_run(entry, self.timezone, reference=now + datetime.timedelta(seconds=1))
+            heapq.heapreplace(heap, (entry["next_run"], next(self._counter), entry))
+            due.append(entry)
+        return due
+
+    def replace(self, entries):
+        """Swap in a new entry list; entries keep their ``next_run``."""
+        self.entries = entries
+        self._heapify()
+
+    def rebuild(self, now):
+        """Recompute every entry from ``now`` without repeating a run that already happened."""
+        for entry in self.entries:
+            last_run = entry.get("last_run")
+            reference = last_run if last_run is not None and last_run > now else now
+            entry["next_run"] = _compute_next_run(entry, self.timezone, reference=reference)
+        self._heapify()
+
+
+def reconfigure(programs):
+    """Apply reloaded time programs; returns the number of added and removed commands.
+
+    Commands are matched by program GUID (without one, the program's position)
+    and command position. Unchanged commands keep their entry (and with it
+    their next and last run); only added, removed and edited ones are
+    rescheduled. Call on the event loop.
+    """
+    configuration.time_programs = programs
+    if _schedule is None:
+        return 0, 0  # run() builds the schedule from the new configuration
+    previous = {entry["key"]: entry for entry in _schedule.entries}
+    entries = _build_schedule(_schedule.timezone, previous)
+    kept = {id(entry) for entry in entries}
+    removed = [entry for entry in previous.values() if id(entry) not in kept]
+    for entry in removed:
+        if entry.get("device") is not None and SectorRunner.xknx is not None:
+            SectorRunner.xknx.devices.async_remove(entry["device"])
+    _schedule.replace(entries)
+    reschedule()
+    return len(entries) - len(previous) + len(removed), len(removed)
 
 
 def seconds_until(then):
-    now = (datetime.datetime.now(pytz.timezone(sun.tz)) - sun.timedelta)
+    now = (clock.now(pytz.timezone(sun.tz)) - sun.offset())
     delta = then - now
     return delta.total_seconds()
 
 
 def _current_time(tz):
-    return datetime.datetime.now(tz) - sun.timedelta
+    return clock.now(tz) - sun.offset()
 
 
-def _build_schedule(timezone):
+def _build_schedule(timezone, previous=None):
+    """Prepare the configured commands; entries in ``previous`` (by key) are reused if unchanged."""
     schedule = []
     programs = getattr(configuration, "time_programs", []) or []
     if not programs:
         return schedule
 
-    for program in programs:
+    for position, program in enumerate(programs):
         if not isinstance(program, dict):
             continue
 
@@ -58,9 +165,15 @@ def _build_schedule(timezone):
         for index, command in enumerate(commands):
             if not isinstance(command, dict):
                 continue
-            entry = _prepare_command(program_name, command, index, timezone)
-            if entry is None:
-                continue
+            # Programs without a GUID are matched by their position; names need not be unique.
+            key = (program.get("GUID") or position, index)
+            entry = (previous or {}).get(key)
+            if entry is None or entry["source"] != command or entry["program"] != program_name:
+                entry = _prepare_command(program_name, command, index, timezone)
+                if entry is None:
+                    continue
+                entry["key"] = key
+                entry["source"] = command
             schedule.append(entry)
             valid += 1
         print(f"Time Program: {program_name} - {valid} scheduled command{'s' if valid != 1 else ''}.")
@@ -193,20 +306,24 @@ def _build_device(command_type, group_address, device_name):
 
 def _compute_next_run(entry, timezone, reference=None):
     now = reference or _current_time(timezone)
-    for offset in range(8):  # search up to one full week
-        candidate_base = now + datetime.timedelta(days=offset)
-        candidate = candidate_base.replace(
-            hour=entry["hour"],
-            minute=entry["minute"],
-            second=entry["second"],
-            microsecond=0,
-        )
-        if candidate <= now:
-            continue
-        if _weekday_enabled(entry["weekdays"], candidate):
-            return candidate
+    candidate = now.replace(hour=entry["hour"], minute=entry["minute"], second=entry["second"], microsecond=0)
+    if candidate > now and _weekday_enabled(entry["weekdays"], candidate):
+        return candidate
+
+    offset = _weekday_offsets(entry["weekdays"])[now.weekday()]
+    if offset is None:
+        return now + datetime.timedelta(days=1)
+    candidate_base = now + datetime.timedelta(days=offset)
+    return candidate_base.replace(hour=entry["hour"], minute=entry["minute"], second=entry["second"], microsecond=0)
+
 
-    return now + datetime.timedelta(days=1)
+@functools.lru_cache(maxsize=128)
+def _weekday_offsets(mask):
+    """Per weekday (Monday=0) the number of days (1-7) to the next enabled weekday."""
+    offsets = []
+    for weekday in range(7):
+        offsets.append(next((days for days in range(1, 8) if (mask >> ((weekday + days) % 7)) & 0b1), None))
+    return tuple(offsets)
 
 
 def _weekday_enabled(mask, dt_obj):
@@ -221,23 +338,19 @@ def _ensure_device(entry):
     return entry["device"]
 
 
-def _dispatch_command(entry, loop, timestamp):
+def _dispatch_command(entry, timestamp):
     device = _ensure_device(entry)
     if device is None:
         if configuration.Debug:
             print(f"Skipping time program '{entry['program']}' - KNX device unavailable.")
         return
 
+    # Time program writes share the sector engine's telegram budget; they are
+    # never coalesced, so a busy bus defers them but does not drop them.
+    value = entry["value"] if entry["type"] == "1byte" else bool(entry["value"])
     try:
-        if entry["type"] == "1bit":
-            if entry["value"]:
-                future = asyncio.run_coroutine_threadsafe(device.set_on(), loop)
-            else:
-                future = asyncio.run_coroutine_threadsafe(device.set_off(), loop)
-        elif entry["type"] == "1byte":
-            future = asyncio.run_coroutine_threadsafe(device.set(entry["value"]), loop)
-        future.result()
-        print(f"Time program '{entry['program']}' wrote {entry['value']} "f"to {entry['group_address']} at {timestamp.isoformat()}")
+        SectorRunner.outbound_queue.submit(device, value, priority=outbound.PRIORITY_PROGRAM, coalesce=False)
+        print(f"Time program '{entry['program']}' queued {entry['value']} "f"for {entry['group_address']} at {timestamp.isoformat()}")
         
     except Exception as exc:  # pragma: no cover - transport errors are environment dependent
         print(
@@ -1,17 +1,20 @@
-"""Staerium Python project package initializer."""
+"""Staerium Python project package initializer.
+
+The configuration is not parsed on import. ``settings`` and ``CONFIG`` load it
+on first access through :data:`myapp.app.application`; once it is loaded, the
+upper-case top-level keys (``VERSION``, ``SECTORS`` ...) are available as
+attributes too. ``__all__`` includes the keys, so ``from myapp import *`` loads
+the configuration.
+"""
 
 from __future__ import annotations
 
+import sys
 from collections.abc import Iterator, Mapping
 from dataclasses import dataclass
 from typing import Any
 
-from .config_loader import load_config
-
-__all__ = ["main", "settings", "CONFIG"]
-
-
-CONFIG: dict[str, Any] = load_config()
+_EXPORTS = ["main", "settings", "CONFIG"]
 
 
 @dataclass(frozen=True)
@@ -39,13 +42,24 @@ class Config(Mapping[str, Any]):
         return f"Config({self._values!r})"
 
 
-settings = Config(CONFIG.copy())
-
-for _key, _value in settings.items():
-    normalized = _key.upper()
-    if normalized.isidentifier():
-        globals()[normalized] = _value
-        if normalized not in __all__:
-            __all__.append(normalized)
-
-del _key, _value, normalized
+def __getattr__(name: str) -> Any:
+    if name == "__all__":
+        from .app import application
+
+        exports = list(_EXPORTS)
+        for key in application.settings:
+            normalized = key.upper()
+            if normalized.isidentifier() and normalized not in exports:
+                exports.append(normalized)
+        return exports
+    if name == "settings" or name == "CONFIG":
+        from .app import application
+
+        return application.settings if name == "settings" else application.config
+    # Other probes (hasattr, introspection) must not parse the configuration.
+    app = sys.modules.get(f"{__name__}.app")
+    if name.isupper() and app is not None and app.application.loaded:
+        for key, value in app.application.settings.items():
+            if key.upper() == name:
+                return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,111 @@
+"""Application object: configuration on demand and a startup time breakdown.
+
+Importing :mod:`myapp` or one of its modules does not parse the configuration
+any more. It is loaded once, on first use (normally when
+:mod:`myapp.configuration` is imported), by the process-wide
+:data:`application`. It comes from ``STAERIUM_CONFIG`` or ``config.xml``.
+
+Heavy dependencies are imported where they are needed: pvlib and pandas only
+when the sun position is calculated (never with ``AzElOption=BusAzEl`` or
+``SolarEngine=native``), and ``main`` imports them in a background thread
+while the KNX connection is set up.
+
+The application also records how long each startup phase took:
+
+* ``boot``: from process start to the first configuration access (interpreter
+  start-up and the imports before it)
+* ``config``: parsing and validating the configuration file
+* ``modules``: importing the engine modules
+* ``connect``: detecting the local addresses and connecting to the gateway
+* ``solar``: waiting for pvlib, if it was not imported by then
+
+``main`` prints the breakdown once it is connected.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from . import Config
+from .config_loader import load_config
+
+
+class Application:
+    """Owns the configuration of this process and its startup timings."""
+
+    def __init__(self, config_path: str | os.PathLike[str] | None = None) -> None:
+        self.config_path = config_path
+        self.phases: list[tuple[str, float]] = []
+        self._config: dict[str, Any] | None = None
+        self._settings: Config | None = None
+        self._mark = time.perf_counter()
+        self._excluded = 0.0  # config loading time inside the running phase
+        booted = _process_age()
+        if booted is not None:
+            self.phases.append(("boot", booted))
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """The parsed configuration as returned by :func:`load_config`."""
+
+        if self._config is None:
+            self.load()
+        return self._config
+
+    @property
+    def settings(self) -> Config:
+        if self._settings is None:
+            self.load()
+        return self._settings
+
+    @property
+    def loaded(self) -> bool:
+        return self._config is not None
+
+    def load(self) -> Config:
+        """(Re)read the configuration file."""
+
+        started = time.perf_counter()
+        self._config = load_config(Path(self.config_path) if self.config_path else None)
+        self._settings = Config(self._config.copy())
+        elapsed = time.perf_counter() - started
+        self.phases.append(("config", elapsed))
+        self._excluded += elapsed
+        return self._settings
+
+    def replace(self, config: dict[str, Any]) -> None:
+        """Adopt a configuration that was reloaded while running."""
+
+        self._config = config
+        self._settings = Config(config.copy())
+
+    def mark(self, phase: str) -> None:
+        """End ``phase``: it took the time since the previous mark (without config loading)."""
+
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._mark - self._excluded))
+        self._mark = now
+        self._excluded = 0.0
+
+    def report(self) -> str:
+        total = sum(seconds for _, seconds in self.phases)
+        phases = ", ".join(f"{name} {seconds:.2f} s" for name, seconds in self.phases)
+        return f"Startup took {total:.2f} s ({phases})"
+
+
+def _process_age() -> float | None:
+    try:
+        import psutil
+
+        return max(0.0, time.time() - psutil.Process().create_time())
+    except Exception:
+        return None
+
+
+application = Application()
+
+
+__all__ = ["Application", "application"]
@@ -0,0 +1,118 @@
+"""BusTime offset tracking anchored to the monotonic clock.
+
+With ``AzElOption=BusTime`` the bus clock (DPT 10 time / DPT 11 date
+telegrams) is the reference and the server keeps the offset
+``wall clock - bus clock`` (:data:`myapp.sun.timedelta`). Bus clocks only send
+whole seconds, at irregular intervals and often with some jitter, and they
+drift against the server clock.
+
+:class:`BusClock` turns the readings into a smooth offset:
+
+* every reading is paired with :func:`myapp.clock.monotonic` and averaged
+  into a bucket of ``span / window`` seconds; the last :data:`WINDOW` buckets
+  (:data:`SPAN` seconds, however often the bus sends) are fitted with a line
+  (least squares, weighted by readings per bucket), which gives a sub-second
+  offset and its drift (seconds per second, clamped to :data:`MAX_DRIFT`)
+  once the readings span :data:`MIN_SPAN` seconds
+* between readings the offset is extrapolated with that drift
+  (:meth:`BusClock.correction`)
+* a reading that disagrees with the prediction by more than
+  ``step_threshold`` seconds (the bus clock was set, or the first reading) is
+  a step: the fit restarts from that reading
+
+Only steps recalculate the sun position and reschedule the time programs;
+ordinary readings just refine the fit, so jittery bus clocks do not cause
+recalculation storms.
+"""
+
+from __future__ import annotations
+
+import collections
+
+
+# Readings that differ from the prediction by more than this (seconds) reset the offset.
+STEP_THRESHOLD = 2.0
+# Number of buckets in the fit.
+WINDOW = 64
+# Time covered by the fit (seconds).
+SPAN = 4 * 3600.0
+# Minimum time covered by the readings (seconds) before a drift is estimated; with whole
+# second readings, shorter spans cannot tell drift from rounding.
+MIN_SPAN = 3600.0
+# Largest plausible drift (1000 ppm); larger slopes come from jitter.
+MAX_DRIFT = 1e-3
+
+
+class BusClock:
+    """Least-squares estimate of the BusTime offset and its drift."""
+
+    def __init__(self, step_threshold: float = STEP_THRESHOLD, window: int = WINDOW, span: float = SPAN) -> None:
+        self.step_threshold = step_threshold
+        self.bucket = span / max(2, window)
+        # Monotonic time of the last reading; ``None`` until the first one.
+        self.anchor: float | None = None
+        self.drift = 0.0
+        self.syncs = 0
+        self.steps = 0
+        # [start, readings, sum of monotonic - origin, sum of offsets] per bucket, oldest first.
+        self._buckets: collections.deque[list[float]] = collections.deque(maxlen=max(2, window))
+        self._origin = 0.0
+
+    def correction(self, monotonic: float) -> float:
+        """Offset change (seconds) since the last reading, from the drift estimate."""
+
+        if self.anchor is None:
+            return 0.0
+        return self.drift * (monotonic - self.anchor)
+
+    def update(self, measured: float, monotonic: float, current: float) -> tuple[float, bool]:
+        """Add a reading of the offset (seconds) taken at ``monotonic``.
+
+        ``current`` is the offset predicted for that moment. Returns the new
+        offset and whether it is a step.
+        """
+
+        self.syncs += 1
+        if self.anchor is None or abs(measured - current) > self.step_threshold:
+            self.steps += 1
+            self._buckets.clear()
+            self._origin = monotonic
+            self._buckets.append([monotonic, 1, 0.0, measured])
+            self.anchor = monotonic
+            self.drift = 0.0
+            return measured, True
+
+        buckets = self._buckets
+        if monotonic - buckets[-1][0] >= self.bucket:
+            buckets.append([monotonic, 0, 0.0, 0.0])
+        last = buckets[-1]
+        last[1] += 1
+        last[2] += monotonic - self._origin
+        last[3] += measured
+
+        # Weighted least squares over the bucket means (times relative to the first reading).
+        count = sum(bucket[1] for bucket in buckets)
+        mean_time = sum(bucket[2] for bucket in buckets) / count
+        mean_offset = sum(bucket[3] for bucket in buckets) / count
+        drift = self.drift
+        first = buckets[0][2] / buckets[0][1]
+        if len(buckets) >= 3 and monotonic - self._origin - first >= MIN_SPAN:
+            variance = covariance = 0.0
+            for _, readings, times, offsets in buckets:
+                time = times / readings - mean_time
+                variance += readings * time * time
+                covariance += readings * time * (offsets / readings - mean_offset)
+            drift = max(-MAX_DRIFT, min(MAX_DRIFT, covariance / variance))
+        self.anchor = monotonic
+        self.drift = drift
+        return mean_offset + drift * (monotonic - self._origin - mean_time), False
+
+    def reset(self) -> None:
+        """Forget all readings (e.g. when the offset is restored from a snapshot)."""
+
+        self.anchor = None
+        self.drift = 0.0
+        self._buckets.clear()
+
+
+__all__ = ["BusClock", "MAX_DRIFT", "MIN_SPAN", "SPAN", "STEP_THRESHOLD", "WINDOW"]
@@ -0,0 +1,361 @@
+"""Compact binary capture of the KNX group telegrams seen by the server.
+
+Enabled by the ``CAPTURE_PATH`` environment variable. Every incoming and
+outgoing group telegram is appended to the capture file as one fixed-size
+32 byte record behind a 32 byte file header, so a capture can be memory-mapped
+and read as a numpy structured array (:data:`RECORD_DTYPE`) without parsing.
+When a file would grow beyond ``CAPTURE_MAX_BYTES`` it is rotated like a log
+file (``capture.bin`` -> ``capture.bin.1`` -> ... up to ``CAPTURE_BACKUPS``).
+
+Record timestamps are monotonic nanoseconds since the file was opened; the
+header also stores the wall clock time of that moment.
+See :mod:`myapp.replay` for feeding a capture back through the engine.
+
+Usage::
+
+    python -m myapp.capture /var/lib/staerium/capture.bin --limit 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import numpy as np
+from xknx.dpt import DPTArray, DPTBinary
+from xknx.telegram import GroupAddress, IndividualAddress, Telegram, TelegramDirection
+from xknx.telegram.apci import GroupValueRead, GroupValueResponse, GroupValueWrite
+
+from . import codec
+
+
+MAGIC = b"STCAP\x00\r\n"
+VERSION = 1
+
+INCOMING = 0
+OUTGOING = 1
+
+KIND_WRITE = 0
+KIND_RESPONSE = 1
+KIND_READ = 2
+
+FLAG_BINARY = 0x01  # payload is a DPTBinary (<= 6 bit) value
+FLAG_TRUNCATED = 0x02  # DPTArray longer than PAYLOAD_SIZE; only the head was kept
+
+PAYLOAD_SIZE = 14
+
+# magic, version, record size, wall clock start (s), monotonic start (ns)
+_HEADER = struct.Struct("<8sHHdQ4x")
+# time (ns), direction, kind, flags, payload length, destination, source, payload
+_RECORD = struct.Struct(f"<QBBBBHH{PAYLOAD_SIZE}s2x")
+
+HEADER_SIZE = _HEADER.size
+RECORD_SIZE = _RECORD.size
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("time", "<u8"),
+        ("direction", "u1"),
+        ("kind", "u1"),
+        ("flags", "u1"),
+        ("length", "u1"),
+        ("destination", "<u2"),
+        ("source", "<u2"),
+        ("payload", "u1", (PAYLOAD_SIZE,)),
+        ("reserved", "u1", (2,)),
+    ]
+)
+
+_FLUSH_INTERVAL = 1.0
+
+_KINDS = {GroupValueWrite: KIND_WRITE, GroupValueResponse: KIND_RESPONSE, GroupValueRead: KIND_READ}
+
+
+@dataclass(frozen=True)
+class Capture:
+    """One capture file: its header and the memory-mapped records."""
+
+    path: Path
+    started: datetime.datetime
+    monotonic_start: int
+    records: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class CaptureWriter:
+    """Appends telegram records to ``path`` and rotates the file by size.
+
+    Writes are buffered. On an event loop a timer flushes them within a
+    second of the first unflushed record, also when no further telegrams
+    arrive; without a running loop every write older than a second after the
+    last flush flushes. An existing non-empty file is rotated away on open:
+    record timestamps are only meaningful within one process.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], max_bytes: int = 64 * 1024 * 1024, backups: int = 5) -> None:
+        self.path = Path(path)
+        self.max_bytes = max(int(max_bytes), HEADER_SIZE + RECORD_SIZE)
+        self.backups = max(int(backups), 0)
+        self.records = 0
+        self._file: BinaryIO | None = None
+        self._size = 0
+        self._start_ns = 0
+        self._last_flush = 0.0
+        self._flush_timer: asyncio.TimerHandle | None = None
+        if self.path.exists() and self.path.stat().st_size > 0:
+            self._rotate_files()
+        self._open()
+
+    def record(self, telegram: Telegram) -> None:
+        """Append a group telegram; other telegrams are ignored.
+
+        Signature-compatible with xKNX telegram callbacks.
+        """
+
+        fields = encode(telegram)
+        if fields is not None:
+            self.write(*fields)
+
+    def write(self, direction: int, kind: int, flags: int, destination: int, source: int, payload: bytes) -> None:
+        """Append one raw record stamped with the current monotonic time."""
+
+        if self._file is None:
+            return
+        if self._size + RECORD_SIZE > self.max_bytes:
+            self._rotate()
+        now = time.monotonic_ns()
+        self._file.write(
+            _RECORD.pack(now - self._start_ns, direction, kind, flags, len(payload), destination, source, payload)
+        )
+        self._size += RECORD_SIZE
+        self.records += 1
+        if self._flush_timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if now - self._last_flush > _FLUSH_INTERVAL * 1e9:
+                self.flush()
+        else:
+            self._flush_timer = loop.call_later(_FLUSH_INTERVAL, self.flush)
+
+    def flush(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._file is not None:
+            self._file.flush()
+            self._last_flush = time.monotonic_ns()
+
+    def close(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> CaptureWriter:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _open(self) -> None:
+        self._file = open(self.path, "wb")
+        self._start_ns = time.monotonic_ns()
+        self._file.write(_HEADER.pack(MAGIC, VERSION, RECORD_SIZE, time.time(), self._start_ns))
+        self._size = HEADER_SIZE
+        self.flush()
+
+    def _rotate(self) -> None:
+        self.close()
+        self._rotate_files()
+        self._open()
+
+    def _rotate_files(self) -> None:
+        if self.backups == 0:
+            self.path.unlink(missing_ok=True)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = _backup(self.path, index)
+            if source.exists():
+                os.replace(source, _backup(self.path, index + 1))
+        os.replace(self.path, _backup(self.path, 1))
+
+
+def encode(telegram: Telegram) -> tuple[int, int, int, int, int, bytes] | None:
+    """Record fields (direction, kind, flags, destination, source, payload) of a group telegram."""
+
+    address = telegram.destination_address
+    kind = _KINDS.get(type(telegram.payload))
+    if kind is None or not isinstance(address, GroupAddress):
+        return None
+    flags = 0
+    payload = b""
+    value = getattr(telegram.payload, "value", None)
+    if isinstance(value, DPTBinary):
+        flags = FLAG_BINARY
+        payload = bytes((value.value,))
+    elif isinstance(value, DPTArray):
+        payload = bytes(value.value)
+        if len(payload) > PAYLOAD_SIZE:
+            flags = FLAG_TRUNCATED
+            payload = payload[:PAYLOAD_SIZE]
+    direction = OUTGOING if telegram.direction is TelegramDirection.OUTGOING else INCOMING
+    return direction, kind, flags, address.raw, telegram.source_address.raw, payload
+
+
+def _backup(path: Path, index: int) -> Path:
+    return path.with_name(f"{path.name}.{index}")
+
+
+def capture_files(path: str | os.PathLike[str]) -> list[Path]:
+    """``path`` and its rotated backups that exist, oldest first."""
+
+    path = Path(path)
+    files = []
+    index = 1
+    while _backup(path, index).exists():
+        files.append(_backup(path, index))
+        index += 1
+    files.reverse()
+    if path.exists():
+        files.append(path)
+    return files
+
+
+def read(path: str | os.PathLike[str]) -> Capture:
+    """Open one capture file; the records are memory-mapped read-only.
+
+    A partially written last record (the process died mid-write) is ignored.
+    """
+
+    path = Path(path)
+    with open(path, "rb") as stream:
+        header = stream.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is not a telegram capture (file too short)")
+    magic, version, record_size, wall_start, monotonic_start = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a telegram capture")
+    if version != VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"{path} has unsupported capture version {version} (record size {record_size})")
+
+    count = (path.stat().st_size - HEADER_SIZE) // RECORD_SIZE
+    if count > 0:
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+    else:
+        records = np.empty(0, dtype=RECORD_DTYPE)
+    started = datetime.datetime.fromtimestamp(wall_start, datetime.timezone.utc)
+    return Capture(path, started, monotonic_start, records)
+
+
+def to_telegram(record: np.void) -> Telegram:
+    """Rebuild the xKNX telegram stored in one record."""
+
+    length = int(record["length"])
+    return decode(
+        (
+            int(record["direction"]),
+            int(record["kind"]),
+            int(record["flags"]),
+            int(record["destination"]),
+            int(record["source"]),
+            bytes(record["payload"][:length]),
+        )
+    )
+
+
+def values(records: np.ndarray, dpt: float) -> np.ndarray:
+    """Decode the payloads of ``records`` (e.g. the writes to one sensor address) as ``dpt`` in one call."""
+
+    return codec.array_decoder(dpt)(records["payload"])
+
+
+def decode(fields: tuple[int, int, int, int, int, bytes]) -> Telegram:
+    """Inverse of :func:`encode`."""
+
+    direction, kind, flags, destination, source, data = fields
+    if kind == KIND_READ:
+        payload: Any = GroupValueRead()
+    else:
+        value = DPTBinary(data[0]) if flags & FLAG_BINARY else DPTArray(data)
+        payload = GroupValueResponse(value) if kind == KIND_RESPONSE else GroupValueWrite(value)
+    return Telegram(
+        destination_address=GroupAddress(destination),
+        source_address=IndividualAddress(source),
+        direction=TelegramDirection.OUTGOING if direction == OUTGOING else TelegramDirection.INCOMING,
+        payload=payload,
+    )
+
+
+recorder: CaptureWriter | None = None
+
+
+def start(path: str | os.PathLike[str], max_bytes: int, backups: int) -> CaptureWriter:
+    """Open the process-wide recorder (see :data:`recorder`)."""
+
+    global recorder
+    stop()
+    recorder = CaptureWriter(path, max_bytes, backups)
+    print(f"Capturing KNX telegrams to {recorder.path}")
+    return recorder
+
+
+def stop() -> None:
+    global recorder
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Print the telegrams of a capture (including rotated backups).")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--limit", type=int, default=0, help="print at most this many records")
+    args = parser.parse_args(argv)
+
+    files = capture_files(args.path)
+    if not files:
+        parser.error(f"{args.path} does not exist")
+    printed = 0
+    for file in files:
+        capture = read(file)
+        for record in capture.records:
+            if args.limit and printed >= args.limit:
+                return
+            moment = capture.started + datetime.timedelta(microseconds=int(record["time"]) // 1000)
+            print(f"{moment.isoformat()} {to_telegram(record)}")
+            printed += 1
+
+
+__all__ = [
+    "Capture",
+    "CaptureWriter",
+    "INCOMING",
+    "OUTGOING",
+    "RECORD_DTYPE",
+    "capture_files",
+    "decode",
+    "encode",
+    "read",
+    "recorder",
+    "start",
+    "stop",
+    "to_telegram",
+    "values",
+]
+
+
+if __name__ == "__main__":
+    main()
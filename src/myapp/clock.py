@@ -0,0 +1,76 @@
+"""Wall clock used by the sun position, BusTime handling and time programs.
+
+Everything that needs "now" calls :func:`now` instead of ``datetime.now`` so
+the simulation (and tests) can swap in a :class:`VirtualClock` with
+:func:`set_clock`. :func:`monotonic` is the matching monotonic clock (seconds)
+for measuring intervals, e.g. between bus time telegrams.
+"""
+
+from __future__ import annotations
+
+import datetime
+import time
+
+
+class SystemClock:
+    """The real wall clock."""
+
+    def now(self, tz: datetime.tzinfo | None = None) -> datetime.datetime:
+        return datetime.datetime.now(tz)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+
+class VirtualClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self, start: datetime.datetime) -> None:
+        self.set(start)
+
+    def now(self, tz: datetime.tzinfo | None = None) -> datetime.datetime:
+        if tz is None:
+            return self._now.astimezone().replace(tzinfo=None)
+        return self._now.astimezone(tz)
+
+    def monotonic(self) -> float:
+        return self._now.timestamp()
+
+    def set(self, moment: datetime.datetime) -> None:
+        """Jump to ``moment``; naive values are taken as UTC."""
+
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=datetime.timezone.utc)
+        self._now = moment.astimezone(datetime.timezone.utc)
+
+    def advance(self, seconds: float) -> None:
+        self._now += datetime.timedelta(seconds=seconds)
+
+
+_clock: SystemClock | VirtualClock = SystemClock()
+
+
+def now(tz: datetime.tzinfo | None = None) -> datetime.datetime:
+    """Current time from the active clock, like ``datetime.datetime.now(tz)``."""
+
+    return _clock.now(tz)
+
+
+def monotonic() -> float:
+    """Monotonic seconds from the active clock, like ``time.monotonic()``."""
+
+    return _clock.monotonic()
+
+
+def get_clock() -> SystemClock | VirtualClock:
+    return _clock
+
+
+def set_clock(clock: SystemClock | VirtualClock | None) -> None:
+    """Install ``clock`` (``None`` restores the system clock)."""
+
+    global _clock
+    _clock = clock if clock is not None else SystemClock()
+
+
+__all__ = ["SystemClock", "VirtualClock", "get_clock", "monotonic", "now", "set_clock"]
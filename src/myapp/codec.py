@@ -0,0 +1,255 @@
+"""KNX datapoint codecs: table-driven scalar decoders, NumPy batch decoders and encoders.
+
+The server decodes four datapoint types:
+
+* DPT 9 (2-byte float): brightness and irradiance sensors. All 65 536 raw
+  values are decoded once into a lookup table, so decoding a telegram is one
+  index operation.
+* DPT 5.003 (angle, 0-360 degrees in one byte), DPT 8.011 (signed 16 bit
+  degrees) and DPT 14.007 (4-byte IEEE float): azimuth/elevation from the bus.
+
+``decode_*`` take the payload bytes of one telegram (``DPTArray.value``) and
+return the value. ``decode_*_array`` take a 2-D ``uint8`` array with one payload
+per row, e.g. ``records["payload"]`` of a capture (see
+:func:`myapp.capture.values`), and return a ``float64`` (DPT 8: ``int64``) array.
+``encode_*`` are the inverse and return the payload bytes of a value.
+
+:func:`raw` passes payloads through unchanged. :func:`decoder` picks the
+scalar decoder for a configured DPT once, when the dispatch table is built,
+instead of checking the DPT on every telegram.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import numpy as np
+
+
+DPT9_INVALID = 0x7FFF
+DPT14_INVALID = 0x7FFFFFFF
+DPT9_MAX = 0.01 * 2047 * (1 << 15)
+DPT9_MIN = 0.01 * -2048 * (1 << 15)
+
+_FLOAT32 = struct.Struct("!f")
+_UINT32 = struct.Struct("!I")
+
+
+def _dpt9_table() -> np.ndarray:
+    raw = np.arange(1 << 16, dtype=np.int64)
+    exponent = (raw >> 11) & 0xF
+    # 12 bit two's complement mantissa: sign (bit 15) + bits 10..0
+    mantissa = ((raw & 0x8000) >> 4) | (raw & 0x07FF)
+    mantissa = np.where(mantissa & 0x800, mantissa - 0x1000, mantissa)
+    table = 0.01 * mantissa * (1 << exponent)
+    table[DPT9_INVALID] = np.nan
+    return table
+
+
+# Raw 16 bit value -> decoded float; a list for fast scalar lookups and an array for batches.
+DPT9_TABLE = _dpt9_table()
+_DPT9_VALUES = DPT9_TABLE.tolist()
+
+
+def decode_dpt9(byte_pair: Sequence[int]) -> float:
+    """DPT 9 (2-byte float); ``nan`` for the invalid value 0x7FFF."""
+
+    hi, lo = byte_pair
+    return _DPT9_VALUES[(hi << 8) | lo]
+
+
+def decode_dpt8(byte_pair: Sequence[int]) -> int:
+    """DPT 8 (signed 16 bit)."""
+
+    hi, lo = byte_pair
+    value = (hi << 8) | lo
+    return value - 65536 if value > 32767 else value
+
+
+def decode_dpt14(byte_quad: Sequence[int]) -> float:
+    """DPT 14 (IEEE 754 single precision, big-endian); ``nan`` for 0x7FFFFFFF."""
+
+    data = bytes(byte_quad)
+    if len(data) != 4:
+        raise ValueError("DPT14 requires exactly 4 bytes")
+    if _UINT32.unpack(data)[0] == DPT14_INVALID:
+        return math.nan
+    return _FLOAT32.unpack(data)[0]
+
+
+def decode_dpt5_angle(value: Sequence[int]) -> float:
+    """DPT 5.003 (angle): one byte scaled to 0-360 degrees."""
+
+    return value[0] / 255 * 360
+
+
+def _payloads(payloads: Any, width: int) -> np.ndarray:
+    array = np.asarray(payloads, dtype=np.uint8)
+    if array.ndim != 2 or array.shape[1] < width:
+        raise ValueError(f"expected one payload of at least {width} bytes per row, got shape {array.shape}")
+    return array
+
+
+def decode_dpt9_array(payloads: Any) -> np.ndarray:
+    """Decode the first two bytes of every row as DPT 9."""
+
+    array = _payloads(payloads, 2)
+    return DPT9_TABLE[(array[:, 0].astype(np.intp) << 8) | array[:, 1]]
+
+
+def decode_dpt8_array(payloads: Any) -> np.ndarray:
+    """Decode the first two bytes of every row as DPT 8."""
+
+    array = _payloads(payloads, 2)
+    return ((array[:, 0].astype(np.int64) << 8) | array[:, 1]).astype(np.uint16).view(np.int16).astype(np.int64)
+
+
+def decode_dpt14_array(payloads: Any) -> np.ndarray:
+    """Decode the first four bytes of every row as DPT 14."""
+
+    head = np.ascontiguousarray(_payloads(payloads, 4)[:, :4])
+    with np.errstate(invalid="ignore"):  # signalling NaN payloads
+        values = head.view(">f4")[:, 0].astype(np.float64)
+    values[head.view(">u4")[:, 0] == DPT14_INVALID] = np.nan
+    return values
+
+
+def decode_dpt5_angle_array(payloads: Any) -> np.ndarray:
+    """Decode the first byte of every row as DPT 5.003."""
+
+    return _payloads(payloads, 1)[:, 0] / 255 * 360
+
+
+def encode_dpt9(value: float) -> tuple[int, int]:
+    """DPT 9 payload of ``value`` (``nan`` -> invalid); the smallest exponent that fits is used."""
+
+    if math.isnan(value):
+        return DPT9_INVALID >> 8, DPT9_INVALID & 0xFF
+    if not DPT9_MIN <= value <= DPT9_MAX:
+        raise ValueError(f"{value} is out of the DPT 9 range")
+    exponent = 0
+    mantissa = round(value * 100)
+    while not -2048 <= mantissa <= 2047:
+        exponent += 1
+        mantissa = round(value * 100 / (1 << exponent))
+    raw = (0x8000 if mantissa < 0 else 0) | exponent << 11 | mantissa & 0x7FF
+    return raw >> 8, raw & 0xFF
+
+
+def encode_dpt9_array(values: Any) -> np.ndarray:
+    """DPT 9 payloads (``uint8``, one row of two bytes per value); see :func:`encode_dpt9`."""
+
+    values = np.asarray(values, dtype=np.float64)
+    finite = values[~np.isnan(values)]
+    if finite.size and (finite.min() < DPT9_MIN or finite.max() > DPT9_MAX):
+        raise ValueError("value out of the DPT 9 range")
+    scaled = values * 100
+    exponent = np.zeros(values.shape, dtype=np.int64)
+    mantissa = np.round(scaled)
+    while True:
+        overflow = ~np.isnan(values) & ((mantissa < -2048) | (mantissa > 2047))
+        if not overflow.any():
+            break
+        exponent[overflow] += 1
+        mantissa[overflow] = np.round(scaled[overflow] / (1 << exponent[overflow]))
+    mantissa = np.nan_to_num(mantissa).astype(np.int64)
+    raw = np.where(mantissa < 0, 0x8000, 0) | exponent << 11 | mantissa & 0x7FF
+    raw[np.isnan(values)] = DPT9_INVALID
+    return np.stack([raw >> 8, raw & 0xFF], axis=-1).astype(np.uint8)
+
+
+def encode_dpt8(value: int) -> tuple[int, int]:
+    """DPT 8 payload of a signed 16 bit integer."""
+
+    value = int(value)
+    if not -32768 <= value <= 32767:
+        raise ValueError(f"{value} is out of the DPT 8 range")
+    value &= 0xFFFF
+    return value >> 8, value & 0xFF
+
+
+def encode_dpt14(value: float) -> tuple[int, int, int, int]:
+    """DPT 14 payload of ``value``."""
+
+    return tuple(_FLOAT32.pack(value))  # type: ignore[return-value]
+
+
+def encode_dpt5_angle(value: float) -> tuple[int]:
+    """DPT 5.003 payload of an angle in degrees (0-360)."""
+
+    if not 0 <= value <= 360:
+        raise ValueError(f"{value} is out of the DPT 5.003 range")
+    return (round(value / 360 * 255),)
+
+
+def raw(value: Any) -> Any:
+    """Payload unchanged, for telegrams their handler interprets (DPT 1 switches, DPT 10/11 time and date)."""
+
+    return value
+
+
+def unsupported(value: Any) -> Any:
+    raise ValueError("unsupported DPT for azimuth/elevation")
+
+
+# Configured DPT -> scalar decoder.
+DECODERS: dict[float, Callable[[Sequence[int]], Any]] = {
+    5.003: decode_dpt5_angle,
+    8.011: decode_dpt8,
+    9.004: decode_dpt9,
+    9.022: decode_dpt9,
+    14.007: decode_dpt14,
+}
+
+ARRAY_DECODERS: dict[float, Callable[[Any], np.ndarray]] = {
+    5.003: decode_dpt5_angle_array,
+    8.011: decode_dpt8_array,
+    9.004: decode_dpt9_array,
+    9.022: decode_dpt9_array,
+    14.007: decode_dpt14_array,
+}
+
+
+def decoder(dpt: float) -> Callable[[Sequence[int]], Any]:
+    """Scalar decoder for ``dpt``; one that raises ``ValueError`` for unsupported DPTs."""
+
+    try:
+        return DECODERS.get(float(dpt), unsupported)
+    except (TypeError, ValueError):
+        return unsupported
+
+
+def array_decoder(dpt: float) -> Callable[[Any], np.ndarray]:
+    """Batch decoder for ``dpt``; raises ``ValueError`` for unsupported DPTs."""
+
+    try:
+        return ARRAY_DECODERS[float(dpt)]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"unsupported DPT {dpt}") from None
+
+
+__all__ = [
+    "ARRAY_DECODERS",
+    "DECODERS",
+    "DPT9_TABLE",
+    "array_decoder",
+    "decode_dpt14",
+    "decode_dpt14_array",
+    "decode_dpt5_angle",
+    "decode_dpt5_angle_array",
+    "decode_dpt8",
+    "decode_dpt8_array",
+    "decode_dpt9",
+    "decode_dpt9_array",
+    "decoder",
+    "encode_dpt14",
+    "encode_dpt5_angle",
+    "encode_dpt8",
+    "encode_dpt9",
+    "encode_dpt9_array",
+    "raw",
+    "unsupported",
+]
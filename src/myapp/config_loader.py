@@ -1,14 +1,42 @@
-"""Utilities for loading and normalising Staerium XML configuration files."""
+"""Utilities for loading and normalising Staerium XML configuration files.
+
+With ``CONFIG_CACHE_DIR`` set, the parsed configuration (group addresses are
+range-checked but stay strings; horizon/ceiling profiles are compiled) is
+pickled to ``<CONFIG_CACHE_DIR>/<sha256 of the file>.<compiler>.pickle`` and
+later loads of a file with the same content unpickle it instead. ``<compiler>``
+is :func:`compiler_fingerprint`, so entries written by other code are never
+loaded. Without ``CONFIG_CACHE_DIR`` (or with it empty) nothing is cached.
+Only point it at a directory that is not writable by others, since the entries
+are pickles.
+
+Pre-compile configurations (e.g. at image build time) with::
+
+    python -m myapp.config_loader config.xml [more.sunproj ...]
+"""
 
 from __future__ import annotations
 
+import argparse
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
 from pathlib import Path
 from typing import Any
 from xml.etree import ElementTree as ET
 
+import numpy as np
+
+from . import horizon
+from .horizon import compile_sector_profiles
+
 
 FORCED_LIST_TAGS = frozenset({"Sector", "TimeProgram", "Command", "Point"})
 
+# Modules whose code defines the compiled representation (see compiler_fingerprint).
+_COMPILER_MODULES = (__file__, horizon.__file__)
+
 
 def _normalise_address_value(value: Any) -> str | None:
     """Return a trimmed string for address validation or ``None`` if empty."""
@@ -124,25 +152,112 @@ def _validate_config_addresses(config: dict[str, Any]) -> None:
                     command.get("GroupAddress"), context
                 )
 
-def load_config(xml_path: str | Path | None = None) -> dict[str, Any]:
-    """Parse the Staerium XML config into native Python structures."""
+def load_config(xml_path: str | Path | None = None, *, cache: bool = True, cache_dir: str | Path | None = None) -> dict[str, Any]:
+    """Parse the Staerium XML config into native Python structures.
+
+    Without ``xml_path`` the ``STAERIUM_CONFIG`` environment variable is used,
+    falling back to ``config.xml`` next to this module. With ``cache`` the
+    compiled result is looked up in (and stored to) ``cache_dir``, which
+    defaults to :func:`default_cache_dir` (no caching if that is ``None``).
+    """
+
+    data = config_path(xml_path).read_bytes()
+
+    directory = (Path(cache_dir) if cache_dir is not None else default_cache_dir()) if cache else None
+    if directory is None:
+        return _compile(data)
+
+    digest = hashlib.sha256(data).hexdigest()
+    config = _read_cache(directory, digest)
+    if config is None:
+        config = _compile(data)
+        _write_cache(directory, digest, config)
+    return config
+
+
+def config_path(xml_path: str | Path | None = None) -> Path:
+    """``xml_path``, else ``STAERIUM_CONFIG``, else ``config.xml`` next to this module."""
+
+    if xml_path is None:
+        xml_path = os.environ.get("STAERIUM_CONFIG") or Path(__file__).with_name("config.xml")
+    return Path(xml_path)
+
+
+def default_cache_dir() -> Path | None:
+    """Cache directory from ``CONFIG_CACHE_DIR``; ``None`` when it is unset or empty."""
+
+    configured = os.environ.get("CONFIG_CACHE_DIR")
+    return Path(configured) if configured else None
 
-    path = Path(xml_path) if xml_path is not None else Path(__file__).with_name("config.xml")
 
-    # path = Path("/configuration.sunproj")
+@functools.cache
+def compiler_fingerprint() -> str:
+    """Hash of the compiler modules' code and the NumPy version the profiles are pickled with."""
 
-    tree = ET.parse(path)
-    root = tree.getroot()
+    digest = hashlib.sha256(np.__version__.encode())
+    for module in _COMPILER_MODULES:
+        digest.update(Path(module).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def cache_path(directory: str | Path, digest: str) -> Path:
+    return Path(directory) / f"{digest}.{compiler_fingerprint()}.pickle"
+
+
+def _compile(data: bytes) -> dict[str, Any]:
+    root = ET.fromstring(data)
     config = _parse_element(root)
 
     config["Sectors"] = _normalise_sectors(config.get("Sectors"))
     config["TimePrograms"] = _normalise_time_programs(config.get("TimePrograms"))
 
     _validate_config_addresses(config)
+    _compile_profiles(config)
 
     return config
 
 
+def _read_cache(directory: Path, digest: str) -> dict[str, Any] | None:
+    try:
+        with open(cache_path(directory, digest), "rb") as stream:
+            stored_digest, fingerprint, config = pickle.load(stream)
+    except Exception:
+        # Missing, truncated, not a cache entry ...: parse the XML.
+        return None
+    return config if (stored_digest, fingerprint) == (digest, compiler_fingerprint()) else None
+
+
+def _write_cache(directory: Path, digest: str, config: dict[str, Any]) -> None:
+    temporary = None
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as stream:
+            pickle.dump((digest, compiler_fingerprint(), config), stream, protocol=pickle.HIGHEST_PROTOCOL)
+        path = cache_path(directory, digest)
+        os.replace(temporary, path)
+        # Entries for this file compiled by other code can never be loaded again.
+        for stale in directory.glob(f"{digest}.*.pickle"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        # A read-only or full cache directory only costs the parse on the next start.
+        if temporary is not None:
+            Path(temporary).unlink(missing_ok=True)
+
+
+def _compile_profiles(config: dict[str, Any]) -> None:
+    """Compile each sector's horizon/ceiling points into sorted NumPy profiles."""
+
+    for index, sector in enumerate(config.get("Sectors", [])):
+        if not isinstance(sector, dict):
+            continue
+
+        sector_name = sector.get("Name")
+        context = f"Sector '{sector_name}'" if sector_name else f"Sectors[{index}]"
+        compile_sector_profiles(sector, context)
+
+
 def _normalise_sectors(raw_value: Any) -> list[dict[str, Any]]:
     sectors = _extract_sequence(raw_value, "Sector")
     normalised: list[dict[str, Any]] = []
@@ -233,4 +348,23 @@ def _convert_text(text: str | None) -> Any:
     return value
 
 
-__all__ = ["load_config"]
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-compile configurations into the configuration cache.")
+    parser.add_argument("paths", nargs="+", help="configuration files (.xml/.sunproj)")
+    parser.add_argument("--cache-dir", help="cache directory (default: CONFIG_CACHE_DIR)")
+    args = parser.parse_args(argv)
+
+    directory = Path(args.cache_dir) if args.cache_dir else default_cache_dir()
+    if directory is None:
+        parser.error("no cache directory: pass --cache-dir or set CONFIG_CACHE_DIR")
+    for path in args.paths:
+        config = load_config(path, cache_dir=directory)
+        digest = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+        print(f"{path}: {len(config['Sectors'])} sectors -> {cache_path(directory, digest)}")
+
+
+__all__ = ["cache_path", "compiler_fingerprint", "config_path", "default_cache_dir", "load_config"]
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,26 @@ ip_address_internet = "127.0.0.1"
 _debug_env = os.getenv("DEBUG", "")
 Debug = _debug_env.lower() in ("1", "true", "yes", "y", "on")
 
+# Prometheus metrics endpoint; disabled unless a port is given.
+_metrics_port_env = os.getenv("METRICS_PORT", "")
+metrics_port = int(_metrics_port_env) if _metrics_port_env.isdigit() else 0
+metrics_host = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Binary telegram capture; disabled unless a path is given.
+capture_path = os.getenv("CAPTURE_PATH", "")
+_capture_max_bytes_env = os.getenv("CAPTURE_MAX_BYTES", "")
+capture_max_bytes = int(_capture_max_bytes_env) if _capture_max_bytes_env.isdigit() else 64 * 1024 * 1024
+_capture_backups_env = os.getenv("CAPTURE_BACKUPS", "")
+capture_backups = int(_capture_backups_env) if _capture_backups_env.isdigit() else 5
+
+# Sector state snapshot for warm restarts; disabled unless a path is given.
+state_path = os.getenv("STATE_PATH", "")
+_state_interval_env = os.getenv("STATE_INTERVAL", "")
+state_interval = int(_state_interval_env) if _state_interval_env.isdigit() and int(_state_interval_env) > 0 else 30
+
+# Directory for solar ephemeris tables shared between processes (multi-site mode).
+ephemeris_cache = os.getenv("EPHEMERIS_CACHE_DIR", "")
+
 
 #imported from config
 version = _get_setting(settings, "Version", "0.0.0")
@@ -52,5 +72,16 @@ knx_multicast_group = _get_setting(settings, "KnxMulticastGroup", "224.0.23.12")
 knx_multicast_port = _get_setting(settings, "KnxMulticastPort", 3671)
 knx_auto_reconnect = _get_setting(settings, "KnxAutoReconnect", True)
 knx_auto_reconnect_wait = _get_setting(settings, "KnxAutoReconnectWait", 5)
+sun_tick_interval = _get_setting(settings, "SunTickInterval", 1.0)
+solar_engine = _get_setting(settings, "SolarEngine", "pvlib")
+solar_ephemeris = _get_setting(settings, "SolarEphemeris", False)
+solar_ephemeris_step = _get_setting(settings, "SolarEphemerisStep", 30)
+louvre_table_resolution = _get_setting(settings, "LouvreTableResolution", 0)
+outbound_concurrency = _get_setting(settings, "OutboundConcurrency", 4)
+telegram_rate = _get_setting(settings, "TelegramRate", 0)
+telegram_burst = _get_setting(settings, "TelegramBurst", 10)
+ingest_buffer_size = _get_setting(settings, "IngestBufferSize", 4096)
+shard_workers = _get_setting(settings, "ShardWorkers", 0)
+config_watch_interval = _get_setting(settings, "ConfigWatchInterval", 5)
 sectors = _get_setting(settings, "Sectors")
 time_programs = _get_setting(settings, "TimePrograms")
\ No newline at end of file
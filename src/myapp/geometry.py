@@ -0,0 +1,160 @@
+"""Geometry classes: sectors that see the sun the same way, evaluated once.
+
+Large buildings have many sectors with the same orientation, horizon/ceiling
+profile and louvre geometry that only differ in their group addresses, sensors
+and thresholds. :class:`GeometryClasses` groups the sectors by those settings
+(see :func:`geometry_key`) and evaluates each class once per sun position:
+
+* whether the sun is on the facade and not clipped by the horizon/ceiling,
+  for all classes in one vectorised call
+* the louvre cut-off angle and its output value per tracking direction, on
+  first use by a sector of the class
+
+The per-sector part (mode, brightness/irradiance, last sent values) stays in
+:mod:`myapp.SectorRunner`. Results are kept until the sun position changes, so
+passes triggered by sensors or modes in between reuse them.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, MutableMapping, Sequence
+from typing import Any
+
+import numpy as np
+
+from . import horizon, louvre
+
+
+# Louvre output settings; they are part of the key so the output value can be shared as well.
+LOUVRE_KEYS = (
+    "LouvreSpacing",
+    "LouvreDepth",
+    "LouvreAngleAtZero",
+    "LouvreAngleAtHundred",
+    "LouvreBuffer",
+    "LouvreMinimumChange",
+)
+
+
+def geometry_key(sector: dict[str, Any]) -> tuple:
+    """Return the settings that decide how ``sector`` sees the sun.
+
+    Horizon and louvre settings only count when the sector uses them.
+    """
+
+    limits = None
+    if sector["HorizonLimit"]:
+        limits = (_points(sector.get("HorizonPoints")), _points(sector.get("CeilingPoints")))
+    tracking = None
+    if sector["LouvreTracking"]:
+        defaults = {"LouvreAngleAtZero": 0.0, "LouvreAngleAtHundred": 90.0, "LouvreBuffer": 0, "LouvreMinimumChange": 1}
+        tracking = tuple(sector.get(key, defaults.get(key)) for key in LOUVRE_KEYS)
+    return float(sector.get("Orientation", 0)), limits, tracking
+
+
+def _points(points: Iterable[dict[str, Any]] | None) -> tuple:
+    return tuple((point.get("X", 0), point.get("Y")) for point in points or [])
+
+
+class GeometryClasses:
+    """The sectors of a configuration grouped into geometry classes."""
+
+    def __init__(
+        self,
+        sectors: Sequence[dict[str, Any]],
+        louvre_resolution: float = 0,
+        louvre_tables: MutableMapping[tuple, louvre.LouvreTable] | None = None,
+    ) -> None:
+        index_of: dict[tuple, int] = {}
+        self.keys: list[tuple] = []
+        # First sector of each class; it stands in for the whole class.
+        self.representatives: list[dict[str, Any]] = []
+        # GUID -> class index
+        self.index: dict[str, int] = {}
+        for sector in sectors:
+            key = geometry_key(sector)
+            if key not in index_of:
+                index_of[key] = len(self.keys)
+                self.keys.append(key)
+                self.representatives.append(sector)
+            self.index[sector["GUID"]] = index_of[key]
+
+        # Louvre lookup tables per class, reused across rebuilds through ``louvre_tables``.
+        tables = louvre_tables if louvre_tables is not None else {}
+        self.tables: list[louvre.LouvreTable | None] = []
+        for key, sector in zip(self.keys, self.representatives):
+            table = None
+            if louvre_resolution and sector["LouvreTracking"]:
+                table = tables.get(key)
+                if table is None or table.resolution != float(louvre_resolution):
+                    table = tables[key] = louvre.LouvreTable(sector, louvre_resolution)
+            self.tables.append(table)
+
+        self.limits = horizon.HorizonLimits(self.representatives)
+        self._horizon_limit = np.array([bool(sector["HorizonLimit"]) for sector in self.representatives], dtype=bool)
+        self._position: tuple[float, float] | None = None
+        self._relative_azimuth: list[float] = []
+        self.exposed: list[bool] = []
+        # Per class, filled on first use at the current sun position.
+        self._louvre_cache: list[tuple[float, int | None] | None] = []
+        self._bytes_cache: list[int | None] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def evaluate(self, azimuth: float, elevation: float) -> list[bool]:
+        """Return per class whether the sun reaches it (cached per sun position).
+
+        A class is not exposed while the sun is up behind its facade or when
+        its horizon/ceiling clips the sun.
+        """
+
+        if self._position == (azimuth, elevation):
+            return self.exposed
+        relative = self.limits.relative_azimuth(azimuth)
+        facing = ((relative >= -90) & (relative <= 90)) | (elevation < 0)
+        clear = self.limits.check(azimuth, elevation) | ~self._horizon_limit
+        self._position = (azimuth, elevation)
+        self._relative_azimuth = relative.tolist()
+        self.exposed = (facing & clear).tolist()
+        self._louvre_cache = [None] * len(self.keys)
+        self._bytes_cache = [None] * (2 * len(self.keys))
+        return self.exposed
+
+    def louvre_angle(self, index: int) -> float:
+        """Cut-off angle of class ``index`` at the last evaluated sun position (louvre tracking only)."""
+
+        return self._louvre(index)[0]
+
+    def louvre_bytes(self, index: int, direction: str) -> int:
+        """Output value (0-255) of :meth:`louvre_angle` for tracking ``direction``."""
+
+        slot = 2 * index + (direction != "opening")
+        value = self._bytes_cache[slot]
+        if value is None:
+            angle, step = self._louvre(index)
+            if step is None:
+                value = louvre.angle_bytes(self.representatives[index], angle, direction)
+            else:
+                value = self.tables[index].angle_bytes(step, direction)
+            self._bytes_cache[slot] = value
+        return value
+
+    def _louvre(self, index: int) -> tuple[float, int | None]:
+        cached = self._louvre_cache[index]
+        if cached is None:
+            relative_azimuth = self._relative_azimuth[index]
+            elevation = self._position[1]
+            table = self.tables[index]
+            # Outside the table grid (or without tables) the cut-off angle is solved directly.
+            step = table.lookup(relative_azimuth, elevation) if table is not None else None
+            if step is None:
+                sector = self.representatives[index]
+                cached = louvre.cutoff_angle(sector["LouvreSpacing"], sector["LouvreDepth"], relative_azimuth, elevation), None
+            else:
+                cached = step * 90 / louvre.ANGLE_STEPS, step
+            self._louvre_cache[index] = cached
+        return cached
+
+
+__all__ = ["GeometryClasses", "LOUVRE_KEYS", "geometry_key"]
@@ -0,0 +1,147 @@
+"""Compiled horizon and ceiling profiles for sector sun clipping.
+
+Profiles are built once from a sector's ``HorizonPoints``/``CeilingPoints`` and
+evaluated with bisection (single sector) or fully vectorised (all sectors at
+once). Results are identical to interpolating over the raw point lists: points
+are stable-sorted by X, targets at or beyond the outermost points take the
+outermost Y, and an exact hit on a repeated X takes the Y of the first point in
+that group (the segment leading into it wins before the zero-width step between
+the duplicates is ever considered).
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import numpy as np
+
+
+class Profile:
+    """Piecewise-linear limit over relative azimuth."""
+
+    __slots__ = ("xs", "ys", "_x", "_y")
+
+    def __init__(self, points: Iterable[dict[str, Any]] | None, context: str = "profile") -> None:
+        ordered = sorted(points or [], key=lambda point: point.get("X", 0))
+        try:
+            xs = [float(point.get("X", 0)) for point in ordered]
+            ys = [float(point.get("Y")) for point in ordered]
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid point in {context}: {exc}") from exc
+
+        self.xs = np.array(xs, dtype=float)
+        self.ys = np.array(ys, dtype=float)
+        # Plain lists keep scalar lookups free of NumPy scalar overhead.
+        self._x = xs
+        self._y = ys
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    def __call__(self, target_x: float) -> float | None:
+        """Return the limit at ``target_x`` or ``None`` for an empty profile."""
+
+        xs = self._x
+        if not xs or target_x != target_x:
+            return None
+        ys = self._y
+        if target_x <= xs[0]:
+            return ys[0]
+        if target_x >= xs[-1]:
+            return ys[-1]
+
+        upper = bisect.bisect_left(xs, target_x)
+        lower_x = xs[upper - 1]
+        lower_y = ys[upper - 1]
+        fraction = (target_x - lower_x) / (xs[upper] - lower_x)
+        return lower_y + fraction * (ys[upper] - lower_y)
+
+
+class ProfileSet:
+    """Many profiles packed into flat arrays for one-call evaluation."""
+
+    def __init__(self, profiles: Sequence[Profile | None]) -> None:
+        counts = np.array([len(profile) if profile is not None else 0 for profile in profiles], dtype=np.intp)
+        self.size = len(counts)
+        self.counts = counts
+        self.first = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.intp) if self.size else counts
+        self.segment = np.repeat(np.arange(self.size), counts)
+        parts = [profile for profile in profiles if profile is not None and len(profile)]
+        self.xs = np.concatenate([profile.xs for profile in parts]) if parts else np.empty(0)
+        self.ys = np.concatenate([profile.ys for profile in parts]) if parts else np.empty(0)
+
+    def evaluate(self, targets: np.ndarray) -> np.ndarray:
+        """Evaluate profile ``i`` at ``targets[i]``; NaN marks empty profiles."""
+
+        targets = np.asarray(targets, dtype=float)
+        result = np.full(self.size, np.nan)
+        if not len(self.xs):
+            return result
+
+        nonempty = (self.counts > 0) & ~np.isnan(targets)
+        first = np.where(nonempty, self.first, 0)
+        last = np.where(nonempty, self.first + self.counts - 1, 0)
+        below_first = nonempty & (targets <= self.xs[first])
+        above_last = nonempty & ~below_first & (targets >= self.xs[last])
+        inside = nonempty & ~below_first & ~above_last
+
+        # Points strictly left of the target within each profile locate the segment.
+        left = np.bincount(self.segment, weights=self.xs < targets[self.segment], minlength=self.size).astype(np.intp)
+        upper = np.where(inside, first + left, 0)
+        lower = np.maximum(upper - 1, 0)
+        lower_x = self.xs[lower]
+        lower_y = self.ys[lower]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = (targets - lower_x) / (self.xs[upper] - lower_x)
+            interpolated = lower_y + fraction * (self.ys[upper] - lower_y)
+
+        result[below_first] = self.ys[first[below_first]]
+        result[above_last] = self.ys[last[above_last]]
+        result[inside] = interpolated[inside]
+        return result
+
+
+class HorizonLimits:
+    """Horizon/ceiling clipping for a list of sectors, evaluated in one call."""
+
+    def __init__(self, sectors: Sequence[dict[str, Any]]) -> None:
+        self.orientation = np.array([float(sector.get("Orientation", 0)) for sector in sectors])
+        self.horizon = ProfileSet([sector_profile(sector, "HorizonPoints") for sector in sectors])
+        self.ceiling = ProfileSet([sector_profile(sector, "CeilingPoints") for sector in sectors])
+
+    def relative_azimuth(self, azimuth: float) -> np.ndarray:
+        relative = azimuth - self.orientation
+        return np.where(relative > 180, relative - 360, relative)
+
+    def check(self, azimuth: float, elevation: float) -> np.ndarray:
+        """Return per sector whether ``elevation`` lies between horizon and ceiling."""
+
+        relative = self.relative_azimuth(azimuth)
+        with np.errstate(invalid="ignore"):
+            below_horizon = elevation < self.horizon.evaluate(relative)
+            above_ceiling = elevation > self.ceiling.evaluate(relative)
+        return ~(below_horizon | above_ceiling)
+
+
+PROFILE_KEYS = {"HorizonPoints": "HorizonProfile", "CeilingPoints": "CeilingProfile"}
+
+
+def sector_profile(sector: dict[str, Any], points_key: str) -> Profile:
+    """Return the compiled profile for ``points_key``, compiling it if needed."""
+
+    profile = sector.get(PROFILE_KEYS[points_key])
+    if profile is None:
+        profile = Profile(sector.get(points_key), f"{sector.get('Name', 'sector')}.{points_key}")
+    return profile
+
+
+def compile_sector_profiles(sector: dict[str, Any], context: str) -> None:
+    """Attach compiled ``HorizonProfile``/``CeilingProfile`` entries to a sector."""
+
+    for points_key, profile_key in PROFILE_KEYS.items():
+        sector[profile_key] = Profile(sector.get(points_key), f"{context}.{points_key}")
+
+
+__all__ = ["HorizonLimits", "Profile", "ProfileSet", "compile_sector_profiles", "sector_profile"]
@@ -0,0 +1,89 @@
+"""Table-driven brightness/irradiance hysteresis.
+
+Each sector runs one state machine per sensor channel:
+
+1. inactive (below the lower threshold)
+2. falling - dropped below the lower threshold, waiting for ``<Channel>LowerDelay``
+3. rising - exceeded the upper threshold, waiting for ``<Channel>UpperDelay``
+4. active (above the upper threshold)
+
+Sensor values between the thresholds leave the state untouched. Only states 2
+and 3 own a timer; when it expires the machine moves on as listed in
+``TIMEOUTS``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from .sector_state import SectorState
+from .timers import TimerHeap
+
+
+ABOVE = "above"
+BELOW = "below"
+
+# (state, event) -> (next state, config key suffix of the delay to start or None)
+TRANSITIONS = {
+    (1, ABOVE): (3, "UpperDelay"),
+    (2, ABOVE): (4, None),
+    (3, BELOW): (1, None),
+    (4, BELOW): (2, "LowerDelay"),
+}
+
+# state whose timer expired -> next state
+TIMEOUTS = {3: 4, 2: 1}
+
+CHANNELS = {"brightness": "Brightness", "irradiance": "Irradiance"}
+
+
+def classify(value: float, upper: float, lower: float) -> str | None:
+    """Return the hysteresis event for a sensor value, if any."""
+
+    if value > upper:
+        return ABOVE
+    if value < lower:
+        return BELOW
+    return None
+
+
+def apply(
+    sector: dict[str, Any],
+    sector_state: SectorState | dict[str, Any],
+    channel: str,
+    value: float,
+    timers: TimerHeap,
+    on_timeout: Callable[[str, str, int], None],
+) -> bool:
+    """Feed a sensor value into ``channel``'s state machine.
+
+    Cancels the running delay and/or schedules the next one on ``timers``;
+    ``on_timeout(guid, channel, state)`` is called when a delay expires.
+    Returns whether the state changed.
+    """
+
+    prefix = CHANNELS[channel]
+    event = classify(value, sector[f"{prefix}UpperThreshold"], sector[f"{prefix}LowerThreshold"])
+    if event is None:
+        return False
+
+    state_key = f"{channel}_state"
+    transition = TRANSITIONS.get((sector_state.get(state_key, 1), event))
+    if transition is None:
+        return False
+
+    next_state, delay_key = transition
+    timer_key = f"{channel}_timer"
+    timer = sector_state.pop(timer_key, None)
+    if timer is not None:
+        timer.cancel()
+    sector_state[state_key] = next_state
+    if delay_key is not None:
+        sector_state[timer_key] = timers.call_later(
+            sector[f"{prefix}{delay_key}"], on_timeout, sector["GUID"], channel, TIMEOUTS[next_state]
+        )
+    return True
+
+
+__all__ = ["ABOVE", "BELOW", "CHANNELS", "TIMEOUTS", "TRANSITIONS", "apply", "classify"]
@@ -0,0 +1,125 @@
+"""Bounded ring buffer between the xknx receive callback and telegram handling.
+
+xknx calls :meth:`IngestQueue.put` for every received telegram. It only
+appends the telegram to a ring buffer and returns, so the receive path never
+waits for decoding, printing or sector state updates. A consumer task
+(:meth:`IngestQueue.run`) hands the telegrams to ``handler`` (normally
+:func:`myapp.KNX.telegram_received`) in batches and yields to the event loop
+between batches.
+
+The buffer holds ``capacity`` telegrams. When it is full, a new sensor value
+(brightness, irradiance, azimuth, elevation) replaces the value for the same
+group address that is still waiting, in place (counted as coalesced): only the
+latest reading matters. Any other telegram pushes out the oldest one (counted
+as dropped).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from . import metrics
+
+
+# Address classes (see KNX.build_dispatch_table) whose older values may be replaced by newer ones.
+COALESCED_CLASSES = frozenset({"brightness", "irradiance", "azimuth", "elevation"})
+
+# Telegrams handled before the consumer yields to the event loop again.
+BATCH_SIZE = 64
+
+
+class IngestQueue:
+    """Ring buffer of received telegrams with coalescing on overflow."""
+
+    def __init__(self, capacity: int = 4096, address_classes: Mapping[int, str] | None = None) -> None:
+        self.capacity = max(1, int(capacity))
+        # Raw group address -> class, used to decide what may be coalesced.
+        self.address_classes = address_classes if address_classes is not None else {}
+        self._entries: collections.deque[list[Any]] = collections.deque()
+        # Raw address -> newest waiting entry of a coalescable address.
+        self._latest: dict[int, list[Any]] = {}
+        self._ready: asyncio.Event | None = None
+        self.received = 0
+        self.handled = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._entries)
+
+    def put(self, telegram: Any) -> None:
+        """xknx ``telegram_received_cb``: buffer ``telegram`` and return immediately."""
+
+        self.received += 1
+        raw = getattr(telegram.destination_address, "raw", None)
+        coalescable = self.address_classes.get(raw) in COALESCED_CLASSES
+        if len(self._entries) >= self.capacity:
+            waiting = self._latest.get(raw) if coalescable else None
+            if waiting is not None:
+                waiting[1] = telegram
+                self.coalesced += 1
+                if metrics.enabled:
+                    metrics.ingest_overflow.inc("coalesced")
+                return
+            self._forget(self._entries.popleft())
+            self.dropped += 1
+            if metrics.enabled:
+                metrics.ingest_overflow.inc("dropped")
+        entry = [raw, telegram]
+        self._entries.append(entry)
+        if coalescable:
+            self._latest[raw] = entry
+        if len(self._entries) > self.high_water:
+            self.high_water = len(self._entries)
+        if self._ready is not None:
+            self._ready.set()
+
+    def take(self, limit: int = BATCH_SIZE) -> list[Any]:
+        """Remove and return up to ``limit`` telegrams in arrival order."""
+
+        batch = []
+        entries = self._entries
+        while entries and len(batch) < limit:
+            entry = entries.popleft()
+            self._forget(entry)
+            batch.append(entry[1])
+        return batch
+
+    def _forget(self, entry: list[Any]) -> None:
+        if self._latest.get(entry[0]) is entry:
+            del self._latest[entry[0]]
+
+    async def run(self, handler: Callable[[Any], None]) -> None:
+        """Hand buffered telegrams to ``handler`` until cancelled."""
+
+        self._ready = asyncio.Event()
+        try:
+            while True:
+                if not self._entries:
+                    self._ready.clear()
+                    await self._ready.wait()
+                for telegram in self.take():
+                    handler(telegram)
+                    self.handled += 1
+                # Let xknx (and everything else) run between batches.
+                await asyncio.sleep(0)
+        finally:
+            self._ready = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "depth": len(self._entries),
+            "high_water": self.high_water,
+            "received": self.received,
+            "handled": self.handled,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
+
+__all__ = ["BATCH_SIZE", "COALESCED_CLASSES", "IngestQueue"]
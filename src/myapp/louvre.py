@@ -0,0 +1,122 @@
+"""Louvre cut-off angle solver and optional per-sector lookup tables."""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+from typing import Any
+
+import numpy as np
+
+
+ANGLE_STEPS = 511
+DIRECTIONS = ("opening", "closing")
+
+
+@functools.lru_cache(maxsize=None)
+def _cutoff_thresholds(louvre_spacing: float, louvre_depth: float) -> tuple[float, ...]:
+    """Return suffix minima of the cut-off threshold for angle steps 1..511.
+
+    Step ``i`` (angle ``i * 90 / 511``) blocks direct sun when
+    ``tan(elevation) / cos(relative_azimuth)`` exceeds its threshold. The largest
+    such step is the largest ``i`` whose suffix minimum is below that value, and
+    because suffix minima never decrease it can be found by bisection.
+    """
+
+    thresholds = []
+    for step in range(1, ANGLE_STEPS + 1):
+        louvre_angle_rad = math.radians(step * 90 / ANGLE_STEPS)
+        thresholds.append((louvre_spacing - math.cos(louvre_angle_rad) * louvre_depth) / (math.sin(louvre_angle_rad) * louvre_depth))
+
+    for index in range(len(thresholds) - 2, -1, -1):
+        if thresholds[index + 1] < thresholds[index]:
+            thresholds[index] = thresholds[index + 1]
+    return tuple(thresholds)
+
+
+def cutoff_angle(louvre_spacing: float, louvre_depth: float, relative_azimuth: float, current_elevation: float) -> float:
+    """Return the flattest louvre angle (degrees, 90/511 steps) that still blocks the sun."""
+
+    tany = math.tan(math.radians(current_elevation)) / math.cos(math.radians(relative_azimuth))
+    step = bisect.bisect_left(_cutoff_thresholds(louvre_spacing, louvre_depth), tany)
+    if step == 0:
+        return 90
+    return step * 90 / ANGLE_STEPS
+
+
+def angle_percent(sector: dict[str, Any], angle_deg: float, angle_direction: str) -> float:
+    """Map a louvre angle to 0-100 % between the sector's zero and hundred angles.
+
+    Buffer and minimum change are added depending on the tracking direction and
+    the result is clamped to 0..100.
+    """
+
+    zero_deg = sector.get("LouvreAngleAtZero", 0.0)
+    hundred_deg = sector.get("LouvreAngleAtHundred", 90.0)
+    span = hundred_deg - zero_deg
+    if span == 0:
+        percent = 100.0 if angle_deg >= hundred_deg else 0.0
+    else:
+        percent = (angle_deg - zero_deg) / span * 100.0
+
+    if angle_direction == "opening":
+        percent = percent + sector.get("LouvreBuffer", 0)
+    else:
+        percent = percent + sector.get("LouvreBuffer", 0) + sector.get("LouvreMinimumChange", 1)
+
+    return max(0.0, min(100.0, percent))
+
+
+def angle_bytes(sector: dict[str, Any], angle_deg: float, angle_direction: str) -> int:
+    """Convert a louvre angle to the 0-255 value sent to the NumericValue device."""
+
+    return int(round(angle_percent(sector, angle_deg, angle_direction) * 255.0 / 100.0))
+
+
+@functools.lru_cache(maxsize=None)
+def _step_grid(louvre_spacing: float, louvre_depth: float, resolution: float) -> np.ndarray:
+    """Cut-off steps over relative azimuth -90..90 and elevation 0..90 (shared per geometry)."""
+
+    azimuth = np.radians(np.linspace(-90.0, 90.0, int(round(180.0 / resolution)) + 1))
+    elevation = np.radians(np.linspace(0.0, 90.0, int(round(90.0 / resolution)) + 1))
+    tany = np.tan(elevation)[np.newaxis, :] / np.cos(azimuth)[:, np.newaxis]
+    thresholds = np.asarray(_cutoff_thresholds(louvre_spacing, louvre_depth))
+    steps = np.searchsorted(thresholds, tany, side="left")
+    steps[steps == 0] = ANGLE_STEPS
+    steps = steps.astype(np.uint16)
+    steps.setflags(write=False)
+    return steps
+
+
+class LouvreTable:
+    """Precomputed louvre output for one sector on a (relative azimuth, elevation) grid.
+
+    The grid stores the quantised cut-off step; ``bytes`` maps each step and
+    tracking direction straight to the final 0-255 value after the sector's
+    zero/hundred mapping, buffer and clamping. Grid cells are shared between
+    sectors with the same louvre spacing and depth.
+    """
+
+    def __init__(self, sector: dict[str, Any], resolution: float) -> None:
+        self.resolution = float(resolution)
+        self.steps = _step_grid(sector["LouvreSpacing"], sector["LouvreDepth"], self.resolution)
+        self.bytes = np.array(
+            [[angle_bytes(sector, step * 90 / ANGLE_STEPS, direction) for step in range(ANGLE_STEPS + 1)] for direction in DIRECTIONS],
+            dtype=np.uint8,
+        )
+
+    def lookup(self, relative_azimuth: float, current_elevation: float) -> int | None:
+        """Return the cut-off step for the nearest grid cell, or ``None`` outside the grid."""
+
+        if not (-90.0 <= relative_azimuth <= 90.0 and 0.0 <= current_elevation <= 90.0):
+            return None
+        row = int(round((relative_azimuth + 90.0) / self.resolution))
+        column = int(round(current_elevation / self.resolution))
+        return int(self.steps[row, column])
+
+    def angle_bytes(self, step: int, angle_direction: str) -> int:
+        return int(self.bytes[0 if angle_direction == "opening" else 1, step])
+
+
+__all__ = ["ANGLE_STEPS", "LouvreTable", "angle_bytes", "angle_percent", "cutoff_angle"]
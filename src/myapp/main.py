@@ -9,7 +9,6 @@ from pathlib import Path
 from typing import Any
 from xknx import XKNX
 from xknx.io import ConnectionConfig, ConnectionType
-import threading
 import psutil
 import ipaddress as ip
 
@@ -19,6 +18,13 @@ from . import SectorRunner
 from . import KNX
 from . import check_time
 from . import TimeProgramRunner
+from . import metrics
+from . import capture
+from . import shards
+from . import sun
+from . import reloader
+from . import snapshot
+from .app import application
 
 
 try:
@@ -93,7 +99,7 @@ async def connect_knx() -> Any:
             auto_reconnect_wait=configuration.knx_auto_reconnect_wait,
         )
 
-    SectorRunner.xknx = XKNX(connection_config=connection_config, daemon_mode=False, telegram_received_cb=KNX.telegram_received)
+    SectorRunner.xknx = XKNX(connection_config=connection_config, daemon_mode=False, telegram_received_cb=KNX.ingest_queue.put)
     try:
         await SectorRunner.xknx.start()
         return SectorRunner.xknx
@@ -123,7 +129,19 @@ async def _async_main() -> None:
     print(f"Server IP (Internet communication): {configuration.ip_address_internet}")
     # TODO: Print IP for API
 
+    # pvlib is slow to import; load it while the gateway connection is set up.
+    solar_backend = asyncio.get_running_loop().run_in_executor(None, sun.preload)
+
     knx: XKNX | None = None
+    sector_task: asyncio.Task[None] | None = None
+    outbound_task: asyncio.Task[None] | None = None
+    time_program_task: asyncio.Task[None] | None = None
+    metrics_task: asyncio.Task[None] | None = None
+    reload_task: asyncio.Task[None] | None = None
+    state_task: asyncio.Task[None] | None = None
+    # Received telegrams are only buffered by the xknx callback; this task handles them.
+    KNX.build_dispatch_table()
+    ingest_task = asyncio.create_task(KNX.ingest_queue.run(KNX.telegram_received), name="Ingest")
     try:
         knx = await connect_knx()
         if knx is None:
@@ -134,30 +152,85 @@ async def _async_main() -> None:
             return
 
         print("Connected to KNX gateway.")
+        application.mark("connect")
+        await solar_backend
+        if configuration.az_el_option != "BusAzEl":
+            application.mark("solar")
+        print(application.report())
+
+        if configuration.capture_path:
+            recorder = capture.start(configuration.capture_path, configuration.capture_max_bytes, configuration.capture_backups)
+            knx.telegram_queue.register_telegram_received_cb(recorder.record, match_for_outgoing=True)
 
         # Check if Time is correct (Check with NTP)
         if configuration.az_el_option == "Internet":
             await check_time.check_system_time(threshold_seconds=60)
 
-        # Start SectorRunner in background so it doesn't block the event loop.
-        loop = asyncio.get_running_loop()
-        SectorRunnerThread = threading.Thread(name='SectorRunner', args=(loop,), target=SectorRunner.start, daemon=True)
-        SectorRunnerThread.start()
-        TimeProgramRunnerThread = threading.Thread(name='TimeProgramRunner', args=(loop,), target=TimeProgramRunner.start, daemon=True)
-        TimeProgramRunnerThread.start()
+        if configuration.state_path and shards.active():
+            print("State snapshots are not available with ShardWorkers.")
+        elif configuration.state_path:
+            # Restored before the engine's first pass, so only changed outputs are sent.
+            snapshot.restore_file(configuration.state_path)
+            state_task = asyncio.create_task(snapshot.run(configuration.state_path, configuration.state_interval), name="StateSnapshot")
+
+        # SectorRunner, the time programs and the outbound queue run as tasks on this loop.
+        outbound_task = asyncio.create_task(SectorRunner.outbound_queue.run(), name="OutboundQueue")
+        engine = shards.run() if shards.active() else SectorRunner.run()
+        sector_task = asyncio.create_task(engine, name="SectorRunner")
+        time_program_task = asyncio.create_task(TimeProgramRunner.run(), name="TimeProgramRunner")
+        reload_task = asyncio.create_task(reloader.run(), name="ConfigReload")
+        if configuration.metrics_port:
+            _register_metrics()
+            metrics_task = asyncio.create_task(
+                metrics.serve(configuration.metrics_host, configuration.metrics_port), name="Metrics"
+            )
         print("Welcome to Staerium Server!")
         try:
             await asyncio.Future()
         except asyncio.CancelledError:
             pass
     finally:
+        if state_task is not None:
+            state_task.cancel()
+            await asyncio.gather(state_task, return_exceptions=True)
+        if reload_task is not None:
+            reload_task.cancel()
+        if metrics_task is not None:
+            metrics_task.cancel()
+        if sector_task is not None:
+            sector_task.cancel()
+        if time_program_task is not None:
+            time_program_task.cancel()
+        if outbound_task is not None:
+            outbound_task.cancel()
         if knx is not None:
             await knx.stop()
             print("KNX connection closed.")
+        ingest_task.cancel()
+        capture.stop()
+
+
+def _register_metrics() -> None:
+    """Expose engine state that is only read when the endpoint is scraped."""
+    queue = SectorRunner.outbound_queue
+    metrics.gauge("staerium_hysteresis_timers_pending", "Brightness/irradiance delays waiting to fire.", lambda: SectorRunner.hysteresis_timers.pending)
+    metrics.gauge("staerium_outbound_queue_depth", "Writes waiting in the outbound queue.", lambda: queue.depth)
+    metrics.gauge("staerium_outbound_in_flight", "Writes currently being sent.", lambda: queue.in_flight)
+    metrics.gauge("staerium_outbound_send_rate", "Telegrams per second sent over the last 10 s.", lambda: queue.send_rate)
+    metrics.gauge("staerium_outbound_latency_max_seconds", "Longest time from enqueue to sent.", lambda: queue.latency_max)
+    metrics.gauge("staerium_ingest_buffer_depth", "Received telegrams waiting to be handled.", lambda: KNX.ingest_queue.depth)
+    metrics.gauge("staerium_ingest_buffer_high_water", "Most received telegrams waiting at once.", lambda: KNX.ingest_queue.high_water)
 
 
 def main() -> None:
-    asyncio.run(_async_main())
+    application.mark("modules")
+    # Workers are forked before the event loop (and xknx) exist.
+    if configuration.shard_workers > 1:
+        shards.start(configuration.shard_workers)
+    try:
+        asyncio.run(_async_main())
+    finally:
+        shards.stop()
 
 
 if __name__ == "__main__":
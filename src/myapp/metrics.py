@@ -0,0 +1,196 @@
+"""Optional Prometheus text-format metrics endpoint.
+
+Disabled unless the ``METRICS_PORT`` environment variable is set. While
+disabled, hot paths only test :data:`enabled` and skip all collection. When
+enabled, collection is plain integer/float arithmetic on module-level objects;
+gauges such as queue depth are read from registered callbacks at scrape time
+only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import collections
+import math
+from collections.abc import Callable, Iterable
+
+
+enabled = False
+
+_LOOP_LAG_INTERVAL = 0.5
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with fixed upper bounds."""
+
+    __slots__ = ("name", "help", "bounds", "counts", "sum", "count")
+
+    def __init__(self, name: str, help: str, bounds: Iterable[float]) -> None:
+        self.name = name
+        self.help = help
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format(bound)}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {_format(self.sum)}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class LabelledCounter:
+    """Monotonic counters split by one label."""
+
+    __slots__ = ("name", "help", "label", "values")
+
+    def __init__(self, name: str, help: str, label: str) -> None:
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values: collections.Counter[str] = collections.Counter()
+
+    def inc(self, label_value: str, amount: int = 1) -> None:
+        self.values[label_value] += amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_value, count in sorted(self.values.items()):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+_LATENCY_BOUNDS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1)
+_LAG_BOUNDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+sector_evaluation = Histogram(
+    "staerium_sector_evaluation_seconds", "Time spent evaluating one sector.", _LATENCY_BOUNDS
+)
+loop_lag = Histogram("staerium_event_loop_lag_seconds", "Delay of event loop wake-ups beyond their schedule.", _LAG_BOUNDS)
+telegrams_received = LabelledCounter(
+    "staerium_telegrams_received_total", "Telegrams received for configured group addresses.", "class"
+)
+telegrams_sent = LabelledCounter("staerium_telegrams_sent_total", "Telegrams written to the bus.", "class")
+decode_errors = LabelledCounter("staerium_decode_errors_total", "Telegram payloads that failed to decode.", "dpt")
+ingest_overflow = LabelledCounter(
+    "staerium_ingest_overflow_total", "Received telegrams coalesced or dropped because the ingest buffer was full.", "outcome"
+)
+
+_gauges: list[tuple[str, str, Callable[[], float]]] = []
+
+
+def gauge(name: str, help: str, read: Callable[[], float]) -> None:
+    """Register a gauge whose value is read by calling ``read`` on every scrape."""
+
+    _gauges[:] = [entry for entry in _gauges if entry[0] != name]
+    _gauges.append((name, help, read))
+
+
+def render() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+
+    lines: list[str] = []
+    for name, help, read in _gauges:
+        try:
+            value = float(read())
+        except Exception:
+            value = math.nan
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {_format(value)}"]
+    for metric in (sector_evaluation, loop_lag, telegrams_received, telegrams_sent, decode_errors, ingest_overflow):
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Clear all collected values (registered gauges are kept)."""
+
+    for histogram in (sector_evaluation, loop_lag):
+        histogram.counts = [0] * len(histogram.counts)
+        histogram.sum = 0.0
+        histogram.count = 0
+    for counter in (telegrams_received, telegrams_sent, decode_errors, ingest_overflow):
+        counter.values.clear()
+
+
+async def serve(host: str, port: int) -> None:
+    """Enable collection and serve ``/metrics`` on ``host:port`` until cancelled."""
+
+    global enabled
+    server = await asyncio.start_server(_handle_request, host, port)
+    enabled = True
+    print(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    monitor = asyncio.create_task(_monitor_loop_lag())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        enabled = False
+        monitor.cancel()
+
+
+async def _monitor_loop_lag() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + _LOOP_LAG_INTERVAL
+        await asyncio.sleep(_LOOP_LAG_INTERVAL)
+        loop_lag.observe(max(0.0, loop.time() - scheduled))
+
+
+async def _handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Drain the headers; the request body (if any) is ignored.
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+            status, body = "200 OK", render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _format(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+__all__ = [
+    "Histogram",
+    "LabelledCounter",
+    "decode_errors",
+    "enabled",
+    "gauge",
+    "ingest_overflow",
+    "loop_lag",
+    "render",
+    "reset",
+    "sector_evaluation",
+    "serve",
+    "telegrams_received",
+    "telegrams_sent",
+]
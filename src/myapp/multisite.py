@@ -0,0 +1,381 @@
+"""Serve several buildings (sites) from one container.
+
+Each site is one configuration file and keeps its own KNX connection, sector
+engine and time programs. Because the server keeps its state in module-level
+globals, every site runs in its own process: the supervisor imports the heavy
+libraries (numpy, pandas, pvlib, xknx) once and forks one child per site, so
+their code and data pages are shared copy-on-write and each additional site
+only costs its own configuration and engine state. A child that exits is
+restarted after a delay.
+
+Sites with identical coordinates (and solar settings) share their sun position:
+the supervisor maps one slot per coordinate group into shared memory before
+forking, and :func:`myapp.sun.calculate_solar_position` computes the position
+for a whole second only if no other site of the group stored that second yet
+(see :class:`SunPositions`). This works with and without ``SolarEphemeris``;
+with it the ephemeris tables are also shared through ``EPHEMERIS_CACHE_DIR``
+(a temporary directory unless set): the first site that needs a day computes
+it and the others memory-map the same file.
+
+Per-site environment: output lines are prefixed with the site name,
+``METRICS_PORT`` is offset by the site index and ``CAPTURE_PATH`` and
+``STATE_PATH`` get the site name appended.
+
+Usage (files or directories of ``*.xml``/``*.sunproj``; ``STAERIUM_SITES``
+is used when no argument is given)::
+
+    python -m myapp.multisite /app/sites
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib
+import mmap
+import multiprocessing
+import os
+import signal
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TextIO
+
+import psutil
+
+
+# Imported once in the supervisor and shared with all site processes.
+_PRELOAD = ("numpy", "pandas", "pytz", "pvlib.location", "pvlib.solarposition", "xknx", "xknx.devices")
+
+_RESTART_DELAY = 5.0
+_STOP_TIMEOUT = 10.0
+_MEMORY_REPORT_DELAY = 30.0
+_SITE_SUFFIXES = (".xml", ".sunproj")
+
+# Shared sun position slot: second (-1 = empty), azimuth, elevation, computed, shared.
+_SUN_SLOT = struct.Struct("<qddQQ")
+
+
+def discover(paths: list[str | os.PathLike[str]]) -> dict[str, Path]:
+    """Map site names (file stems) to configuration files; directories are expanded."""
+
+    sites: dict[str, Path] = {}
+    for entry in paths:
+        entry = Path(entry)
+        files = sorted(f for f in entry.iterdir() if f.suffix in _SITE_SUFFIXES) if entry.is_dir() else [entry]
+        for file in files:
+            if not file.is_file():
+                raise FileNotFoundError(f"Site configuration {file} does not exist")
+            if file.stem in sites:
+                raise ValueError(f"Duplicate site name '{file.stem}' ({sites[file.stem]} and {file})")
+            sites[file.stem] = file
+    return sites
+
+
+def sun_groups(sites: dict[str, Path]) -> dict[tuple[Any, ...], list[str]]:
+    """Group the sites whose sun positions are identical: same coordinates, timezone, engine and ephemeris setting.
+
+    Sites reading azimuth/elevation from the bus (``BusAzEl``) are left out.
+    """
+
+    from .config_loader import load_config
+
+    groups: dict[tuple[Any, ...], list[str]] = {}
+    for name, path in sites.items():
+        config = load_config(path)
+        if config.get("AzElOption", "Internet") == "BusAzEl":
+            continue
+        key = (
+            config.get("Latitude"),
+            config.get("Longitude"),
+            config.get("AzElTimezone", "Europe/Zurich"),
+            str(config.get("SolarEngine", "pvlib")).lower(),
+            bool(config.get("SolarEphemeris", False)),
+        )
+        groups.setdefault(key, []).append(name)
+    return groups
+
+
+class SunPositions:
+    """Sun position slots in anonymous shared memory, inherited by the forked sites.
+
+    Each slot holds the position of one coordinate group for one whole second
+    (Unix time). A site asks its slot for the second it is about to compute;
+    if another site of the group already stored it, the stored position is
+    used. Slots are read and written under a per-slot lock.
+    """
+
+    def __init__(self, slots: int) -> None:
+        context = multiprocessing.get_context("fork")
+        self._buffer = mmap.mmap(-1, max(1, slots) * _SUN_SLOT.size)
+        self._locks = [context.Lock() for _ in range(slots)]
+        for index in range(slots):
+            _SUN_SLOT.pack_into(self._buffer, index * _SUN_SLOT.size, -1, 0.0, 0.0, 0, 0)
+
+    def slot(self, index: int) -> SunSlot:
+        return SunSlot(self, index)
+
+    def stats(self, index: int) -> tuple[int, int]:
+        """Positions computed and positions taken from the slot by another site."""
+
+        with self._locks[index]:
+            _, _, _, computed, shared = _SUN_SLOT.unpack_from(self._buffer, index * _SUN_SLOT.size)
+        return computed, shared
+
+
+class SunSlot:
+    """One coordinate group's slot; set as :data:`myapp.sun.shared_position` in its sites."""
+
+    def __init__(self, positions: SunPositions, index: int) -> None:
+        self._buffer = positions._buffer
+        self._lock = positions._locks[index]
+        self._offset = index * _SUN_SLOT.size
+
+    def position(self, second: int, compute: Callable[[], tuple[float, float]]) -> tuple[float, float]:
+        """Azimuth and elevation at ``second``: from the slot, or computed and stored."""
+
+        with self._lock:
+            stored, azimuth, elevation, computed, shared = _SUN_SLOT.unpack_from(self._buffer, self._offset)
+            if stored == second:
+                _SUN_SLOT.pack_into(self._buffer, self._offset, stored, azimuth, elevation, computed, shared + 1)
+                return azimuth, elevation
+        azimuth, elevation = compute()
+        with self._lock:
+            computed, shared = _SUN_SLOT.unpack_from(self._buffer, self._offset)[3:]
+            _SUN_SLOT.pack_into(self._buffer, self._offset, second, azimuth, elevation, computed + 1, shared)
+        return azimuth, elevation
+
+
+# Site name -> its sun position slot; filled by Supervisor.start() before forking.
+_sun_slots: dict[str, SunSlot] = {}
+
+
+class _PrefixedStream:
+    """Text stream wrapper that writes whole lines prefixed with the site name.
+
+    Complete lines are flushed at once so output of different sites sharing
+    one stream never interleaves within a line.
+    """
+
+    def __init__(self, stream: TextIO, prefix: str) -> None:
+        self._stream = stream
+        self._prefix = prefix
+        self._partial = ""
+
+    def write(self, text: str) -> int:
+        *lines, self._partial = (self._partial + text).split("\n")
+        if lines:
+            self._stream.write("".join(f"{self._prefix}{line}\n" for line in lines))
+            self._stream.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self._partial:
+            self._stream.write(f"{self._prefix}{self._partial}")
+            self._partial = ""
+        self._stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+def _site_environment(name: str, config: Path, index: int) -> None:
+    os.environ["STAERIUM_CONFIG"] = str(config)
+    port = os.environ.get("METRICS_PORT", "")
+    if port.isdigit():
+        os.environ["METRICS_PORT"] = str(int(port) + index)
+    for variable in ("CAPTURE_PATH", "STATE_PATH"):
+        path = os.environ.get(variable, "")
+        if path:
+            os.environ[variable] = f"{path}.{name}"
+
+
+def load_site(name: str, config: Path, index: int = 0) -> Any:
+    """Prepare this (forked) process for one site and return its ``myapp.main`` module.
+
+    The package was imported by the supervisor with its own configuration, so
+    it is reloaded with the site's one before any engine module is imported.
+    """
+
+    _site_environment(name, config, index)
+    sys.stdout = _PrefixedStream(sys.stdout, f"[{name}] ")
+    sys.stderr = _PrefixedStream(sys.stderr, f"[{name}] ")
+    package = sys.modules["myapp"]
+    for module in [module for module in sys.modules if module.startswith("myapp.") and module != __name__]:
+        del sys.modules[module]
+        if module.count(".") == 1 and hasattr(package, module[6:]):
+            delattr(package, module[6:])
+    importlib.reload(package)
+    main = importlib.import_module("myapp.main")
+    slot = _sun_slots.get(name)
+    if slot is not None:
+        importlib.import_module("myapp.sun").shared_position = slot
+    return main
+
+
+def _run_site(name: str, config: Path, index: int) -> None:
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)  # until the site's reloader handles it
+    try:
+        load_site(name, config, index).main()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout.flush()
+
+
+class Supervisor:
+    """Forks one process per site and restarts the ones that exit."""
+
+    def __init__(self, sites: dict[str, Path], target: Callable[[str, Path, int], None] = _run_site) -> None:
+        self.sites = sites
+        self.target = target
+        self._context = multiprocessing.get_context("fork")
+        self._processes: dict[str, Any] = {}
+        self._restart_at: dict[str, float] = {}
+        self._stopping = False
+        self.sun_groups: dict[tuple[Any, ...], list[str]] = {}
+        self.sun_positions: SunPositions | None = None
+
+    def start(self) -> None:
+        self.sun_groups = sun_groups(self.sites)
+        self.sun_positions = SunPositions(len(self.sun_groups))
+        _sun_slots.clear()
+        for index, names in enumerate(self.sun_groups.values()):
+            for name in names:
+                _sun_slots[name] = self.sun_positions.slot(index)
+        gc.collect()
+        # Keep the preloaded objects out of the collector so it does not touch (and un-share) their pages.
+        gc.freeze()
+        for index, name in enumerate(self.sites):
+            self._spawn(name, index)
+
+    def _spawn(self, name: str, index: int) -> None:
+        process = self._context.Process(
+            target=self.target, args=(name, self.sites[name], index), name=f"site-{name}", daemon=False
+        )
+        process.start()
+        self._processes[name] = process
+        print(f"Site {name} started (pid {process.pid}, {self.sites[name]})")
+
+    def poll(self) -> None:
+        """Schedule restarts for exited sites and start the ones that are due."""
+
+        now = time.monotonic()
+        for index, name in enumerate(self.sites):
+            process = self._processes.get(name)
+            if process is not None and process.exitcode is not None:
+                print(f"Site {name} exited with code {process.exitcode}, restarting in {_RESTART_DELAY:.0f} s")
+                self._processes.pop(name)
+                self._restart_at[name] = now + _RESTART_DELAY
+            if name in self._restart_at and self._restart_at[name] <= now and not self._stopping:
+                del self._restart_at[name]
+                self._spawn(name, index)
+
+    def reload(self) -> None:
+        """Ask every site to reload its configuration file."""
+
+        for process in self._processes.values():
+            if process.exitcode is None and process.pid is not None:
+                os.kill(process.pid, signal.SIGHUP)
+
+    def stop(self) -> None:
+        self._stopping = True
+        for process in self._processes.values():
+            if process.exitcode is None and process.pid is not None:
+                os.kill(process.pid, signal.SIGINT)
+        deadline = time.monotonic() + _STOP_TIMEOUT
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.exitcode is None:
+                process.terminate()
+                process.join()
+        self._processes.clear()
+        gc.unfreeze()
+
+    def memory_report(self) -> str:
+        """Memory per site and what sharing saves, plus the shared sun positions per coordinate group.
+
+        RSS counts shared pages in full, so it is about what the site would
+        use as a standalone process; PSS splits shared pages between the
+        processes. Their difference is the per-site saving.
+        """
+
+        lines = [f"Supervisor RSS {psutil.Process().memory_info().rss / 2**20:.0f} MiB"]
+        total = standalone = 0.0
+        for name, process in self._processes.items():
+            try:
+                info = psutil.Process(process.pid).memory_full_info()
+            except (psutil.Error, TypeError):
+                continue
+            rss = info.rss / 2**20
+            pss = getattr(info, "pss", info.rss) / 2**20
+            total += pss
+            standalone += rss
+            lines.append(
+                f"  {name}: PSS {pss:.0f} MiB, unique {info.uss / 2**20:.0f} MiB, RSS {rss:.0f} MiB (saves {rss - pss:.0f} MiB)"
+            )
+        lines.append(f"  {len(self._processes)} sites, PSS total {total:.0f} MiB, standalone about {standalone:.0f} MiB")
+        if self.sun_positions is not None:
+            for index, ((latitude, longitude, *_), names) in enumerate(self.sun_groups.items()):
+                computed, shared = self.sun_positions.stats(index)
+                lines.append(
+                    f"  Sun position {latitude}, {longitude} ({len(names)} sites): {computed} computed, {shared} shared"
+                )
+        return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve several site configurations from one container.")
+    parser.add_argument("paths", nargs="*", help="configuration files or directories (default: STAERIUM_SITES)")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or [entry for entry in os.environ.get("STAERIUM_SITES", "").split(os.pathsep) if entry]
+    if not paths:
+        parser.error("no site configurations given (arguments or STAERIUM_SITES)")
+    sites = discover(paths)
+    if not sites:
+        parser.error("no *.xml or *.sunproj site configurations found")
+
+    started = time.perf_counter()
+    for module in _PRELOAD:
+        importlib.import_module(module)
+    print(f"Preloaded shared libraries in {time.perf_counter() - started:.2f} s")
+    os.environ.setdefault("EPHEMERIS_CACHE_DIR", tempfile.mkdtemp(prefix="staerium-ephemeris-"))
+
+    supervisor = Supervisor(sites)
+    stop = False
+
+    def request_stop(signum: int, frame: Any) -> None:
+        nonlocal stop
+        stop = True
+
+    supervisor.start()
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGHUP, lambda signum, frame: supervisor.reload())
+    print(f"Serving {len(sites)} sites.")
+    report_at = time.monotonic() + _MEMORY_REPORT_DELAY
+    try:
+        while True:
+            time.sleep(1.0)
+            if stop:
+                break
+            supervisor.poll()
+            if report_at and time.monotonic() >= report_at:
+                print(supervisor.memory_report())
+                report_at = 0.0
+    finally:
+        print("Stopping sites ...")
+        supervisor.stop()
+
+
+__all__ = ["SunPositions", "SunSlot", "Supervisor", "discover", "load_site", "sun_groups"]
+
+
+if __name__ == "__main__":
+    main()
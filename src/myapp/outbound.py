@@ -0,0 +1,302 @@
+"""Non-blocking outbound telegram queue between the engines and xknx.
+
+Producers call :meth:`OutboundQueue.submit` and continue immediately; a single
+sender task drains the queue with bounded concurrency. Writes are keyed by the
+device's group address: a newer value for an address that has not been sent yet
+replaces the older one (counted as superseded), and writes to an address that
+is still in flight wait so values never overtake each other.
+
+Each priority level keeps a FIFO of ready writes. A write whose address turns
+out to be in flight when it reaches the head is parked with that address and
+re-admitted when the send completes, so picking the next write stays O(1)
+however long the backlog is.
+
+Writes carry a priority (sun/height before louvre tracking before time
+programs) and an optional token bucket caps the telegram rate per connection.
+Time-program writes are submitted uncoalesced, so they may be deferred by the
+budget but are never dropped. Per-address ordering is guaranteed within one
+priority level.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import heapq
+import itertools
+import time
+from typing import Any
+
+from . import metrics
+
+
+PRIORITY_SUN = 0
+PRIORITY_LOUVRE = 1
+PRIORITY_PROGRAM = 2
+PRIORITY_NAMES = ("sun", "louvre", "program")
+
+# Window over which the effective send rate is measured, in seconds.
+_RATE_WINDOW = 10.0
+
+
+class TokenBucket:
+    """Telegram budget: ``rate`` tokens per second, at most ``burst`` saved up."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+
+        self._refill()
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait for and consume one token."""
+
+        wait = self.delay()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self.delay()
+        self.tokens -= 1.0
+
+    def refund(self) -> None:
+        """Return a token that was acquired but not used."""
+
+        self._refill()
+        self.tokens = min(self.burst, self.tokens + 1.0)
+
+
+class Write:
+    """One pending device write."""
+
+    __slots__ = ("key", "device", "value", "priority", "enqueued", "sequence")
+
+    def __init__(self, key: Any, device: Any, value: Any, priority: int, enqueued: float, sequence: int = 0) -> None:
+        self.key = key
+        self.device = device
+        self.value = value
+        self.priority = priority
+        self.enqueued = enqueued
+        self.sequence = sequence
+
+    async def send(self) -> None:
+        # Switches take booleans, NumericValue devices raw values.
+        if isinstance(self.value, bool):
+            if self.value:
+                await self.device.set_on()
+            else:
+                await self.device.set_off()
+        else:
+            await self.device.set(self.value)
+
+
+class OutboundQueue:
+    """Coalescing, prioritised write queue drained by :meth:`run`.
+
+    ``rate`` limits sends to that many telegrams per second (``0`` = unlimited)
+    with up to ``burst`` telegrams sent back to back.
+    """
+
+    def __init__(self, concurrency: int = 4, rate: float = 0, burst: float = 10) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = TokenBucket(rate, burst) if rate and rate > 0 else None
+        self._pending: list[dict[Any, Write]] = [{} for _ in PRIORITY_NAMES]
+        # Keys of pending writes per priority, in submission order.
+        self._queues: list[collections.deque[Any]] = [collections.deque() for _ in PRIORITY_NAMES]
+        # Address in flight -> heap of (priority, sequence, key) parked behind it.
+        self._parked: dict[Any, list[tuple[int, int, Any]]] = {}
+        self._sent_at: collections.deque[float] = collections.deque()
+        self._inflight: set[Any] = set()
+        self._unique = itertools.count()
+        self._sequence = itertools.count()
+        self._ready: asyncio.Event | None = None
+        self.sent = 0
+        self.failed = 0
+        self.superseded = 0
+        self.latency_last = 0.0
+        self.latency_max = 0.0
+        self.latency_total = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Writes waiting to be sent (not counting those in flight)."""
+
+        return sum(len(level) for level in self._pending)
+
+    @property
+    def backlog(self) -> dict[str, int]:
+        """Pending writes per priority level."""
+
+        return {name: len(level) for name, level in zip(PRIORITY_NAMES, self._pending)}
+
+    @property
+    def send_rate(self) -> float:
+        """Telegrams per second actually sent over the last few seconds."""
+
+        self._prune_sent(time.monotonic())
+        return len(self._sent_at) / _RATE_WINDOW
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> dict[str, float]:
+        """Snapshot of queue depth and per-write latency (seconds)."""
+
+        return {
+            "depth": self.depth,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "failed": self.failed,
+            "superseded": self.superseded,
+            "send_rate": self.send_rate,
+            "rate_limit": self.bucket.rate if self.bucket is not None else 0.0,
+            **{f"backlog_{name}": count for name, count in self.backlog.items()},
+            "latency_last": self.latency_last,
+            "latency_max": self.latency_max,
+            "latency_mean": self.latency_total / self.sent if self.sent else 0.0,
+        }
+
+    def submit(self, device: Any, value: Any, *, priority: int = PRIORITY_SUN, coalesce: bool = True) -> None:
+        """Queue ``value`` for ``device`` without waiting for it to be sent.
+
+        With ``coalesce`` a pending write to the same group address and priority
+        is replaced. Must be called from the event loop thread.
+        """
+
+        address = next(iter(device.group_addresses()), None)
+        key = address.raw if address is not None else device.name
+        pending = self._pending[priority]
+        if not coalesce:
+            key = (key, next(self._unique))
+        write = pending.get(key)
+        if write is not None:
+            # Keeps its place in the queue (or behind its in-flight address).
+            self.superseded += 1
+            write.device, write.value, write.enqueued = device, value, time.monotonic()
+            return
+        pending[key] = Write(key, device, value, priority, time.monotonic(), next(self._sequence))
+        self._queues[priority].append(key)
+        if self._ready is not None:
+            self._ready.set()
+
+    async def run(self) -> None:
+        """Send queued writes until cancelled."""
+
+        self._ready = asyncio.Event()
+        slots = asyncio.Semaphore(self.concurrency)
+        senders: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                await slots.acquire()
+                write = None
+                while write is None:
+                    while not self._sendable():
+                        self._ready.clear()
+                        await self._ready.wait()
+                    # Pick the write only once a token is available, so anything
+                    # more urgent that arrived meanwhile goes first.
+                    if self.bucket is not None:
+                        await self.bucket.acquire()
+                    write = self._take()
+                    if write is None and self.bucket is not None:
+                        # Nothing sendable any more: keep the token for the next write.
+                        self.bucket.refund()
+                task = asyncio.create_task(self._send(write, slots))
+                senders.add(task)
+                task.add_done_callback(senders.discard)
+        finally:
+            for task in senders:
+                task.cancel()
+            self._ready = None
+
+    def _sendable(self) -> bool:
+        """Whether a write can be sent now; parks queue heads whose address is in flight."""
+
+        inflight = self._inflight
+        for priority, queue in enumerate(self._queues):
+            while queue:
+                key = queue[0]
+                address = _address_of(key)
+                if address not in inflight:
+                    return True
+                queue.popleft()
+                write = self._pending[priority][key]
+                heapq.heappush(self._parked.setdefault(address, []), (priority, write.sequence, key))
+        return False
+
+    def _take(self) -> Write | None:
+        if not self._sendable():
+            return None
+        for priority, queue in enumerate(self._queues):
+            if queue:
+                key = queue.popleft()
+                self._inflight.add(_address_of(key))
+                return self._pending[priority].pop(key)
+        return None
+
+    def _release(self, address: Any) -> None:
+        """The send to ``address`` completed: re-admit its oldest, most urgent parked write."""
+
+        self._inflight.discard(address)
+        parked = self._parked.get(address)
+        if parked:
+            priority, _, key = heapq.heappop(parked)
+            if not parked:
+                del self._parked[address]
+            self._queues[priority].appendleft(key)
+
+    def _prune_sent(self, now: float) -> None:
+        sent_at = self._sent_at
+        while sent_at and sent_at[0] < now - _RATE_WINDOW:
+            sent_at.popleft()
+
+    async def _send(self, write: Write, slots: asyncio.Semaphore) -> None:
+        try:
+            await write.send()
+        except Exception as exc:
+            self.failed += 1
+            print(f"Failed to send {write.value} to {write.device.name}: {exc}")
+        else:
+            now = time.monotonic()
+            latency = now - write.enqueued
+            self.sent += 1
+            self._sent_at.append(now)
+            self._prune_sent(now)
+            if metrics.enabled:
+                metrics.telegrams_sent.inc(PRIORITY_NAMES[write.priority])
+            self.latency_last = latency
+            self.latency_total += latency
+            if latency > self.latency_max:
+                self.latency_max = latency
+        finally:
+            self._release(_address_of(write.key))
+            slots.release()
+            if self._ready is not None:
+                self._ready.set()
+
+
+def _address_of(key: Any) -> Any:
+    return key[0] if isinstance(key, tuple) else key
+
+
+__all__ = [
+    "OutboundQueue",
+    "PRIORITY_LOUVRE",
+    "PRIORITY_NAMES",
+    "PRIORITY_PROGRAM",
+    "PRIORITY_SUN",
+    "TokenBucket",
+    "Write",
+]
@@ -0,0 +1,120 @@
+"""Hot reload of the configuration file.
+
+:func:`run` watches the configuration file (every ``ConfigWatchInterval``
+seconds, default ``5``, ``0`` turns polling off) and reloads it on ``SIGHUP``.
+The new sectors and time programs are diffed against the running ones by
+``GUID`` and only the differences are applied (see
+:func:`myapp.SectorRunner.reconfigure` and
+:func:`myapp.TimeProgramRunner.reconfigure`): unchanged sectors keep their
+state, timers and devices and send nothing.
+
+Other settings (KNX connection, coordinates, Az/El source ...) are only read at
+startup; a reload that changes them reports that a restart is needed. A file
+that fails to load is reported and the running configuration stays active.
+Reloading is not supported with sharded evaluation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+from pathlib import Path
+from typing import Any
+
+from . import KNX, SectorRunner, TimeProgramRunner, configuration, shards
+from .app import application
+from .config_loader import config_path, load_config
+
+
+# Applied by reload(); every other top-level setting needs a restart.
+RELOADABLE = frozenset({"Sectors", "TimePrograms"})
+
+_requested: asyncio.Event | None = None
+
+
+def request() -> None:
+    """Ask the running watcher to reload (e.g. from a signal handler)."""
+
+    if _requested is not None:
+        _requested.set()
+
+
+async def run(path: str | os.PathLike[str] | None = None) -> None:
+    """Reload ``path`` (default: the loaded configuration file) when it changes or on SIGHUP."""
+
+    global _requested
+    path = config_path(path if path is not None else application.config_path)
+    loop = asyncio.get_running_loop()
+    _requested = asyncio.Event()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, request)
+        handles_signal = True
+    except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+        handles_signal = False  # no SIGHUP on this platform, or not the main thread
+    interval = configuration.config_watch_interval
+    seen = _signature(path)
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(_requested.wait(), timeout=interval if interval > 0 else None)
+            except asyncio.TimeoutError:
+                current = _signature(path)
+                if current == seen:
+                    continue
+                seen = current
+            _requested.clear()
+            try:
+                config = await loop.run_in_executor(None, load_config, path)
+            except Exception as exc:
+                print(f"Configuration reload failed, keeping the running configuration: {exc}")
+                continue
+            seen = _signature(path)
+            reload(config)
+    finally:
+        if handles_signal:
+            loop.remove_signal_handler(signal.SIGHUP)
+        _requested = None
+
+
+def reload(config: dict[str, Any]) -> dict[str, Any]:
+    """Apply a freshly loaded configuration to the running server; returns a summary."""
+
+    if shards.active():
+        print("Configuration changed; restart the server to apply it (not supported with ShardWorkers).")
+        return {}
+    previous = application.config
+    restart = sorted(
+        key for key in set(previous) | set(config) if key not in RELOADABLE and previous.get(key) != config.get(key)
+    )
+    added, removed, changed = SectorRunner.reconfigure(config.get("Sectors") or [])
+    KNX.build_dispatch_table()
+    commands_added, commands_removed = TimeProgramRunner.reconfigure(config.get("TimePrograms") or [])
+    application.replace(config)
+
+    summary = {
+        "sectors_added": added,
+        "sectors_removed": removed,
+        "sectors_changed": changed,
+        "commands_added": commands_added,
+        "commands_removed": commands_removed,
+        "restart_required": restart,
+    }
+    print(
+        f"Configuration reloaded: sectors {len(added)} added, {len(removed)} removed, {len(changed)} changed; "
+        f"time program commands {commands_added} added, {commands_removed} removed"
+    )
+    if restart:
+        print(f"Changed settings that need a restart to take effect: {', '.join(restart)}")
+    return summary
+
+
+def _signature(path: Path) -> tuple[int, int, int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+__all__ = ["RELOADABLE", "reload", "request", "run"]
@@ -0,0 +1,269 @@
+"""Replay a telegram capture through the sector engine and time programs.
+
+Incoming telegrams of a capture (see :mod:`myapp.capture`) are fed to
+:func:`myapp.KNX.telegram_received` while the sector engine, the time
+programs and the outbound queue run against an unconnected xKNX instance, so
+the writes they produce can be compared with the ones in the capture.
+
+The wall clock follows the capture, so sun positions and time programs see
+the recorded time. With ``realtime=False`` (the default) the replay runs on an
+event loop with virtual time: hysteresis delays, the sun ticker and time
+programs fire at their recorded offsets, but the loop never actually sleeps,
+which makes the result deterministic and the run as fast as the engine allows.
+Engine state starts as after a server restart. The outbound telegram budget is
+not applied.
+
+Usage (the configuration comes from ``STAERIUM_CONFIG`` or ``config.xml``)::
+
+    python -m myapp.replay /var/lib/staerium/capture.bin
+    python -m myapp.replay capture.bin --realtime
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import datetime
+import heapq
+import os
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from xknx import XKNX
+from xknx.telegram import GroupAddress
+
+from . import KNX, SectorRunner, TimeProgramRunner, bustime, capture, clock, configuration, outbound, sun
+from .sector_state import SectorState
+
+
+Signature = tuple[int, int, int, bytes]  # destination, kind, flags, payload
+
+
+@dataclass
+class ReplayResult:
+    """What a replay fed in, what it produced and how long it took."""
+
+    incoming: int = 0
+    recorded: list[tuple[float, Signature]] = field(default_factory=list)
+    replayed: list[tuple[float, Signature]] = field(default_factory=list)
+    ingest_seconds: list[float] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def divergent_addresses(self) -> list[int]:
+        """Group addresses whose sequence of outgoing writes differs from the capture."""
+
+        recorded: dict[int, list[Signature]] = collections.defaultdict(list)
+        replayed: dict[int, list[Signature]] = collections.defaultdict(list)
+        for _, signature in self.recorded:
+            recorded[signature[0]].append(signature)
+        for _, signature in self.replayed:
+            replayed[signature[0]].append(signature)
+        return sorted(address for address in recorded.keys() | replayed.keys() if recorded[address] != replayed[address])
+
+
+class _VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock only moves when the replay advances it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._virtual_time = 0.0
+
+    def time(self) -> float:
+        return self._virtual_time
+
+    def advance_to(self, when: float) -> None:
+        self._virtual_time = max(self._virtual_time, when)
+
+    def next_deadline(self) -> float | None:
+        scheduled = self._scheduled  # type: ignore[attr-defined]
+        while scheduled and scheduled[0].cancelled():
+            heapq.heappop(scheduled)
+        return scheduled[0].when() if scheduled else None
+
+
+class _LoopClock:
+    """Wall clock that advances with the event loop's time from a fixed start."""
+
+    def __init__(self, start: datetime.datetime, loop: asyncio.AbstractEventLoop) -> None:
+        self._start = start
+        self._loop = loop
+        self._origin = loop.time()
+
+    def now(self, tz: datetime.tzinfo | None = None) -> datetime.datetime:
+        moment = self._start + datetime.timedelta(seconds=self._loop.time() - self._origin)
+        if tz is None:
+            return moment.astimezone().replace(tzinfo=None)
+        return moment.astimezone(tz)
+
+    def monotonic(self) -> float:
+        return self._loop.time()
+
+
+def _signature(telegram) -> Signature:
+    _, kind, flags, destination, _, payload = capture.encode(telegram)
+    return (destination, kind, flags & capture.FLAG_BINARY, payload)
+
+
+def _record_signature(record) -> Signature:
+    length = int(record["length"])
+    flags = int(record["flags"]) & capture.FLAG_BINARY
+    return (int(record["destination"]), int(record["kind"]), flags, bytes(record["payload"][:length]))
+
+
+def _load(path: str | os.PathLike[str]) -> tuple[datetime.datetime, list[tuple[float, object]]]:
+    """All records of a capture and its backups with offsets (s) from the first file's start."""
+
+    files = capture.capture_files(path)
+    if not files:
+        raise FileNotFoundError(path)
+    captures = [capture.read(file) for file in files]
+    first = min(captures, key=lambda item: item.started)
+    records = []
+    for item in captures:
+        # Files may come from different runs, so they are placed by their wall clock start.
+        base = (item.started - first.started).total_seconds()
+        records.extend((base + int(record["time"]) / 1e9, record) for record in item.records)
+    records.sort(key=lambda entry: entry[0])
+    return first.started, records
+
+
+def _engine_idle(queue: outbound.OutboundQueue) -> bool:
+    wakeup = SectorRunner._wakeup
+    changed = TimeProgramRunner._changed
+    return (
+        wakeup is not None
+        and not wakeup.is_set()
+        and (changed is None or not changed.is_set())
+        and queue.depth == 0
+        and queue.in_flight == 0
+    )
+
+
+async def _settle(queue: outbound.OutboundQueue) -> None:
+    # Let every task that became runnable finish its work before time moves on.
+    idle_rounds = 0
+    while idle_rounds < 2:
+        await asyncio.sleep(0)
+        idle_rounds = idle_rounds + 1 if _engine_idle(queue) else 0
+
+
+async def _drive(
+    records: list[tuple[float, object]], started: datetime.datetime, realtime: bool, result: ReplayResult
+) -> None:
+    loop = asyncio.get_running_loop()
+    clock.set_clock(_LoopClock(started, loop))
+    origin = loop.time()
+    queue = SectorRunner.outbound_queue
+    xknx = SectorRunner.xknx
+
+    def collect() -> None:
+        while not xknx.telegrams.empty():
+            telegram = xknx.telegrams.get_nowait()
+            result.replayed.append((loop.time() - origin, _signature(telegram)))
+
+    tasks = [
+        asyncio.create_task(queue.run()),
+        asyncio.create_task(SectorRunner.run()),
+        asyncio.create_task(TimeProgramRunner.run()),
+    ]
+    try:
+        await _settle(queue)
+        collect()
+        for offset, record in records:
+            if int(record["direction"]) == capture.OUTGOING:
+                result.recorded.append((offset, _record_signature(record)))
+                continue
+            if realtime:
+                await asyncio.sleep(max(0.0, origin + offset - loop.time()))
+            else:
+                while (deadline := loop.next_deadline()) is not None and deadline <= origin + offset:
+                    loop.advance_to(deadline)
+                    await _settle(queue)
+                    collect()
+                loop.advance_to(origin + offset)
+            telegram = capture.to_telegram(record)
+            begin = time.perf_counter()
+            KNX.telegram_received(telegram)
+            result.ingest_seconds.append(time.perf_counter() - begin)
+            result.incoming += 1
+            await _settle(queue)
+            collect()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def replay(path: str | os.PathLike[str], *, realtime: bool = False) -> ReplayResult:
+    """Replay the capture at ``path`` (with its rotated backups) and return the result.
+
+    Engine state is reset first; the clock, xKNX instance and outbound queue
+    are restored afterwards.
+    """
+
+    started, records = _load(path)
+    result = ReplayResult()
+    saved = (clock.get_clock(), sun.timedelta, sun.bus_clock, SectorRunner.xknx, SectorRunner.outbound_queue)
+    loop = asyncio.new_event_loop() if realtime else _VirtualTimeLoop()
+    try:
+        sun.timedelta = datetime.timedelta(0)
+        sun.bus_clock = bustime.BusClock()
+        SectorRunner.xknx = XKNX()
+        SectorRunner.outbound_queue = outbound.OutboundQueue(configuration.outbound_concurrency)
+        SectorRunner.hysteresis_timers.clear()
+        for sector in configuration.sectors:
+            SectorRunner.sectors[sector["GUID"]] = SectorState()
+        began = time.perf_counter()
+        loop.run_until_complete(_drive(records, started, realtime, result))
+        result.elapsed = time.perf_counter() - began
+    finally:
+        loop.close()
+        SectorRunner.hysteresis_timers.clear()
+        (previous_clock, sun.timedelta, sun.bus_clock, SectorRunner.xknx, SectorRunner.outbound_queue) = saved
+        clock.set_clock(previous_clock)
+    return result
+
+
+def _micros(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay a telegram capture through the sector engine.")
+    parser.add_argument("path", type=Path, help="capture file (rotated backups next to it are included)")
+    parser.add_argument("--realtime", action="store_true", help="replay at recorded speed instead of as fast as possible")
+    parser.add_argument("--show", type=int, default=10, help="list at most this many divergent addresses (default 10)")
+    args = parser.parse_args(argv)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = replay(args.path, realtime=args.realtime)
+
+    ingest = result.ingest_seconds
+    print(
+        f"Replayed {result.incoming} incoming telegrams in {result.elapsed:.3f} s; ingest "
+        f"mean {statistics.fmean(ingest) * 1e6 if ingest else 0.0:.1f} us, "
+        f"p50 {_micros(ingest, 0.5):.1f} us, p99 {_micros(ingest, 0.99):.1f} us."
+    )
+    print(f"Outgoing writes: {len(result.recorded)} recorded, {len(result.replayed)} replayed.")
+    divergent = result.divergent_addresses()
+    if divergent:
+        print(f"{len(divergent)} group addresses differ from the capture:")
+        for raw in divergent[: args.show]:
+            print(f"  {GroupAddress(raw)}")
+        sys.exit(1)
+    print("Replayed writes match the capture.")
+
+
+__all__ = ["ReplayResult", "replay"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Runtime state of one sector as a compact slotted record.
+
+:class:`SectorState` replaces the per-sector dict in ``SectorRunner.sectors``.
+Every field always exists and starts at its default (:data:`DEFAULTS`), so the
+sector engine reads attributes without ``dict.get`` fallbacks, and a record
+costs a fixed handful of pointers instead of a growing hash table.
+
+All writers (telegram handlers, hysteresis timers, the reloader and the
+snapshot code) run on the event loop, which makes the loop the single writer
+and no lock is needed. Other threads only request work through
+``SectorRunner.notify``.
+
+The record also offers the small mapping interface (``state["Mode"]``,
+``get``, ``pop``, ``in``) that :mod:`myapp.hysteresis` and
+:mod:`myapp.snapshot` use with field names as keys. A field counts as present
+(``in``) when it differs from its default; ``pop`` resets it to the default.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+
+# Field -> initial value. The keys match the former dict keys.
+DEFAULTS: dict[str, Any] = {
+    "Mode": "Auto",
+    "Brightness": None,
+    "Irradiance": None,
+    "brightness_state": 1,
+    "irradiance_state": 1,
+    "brightness_timer": None,
+    "irradiance_timer": None,
+    "sun_state": None,
+    "angle_deg": 0,
+    "angle_direction": "closing",
+    "angle_bytes_sent": 180,
+    "HeightSender": None,
+    "LouvreAngleSender": None,
+    "SunBoolSender": None,
+}
+
+_MISSING = object()
+
+
+def _same(value: Any, other: Any) -> bool:
+    # xknx devices do not compare with None, so None is checked by identity.
+    return value is other or (value is not None and other is not None and value == other)
+
+
+class SectorState:
+    """Mode, sensor values, hysteresis stages, last outputs and devices of one sector."""
+
+    __slots__ = tuple(DEFAULTS)
+
+    def __init__(self, **values: Any) -> None:
+        for key, default in DEFAULTS.items():
+            setattr(self, key, default)
+        for key, value in values.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in DEFAULTS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in DEFAULTS:
+            raise KeyError(f"Unknown sector state field: {key}")
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in DEFAULTS and not _same(getattr(self, key), DEFAULTS[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in DEFAULTS if key in self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Field value (defaults included); ``default`` only for unknown keys."""
+
+        return getattr(self, key) if key in DEFAULTS else default
+
+    def pop(self, key: str, default: Any = _MISSING) -> Any:
+        """Return the field if present and reset it to its default."""
+
+        if key in self:
+            value = getattr(self, key)
+            setattr(self, key, DEFAULTS[key])
+            return value
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(key, getattr(self, key)) for key in self]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, SectorState):
+            return all(_same(getattr(self, key), getattr(other, key)) for key in DEFAULTS)
+        if isinstance(other, Mapping):
+            if not set(other) <= DEFAULTS.keys():
+                return False
+            return all(_same(getattr(self, key), other.get(key, default)) for key, default in DEFAULTS.items())
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"SectorState({', '.join(f'{key}={value!r}' for key, value in self.items())})"
+
+
+__all__ = ["DEFAULTS", "SectorState"]
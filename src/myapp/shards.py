@@ -0,0 +1,468 @@
+"""Sector evaluation sharded across worker processes.
+
+With ``ShardWorkers`` set to 2 or more, :func:`start` forks that many workers
+before the event loop starts and gives each a contiguous slice of
+``configuration.sectors``. The main process keeps the KNX connection, the time
+programs and the outbound queue; the workers own sector state, hysteresis
+timers and evaluation:
+
+* The sun position is written to a shared memory block (guarded by a sequence
+  counter) and the workers are woken with a one-byte message.
+* Sector telegrams (brightness, irradiance, On/Off auto) are routed by
+  ``KNX.telegram_received`` to the worker(s) owning the addressed sectors, as
+  packed records batched per event loop iteration.
+* After every pass a worker sends back only the writes that changed, packed as
+  one 64 bit integer per write (device index, value, priority), which the main
+  process enqueues on its outbound queue.
+
+Messages are raw bytes (``send_bytes``), so neither side pickles anything per
+pass. Workers report their CPU time with every pass (:func:`stats`); the
+benchmark uses it to separate the engine's work from the IPC on hosts with
+fewer cores than processes.
+
+Sector evaluation metrics are not collected in sharded mode.
+"""
+
+from __future__ import annotations
+
+import array
+import asyncio
+import multiprocessing
+import os
+import queue
+import signal
+import struct
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Any
+
+import numpy as np
+from xknx import XKNX
+from xknx.telegram import GroupAddress
+
+from . import KNX, SectorRunner, capture, configuration, sun
+
+
+_STOP_TIMEOUT = 5.0
+# Attempts to read a consistent sun position before keeping the previous one.
+_SUN_READ_ATTEMPTS = 50
+
+# Main process -> worker messages: one kind byte, telegrams followed by packed records.
+_START = b"S"
+_SUN = b"s"
+_TELEGRAMS = b"t"
+# direction, kind, flags, payload length, destination, source, payload (see capture.encode)
+_TELEGRAM = struct.Struct(f"<BBBBHH{capture.PAYLOAD_SIZE}s")
+# Worker -> main process: messages processed, sectors evaluated, worker CPU seconds; then the writes.
+_REPORT = struct.Struct("<QQd")
+
+# Packed write: device index << 20 | value << 4 | bool << 3 | coalesce << 2 | priority.
+_VALUE_SHIFT = 4
+_DEVICE_SHIFT = 20
+_DEVICE_KINDS = ("sun_bool", "height", "louvre_angle")
+
+
+class _Worker:
+    """Main-process handle of one worker."""
+
+    def __init__(self, index: int, process: Any, conn: Connection, guids: set[str]) -> None:
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.guids = guids
+        self.outbox: list[bytes] = []
+        self.sent = 0  # messages sent to the worker
+        self.acked = 0  # messages the worker reported as processed
+        self.evaluated = 0
+        self.cpu_seconds = 0.0
+        # Messages are sent from a thread so a full pipe never blocks the event
+        # loop (which must keep reading the worker's replies).
+        self._messages: queue.SimpleQueue[bytes | None] = queue.SimpleQueue()
+        self._sender = threading.Thread(target=self._send_messages, name=f"shard-{index}-sender", daemon=True)
+
+    def send(self, message: bytes) -> None:
+        self.sent += 1
+        if _idle is not None:
+            _idle.clear()
+        self._messages.put(message)
+
+    def close(self) -> None:
+        if self._sender.is_alive():
+            self._messages.put(None)
+            self._sender.join(_STOP_TIMEOUT)
+        self.conn.close()
+
+    def _send_messages(self) -> None:
+        while (message := self._messages.get()) is not None:
+            try:
+                self.conn.send_bytes(message)
+            except OSError:
+                return
+
+
+workers: list[_Worker] = []
+
+# Sun position shared with the workers: sequence counter, azimuth, elevation.
+_sun_block = None
+_sun_view = None
+
+_loop = None
+_idle: asyncio.Event | None = None
+_flush_scheduled = False
+# Output device names of all sectors (three per sector, see _DEVICE_KINDS) and their index;
+# set before forking, so both sides agree on the indices.
+_device_names: list[str] = []
+_device_index: dict[str, int] = {}
+_devices: list[Any] = []
+
+
+def active() -> bool:
+    return bool(workers)
+
+
+def partition(sectors: list[dict[str, Any]], count: int) -> list[list[dict[str, Any]]]:
+    """Split ``sectors`` into ``count`` contiguous, equally sized slices.
+
+    Sectors next to each other in a configuration usually share sensors, so
+    contiguous slices keep sensor fan-out to few workers.
+    """
+
+    count = max(1, min(count, len(sectors)))
+    size, extra = divmod(len(sectors), count)
+    shards = []
+    begin = 0
+    for index in range(count):
+        end = begin + size + (1 if index < extra else 0)
+        shards.append(sectors[begin:end])
+        begin = end
+    return shards
+
+
+def start(count: int) -> None:
+    """Fork ``count`` workers. Call before the event loop starts."""
+
+    global _sun_block, _sun_view, _idle
+    stop()
+    _idle = asyncio.Event()
+    _device_names[:] = [f"{sector['GUID']}_{kind}" for sector in configuration.sectors for kind in _DEVICE_KINDS]
+    _device_index.clear()
+    _device_index.update((name, index) for index, name in enumerate(_device_names))
+    _sun_block = multiprocessing.RawArray("d", 3)
+    _sun_view = np.frombuffer(_sun_block, dtype=np.float64)
+    _write_sun(sun.current_azimuth, sun.current_elevation)
+    context = multiprocessing.get_context("fork")
+    for index, shard in enumerate(partition(configuration.sectors, count)):
+        conn, child_conn = context.Pipe()
+        guids = {sector["GUID"] for sector in shard}
+        process = context.Process(
+            target=_worker_main, args=(guids, child_conn, conn), name=f"shard-{index}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        workers.append(_Worker(index, process, conn, guids))
+    # Sender threads start only after the last fork.
+    for worker in workers:
+        worker._sender.start()
+
+    routes: dict[int, list[_Worker]] = {}
+    for worker in workers:
+        for sector in configuration.sectors:
+            if sector["GUID"] not in worker.guids:
+                continue
+            for key, used in (
+                ("BrightnessAddress", sector["UseBrightness"]),
+                ("IrradianceAddress", sector["UseIrradiance"]),
+                ("OnAutoAddress", True),
+                ("OffAutoAddress", True),
+            ):
+                if used and sector[key]:
+                    owners = routes.setdefault(GroupAddress(sector[key]).raw, [])
+                    if worker not in owners:
+                        owners.append(worker)
+    KNX.routes = {raw: _router(owners) for raw, owners in routes.items()}
+    SectorRunner.notify_hook = _notify
+    print(f"Sector evaluation sharded across {len(workers)} worker processes")
+
+
+def stop() -> None:
+    """Shut the workers down and restore single-process evaluation."""
+
+    global _loop, _idle
+    for worker in workers:
+        if _loop is not None and not _loop.is_closed():
+            _loop.remove_reader(worker.conn.fileno())
+        worker.close()
+    for worker in workers:
+        worker.process.join(_STOP_TIMEOUT)
+        if worker.process.exitcode is None:
+            worker.process.terminate()
+            worker.process.join()
+    workers.clear()
+    _devices.clear()
+    _loop = None
+    _idle = None
+    KNX.routes = None
+    SectorRunner.notify_hook = None
+
+
+def idle() -> bool:
+    """Whether every worker has processed everything sent to it."""
+
+    if _loop is None:
+        return False  # run() has not started the workers' engines yet
+    return not _flush_scheduled and all(worker.acked == worker.sent for worker in workers)
+
+
+async def wait_idle() -> None:
+    """Wait until :func:`idle`, without polling."""
+
+    while not idle():
+        _idle.clear()
+        await _idle.wait()
+
+
+def stats() -> dict[str, list[Any]]:
+    return {
+        "sectors": [len(worker.guids) for worker in workers],
+        "evaluated": [worker.evaluated for worker in workers],
+        "backlog": [worker.sent - worker.acked for worker in workers],
+        "cpu_seconds": [worker.cpu_seconds for worker in workers],
+    }
+
+
+async def run() -> None:
+    """Main-process side: start the workers' engines and apply their writes."""
+
+    global _loop
+    _loop = asyncio.get_running_loop()
+    SectorRunner._register_devices()
+    devices = {}
+    for state in SectorRunner.sectors.values():
+        for device in (state.SunBoolSender, state.HeightSender, state.LouvreAngleSender):
+            devices[device.name] = device
+    _devices[:] = [devices.get(name) for name in _device_names]
+    for worker in workers:
+        _loop.add_reader(worker.conn.fileno(), _receive, worker)
+        worker.send(_START)
+
+    sun_ticker = None
+    if configuration.az_el_option != "BusAzEl":
+        sun.calculate_solar_position()
+        _publish_sun()
+        sun_ticker = asyncio.create_task(SectorRunner._sun_ticker())
+    try:
+        await asyncio.Future()
+    finally:
+        if sun_ticker is not None:
+            sun_ticker.cancel()
+        for worker in workers:
+            _loop.remove_reader(worker.conn.fileno())
+
+
+def _receive(worker: _Worker) -> None:
+    outbound_queue = SectorRunner.outbound_queue
+    devices = _devices
+    try:
+        while worker.conn.poll():
+            data = worker.conn.recv_bytes()
+            received, evaluated, worker.cpu_seconds = _REPORT.unpack_from(data)
+            worker.acked = received
+            worker.evaluated += evaluated
+            writes = array.array("Q")
+            writes.frombytes(data[_REPORT.size:])
+            for write in writes:
+                value = (write >> _VALUE_SHIFT) & 0xFFFF
+                outbound_queue.submit(
+                    devices[write >> _DEVICE_SHIFT],
+                    bool(value) if write & 0b1000 else value,
+                    priority=write & 0b11,
+                    coalesce=bool(write & 0b100),
+                )
+    except (EOFError, OSError):
+        _loop.remove_reader(worker.conn.fileno())
+        print(f"Shard worker {worker.index} stopped (exit code {worker.process.exitcode})")
+        return
+    if _idle is not None and idle():
+        _idle.set()
+
+
+def _router(owners: list[_Worker]):
+    def route(telegram) -> None:
+        global _flush_scheduled
+        fields = capture.encode(telegram)
+        if fields is None:
+            return
+        direction, kind, flags, destination, source, payload = fields
+        record = _TELEGRAM.pack(direction, kind, flags, len(payload), destination, source, payload)
+        for worker in owners:
+            worker.outbox.append(record)
+        if not _flush_scheduled:
+            _flush_scheduled = True
+            if _idle is not None:
+                _idle.clear()
+            _loop.call_soon(_flush)
+
+    return route
+
+
+def _flush() -> None:
+    # Telegrams arriving in one loop iteration go to each worker as one message.
+    global _flush_scheduled
+    _flush_scheduled = False
+    for worker in workers:
+        if worker.outbox:
+            batch, worker.outbox = worker.outbox, []
+            worker.send(_TELEGRAMS + b"".join(batch))
+
+
+def _telegrams(message: bytes):
+    for direction, kind, flags, length, destination, source, payload in _TELEGRAM.iter_unpack(memoryview(message)[1:]):
+        yield capture.decode((direction, kind, flags, destination, source, payload[:length]))
+
+
+def _notify(guid=None) -> None:
+    # Only sun position changes reach the main process; sector telegrams are routed.
+    if _loop is None:
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is _loop:
+        _publish_sun()
+    else:
+        _loop.call_soon_threadsafe(_publish_sun)
+
+
+def _publish_sun() -> None:
+    _write_sun(sun.current_azimuth, sun.current_elevation)
+    for worker in workers:
+        worker.send(_SUN)
+
+
+def _write_sun(azimuth: float, elevation: float) -> None:
+    view = _sun_view
+    view[0] += 1  # odd: update in progress
+    view[1] = azimuth
+    view[2] = elevation
+    view[0] += 1
+
+
+def _read_sun() -> tuple[float, float] | None:
+    """Read the sun position; ``None`` if no consistent copy was seen.
+
+    The main process writes the block before it sends the wake-up, so a
+    failed read is followed by another wake-up for the newer position.
+    """
+
+    view = _sun_view
+    for attempt in range(_SUN_READ_ATTEMPTS):
+        sequence = view[0]
+        if sequence % 2 == 0:
+            azimuth, elevation = float(view[1]), float(view[2])
+            if view[0] == sequence:
+                return azimuth, elevation
+        # The writer is mid-update and may be descheduled: yield to it, then back off.
+        time.sleep(0 if attempt < 5 else 0.0001 * attempt)
+    return None
+
+
+class _Forwarder:
+    """Worker-side stand-in for the outbound queue: collects writes for the main process."""
+
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+        self.received = 0
+        self.writes = array.array("Q")
+
+    def submit(self, device: Any, value: Any, *, priority: int = 0, coalesce: bool = True) -> None:
+        # Sector outputs are switches (bool) and DPT 5 values (0-255).
+        flags = (0b1000 if isinstance(value, bool) else 0) | (0b100 if coalesce else 0) | priority
+        self.writes.append(_device_index[device.name] << _DEVICE_SHIFT | int(value) << _VALUE_SHIFT | flags)
+
+    def report(self, evaluated: int) -> None:
+        writes, self.writes = self.writes, array.array("Q")
+        self.conn.send_bytes(_REPORT.pack(self.received, evaluated, time.process_time()) + writes.tobytes())
+
+
+def _worker_main(guids: set[str], conn: Connection, parent_conn: Connection) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the main process shuts workers down
+    # Close the inherited main-process pipe ends, or their EOF would never arrive.
+    parent_conn.close()
+    for worker in workers:
+        worker.conn.close()
+    workers.clear()
+    configuration.sectors = [sector for sector in configuration.sectors if sector["GUID"] in guids]
+    configuration.az_el_option = "BusAzEl"  # the sun position comes from the main process
+    for guid in [guid for guid in SectorRunner.sectors if guid not in guids]:
+        del SectorRunner.sectors[guid]
+    SectorRunner.xknx = XKNX()
+    SectorRunner.outbound_queue = forwarder = _Forwarder(conn)
+    SectorRunner.notify_hook = None
+    KNX.routes = None
+    KNX.build_dispatch_table()
+    try:
+        asyncio.run(_worker_loop(conn, forwarder))
+    finally:
+        conn.close()
+        os._exit(0)
+
+
+async def _worker_loop(conn: Connection, forwarder: _Forwarder) -> None:
+    loop = asyncio.get_running_loop()
+    closed = loop.create_future()
+    engine = None
+
+    def receive() -> None:
+        nonlocal engine
+        try:
+            while conn.poll():
+                message = conn.recv_bytes()
+                forwarder.received += 1
+                kind = message[:1]
+                if kind == _TELEGRAMS:
+                    for telegram in _telegrams(message):
+                        KNX.telegram_received(telegram)
+                elif kind == _SUN:
+                    position = _read_sun()
+                    if position is not None:
+                        sun.current_azimuth, sun.current_elevation = position
+                        SectorRunner.notify()
+                elif kind == _START:
+                    engine = _start_engine(loop, forwarder)
+        except (EOFError, OSError):
+            if not closed.done():
+                closed.set_result(None)
+            return
+        if SectorRunner._wakeup is None or not SectorRunner._wakeup.is_set():
+            forwarder.report(0)  # nothing to evaluate; acknowledge right away
+
+    loop.add_reader(conn.fileno(), receive)
+    try:
+        await closed
+    finally:
+        loop.remove_reader(conn.fileno())
+        if engine is not None:
+            engine.cancel()
+
+
+def _start_engine(loop: asyncio.AbstractEventLoop, forwarder: _Forwarder) -> asyncio.Task[None]:
+    SectorRunner._loop = loop
+    SectorRunner._wakeup = asyncio.Event()
+    geometry_classes = SectorRunner.prepare()
+    sectors_by_guid = {sector["GUID"]: sector for sector in configuration.sectors}
+    SectorRunner._mark_dirty(None)
+
+    async def evaluate() -> None:
+        while True:
+            await SectorRunner._wakeup.wait()
+            SectorRunner._wakeup.clear()
+            pending = SectorRunner.take_pending(sectors_by_guid)
+            SectorRunner.evaluate_pass(pending, geometry_classes)
+            forwarder.report(len(pending))
+
+    return loop.create_task(evaluate())
+
+
+__all__ = ["active", "idle", "partition", "run", "start", "stats", "stop", "wait_idle", "workers"]
@@ -0,0 +1,238 @@
+"""Accelerated simulation of the sector engine and time programs.
+
+Runs the real sector evaluation and time program schedule against a
+:class:`~myapp.clock.VirtualClock` and records every KNX write instead of
+sending it. Sun positions are calculated from the virtual time (the configured
+``AzElOption`` is ignored); by default the sky is clear, i.e. every
+brightness/irradiance sensor is active while the sun is above the horizon.
+
+Usage (the configuration comes from ``STAERIUM_CONFIG`` or ``config.xml``)::
+
+    python -m myapp.simulate --start 2024-06-01 --days 92 --output summer.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+import pytz
+from xknx import XKNX
+
+from . import SectorRunner, TimeProgramRunner, bustime, clock, configuration, sun
+from .sector_state import SectorState
+
+
+@dataclass(frozen=True)
+class Write:
+    """One recorded KNX write."""
+
+    time: datetime.datetime
+    sector: str
+    kind: str
+    address: str
+    value: Any
+
+
+class RecordingSink:
+    """Takes the place of the outbound queue and records writes at virtual time."""
+
+    def __init__(self, timezone: datetime.tzinfo) -> None:
+        self.timezone = timezone
+        self.writes: list[Write] = []
+        self._devices: dict[str, tuple[str, str]] = {}
+
+    def label(self, device: Any, sector: str, kind: str) -> None:
+        self._devices[device.name] = (sector, kind)
+
+    def submit(self, device: Any, value: Any, *, priority: int = 0, coalesce: bool = True) -> None:
+        sector, kind = self._devices.get(device.name, ("", device.name))
+        address = next(iter(device.group_addresses()), None)
+        self.writes.append(Write(clock.now(self.timezone), sector, kind, str(address or ""), value))
+
+
+def simulate(
+    start: datetime.datetime,
+    end: datetime.datetime,
+    step: float = 60.0,
+    *,
+    clear_sky: bool = True,
+    exact_sun: bool = False,
+) -> list[Write]:
+    """Simulate ``start`` to ``end`` (aware datetimes) and return the recorded writes.
+
+    The sun position and all sectors are evaluated every ``step`` seconds; time
+    program commands fire at their exact times in between. Engine state is
+    reset at the start; the clock, xKNX instance and outbound queue are
+    restored afterwards. Raises ``ValueError`` unless ``step`` is positive.
+    """
+
+    if not step > 0:
+        raise ValueError(f"step must be positive, got {step}")
+    timezone = pytz.timezone(sun.tz)
+    virtual = clock.VirtualClock(start)
+    saved = (
+        clock.get_clock(),
+        configuration.az_el_option,
+        configuration.solar_ephemeris,
+        sun.timedelta,
+        sun.bus_clock,
+        SectorRunner.xknx,
+        SectorRunner.outbound_queue,
+    )
+    sink = RecordingSink(timezone)
+    try:
+        clock.set_clock(virtual)
+        configuration.az_el_option = "Internet"
+        configuration.solar_ephemeris = configuration.solar_ephemeris or not exact_sun
+        sun.timedelta = datetime.timedelta(0)
+        sun.bus_clock = bustime.BusClock()
+        SectorRunner.xknx = XKNX()
+        SectorRunner.outbound_queue = sink
+
+        for sector in configuration.sectors:
+            SectorRunner.sectors[sector["GUID"]] = SectorState()
+        geometry_classes = SectorRunner.prepare()
+        for sector in configuration.sectors:
+            state = SectorRunner.sectors[sector["GUID"]]
+            sink.label(state.SunBoolSender, sector["Name"], "sun")
+            sink.label(state.HeightSender, sector["Name"], "height")
+            sink.label(state.LouvreAngleSender, sector["Name"], "louvre")
+
+        entries = TimeProgramRunner._build_schedule(timezone)
+        for entry in entries:
+            if entry["device"] is not None:
+                sink.label(entry["device"], f"Time program {entry['program']}", "program")
+        schedule = TimeProgramRunner.Schedule(entries, timezone)
+
+        interval = datetime.timedelta(seconds=step)
+        next_sun = start
+        daylight = None
+        while True:
+            next_program = schedule.next_run()
+            moment = next_sun if next_program is None else min(next_sun, next_program)
+            if moment >= end:
+                break
+            virtual.set(moment)
+            if moment == next_sun:
+                sun.calculate_solar_position()
+                if clear_sky and daylight != (sun.current_elevation > 0):
+                    daylight = sun.current_elevation > 0
+                    _set_sensors(4 if daylight else 1)
+                SectorRunner.evaluate_pass(configuration.sectors, geometry_classes)
+                next_sun += interval
+            now = TimeProgramRunner._current_time(timezone)
+            for entry in schedule.pop_due(now):
+                TimeProgramRunner._dispatch_command(entry, now)
+    finally:
+        (
+            previous_clock,
+            configuration.az_el_option,
+            configuration.solar_ephemeris,
+            sun.timedelta,
+            sun.bus_clock,
+            SectorRunner.xknx,
+            SectorRunner.outbound_queue,
+        ) = saved
+        clock.set_clock(previous_clock)
+    return sink.writes
+
+
+def _set_sensors(state: int) -> None:
+    for sector_state in SectorRunner.sectors.values():
+        sector_state.brightness_state = state
+        sector_state.irradiance_state = state
+
+
+def timeline(writes: list[Write]) -> dict[str, list[Write]]:
+    """Group writes per sector (time programs under their own name), in time order."""
+
+    grouped: dict[str, list[Write]] = {}
+    for write in sorted(writes, key=lambda write: (write.sector, write.time)):
+        grouped.setdefault(write.sector, []).append(write)
+    return grouped
+
+
+def _value(value: Any) -> Any:
+    return int(value) if isinstance(value, bool) else value
+
+
+def write_csv(writes: list[Write], stream: TextIO) -> None:
+    out = csv.writer(stream)
+    out.writerow(["time", "sector", "kind", "address", "value"])
+    for sector, rows in timeline(writes).items():
+        for write in rows:
+            out.writerow([write.time.isoformat(), sector, write.kind, write.address, _value(write.value)])
+
+
+def write_json(writes: list[Write], stream: TextIO) -> None:
+    data = {
+        sector: [
+            {"time": write.time.isoformat(), "kind": write.kind, "address": write.address, "value": _value(write.value)}
+            for write in rows
+        ]
+        for sector, rows in timeline(writes).items()
+    }
+    json.dump(data, stream, indent=2)
+    stream.write("\n")
+
+
+def _local_date(text: str, timezone: datetime.tzinfo) -> datetime.datetime:
+    day = datetime.date.fromisoformat(text)
+    return timezone.localize(datetime.datetime.combine(day, datetime.time()))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate sun state, height and louvre writes over a date range.")
+    parser.add_argument("--start", help="first local day (YYYY-MM-DD, default today)")
+    parser.add_argument("--end", help="day after the last simulated one (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=1, help="number of days when --end is not given (default 1)")
+    parser.add_argument("--step", type=float, default=60.0, help="seconds between sun evaluations (default 60)")
+    parser.add_argument("--overcast", action="store_true", help="keep brightness/irradiance inactive all day")
+    parser.add_argument("--exact-sun", action="store_true", help="call pvlib for every step instead of the ephemeris")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("--output", help="timeline file (default stdout)")
+    args = parser.parse_args(argv)
+    if not args.step > 0:
+        parser.error("--step must be positive")
+
+    timezone = pytz.timezone(sun.tz)
+    start = _local_date(args.start, timezone) if args.start else _local_date(datetime.date.today().isoformat(), timezone)
+    if args.end:
+        end = _local_date(args.end, timezone)
+    else:
+        end = _local_date((start.date() + datetime.timedelta(days=args.days)).isoformat(), timezone)
+
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        writes = simulate(start, end, args.step, clear_sky=not args.overcast, exact_sun=args.exact_sun)
+    elapsed = time.perf_counter() - started
+
+    writer = write_json if args.format == "json" else write_csv
+    if args.output:
+        with open(args.output, "w", newline="") as stream:
+            writer(writes, stream)
+    else:
+        writer(writes, sys.stdout)
+
+    simulated = (end - start).total_seconds()
+    print(
+        f"Simulated {simulated / 86400:.1f} days of {len(configuration.sectors)} sectors in {elapsed:.2f} s "
+        f"({simulated / max(elapsed, 1e-9):.0f}x real time), {len(writes)} writes.",
+        file=sys.stderr,
+    )
+
+
+__all__ = ["RecordingSink", "Write", "simulate", "timeline", "write_csv", "write_json"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Sector state snapshots for warm restarts.
+
+With ``STATE_PATH`` set, the sector state is written to that JSON file every
+``STATE_INTERVAL`` seconds (default ``30``) and when the server stops, and it is
+restored at startup:
+
+* mode (Auto/On/Off)
+* hysteresis stage per channel, the last sensor value and the deadline of a
+  running brightness/irradiance delay
+* the last sent sun state (and with it the height) and louvre values
+* the BusTime offset
+
+Restored sectors only send outputs that differ from what was sent before the
+restart, and delays continue where they were (minus the downtime). Files are
+replaced atomically (temporary file, ``fsync``, rename) and only written when
+the state changed. Sectors that are no longer configured are ignored. Not
+available with ``ShardWorkers``, where the state lives in the worker processes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from . import SectorRunner, clock, configuration, hysteresis, sun
+from .sector_state import SectorState
+
+
+VERSION = 1
+
+# Per-sector values saved as they are.
+SECTOR_KEYS = (
+    "Mode",
+    "brightness_state",
+    "irradiance_state",
+    "Brightness",
+    "Irradiance",
+    "sun_state",
+    "angle_deg",
+    "angle_direction",
+    "angle_bytes_sent",
+)
+
+_MODES = {"Auto", "On", "Off"}
+
+
+def collect() -> dict[str, Any]:
+    """Return the current state as a JSON-serialisable snapshot (without the save time)."""
+
+    now = clock.now().timestamp()
+    timers = SectorRunner.hysteresis_timers
+    sectors = {}
+    for guid, sector_state in SectorRunner.sectors.items():
+        saved = {key: sector_state[key] for key in SECTOR_KEYS if key in sector_state}
+        for channel in hysteresis.CHANNELS:
+            timer = sector_state.get(f"{channel}_timer")
+            if timer is not None and timer.active:
+                # Whole wall clock seconds, so a running delay does not change every snapshot.
+                saved[f"{channel}_deadline"] = round(now + timers.remaining(timer))
+        sectors[guid] = saved
+    return {"version": VERSION, "bus_time_offset": sun.timedelta.total_seconds(), "sectors": sectors}
+
+
+def save(path: str | os.PathLike[str], snapshot: dict[str, Any] | None = None) -> None:
+    """Write ``snapshot`` (default: :func:`collect`) to ``path`` atomically."""
+
+    snapshot = dict(snapshot if snapshot is not None else collect(), saved=clock.now().timestamp())
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            json.dump(snapshot, stream, separators=(",", ":"))
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+
+
+def load(path: str | os.PathLike[str]) -> dict[str, Any] | None:
+    """Read a snapshot; ``None`` if there is none or it cannot be used."""
+
+    try:
+        with open(path, encoding="utf-8") as stream:
+            snapshot = json.load(stream)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        print(f"Ignoring state snapshot {path}: {exc}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != VERSION:
+        print(f"Ignoring state snapshot {path}: unsupported version")
+        return None
+    return snapshot
+
+
+def restore(snapshot: dict[str, Any]) -> int:
+    """Apply ``snapshot`` to the configured sectors; returns how many were restored.
+
+    Call on the event loop before the sector engine starts (delays are
+    rescheduled on the shared timer heap).
+    """
+
+    now = clock.now().timestamp()
+    if configuration.az_el_option == "BusTime":
+        sun.timedelta = datetime.timedelta(seconds=float(snapshot.get("bus_time_offset", 0.0)))
+        sun.bus_clock.reset()  # the drift is estimated again from the next bus time telegrams
+    restored = 0
+    saved_sectors = snapshot.get("sectors") or {}
+    for sector in configuration.sectors:
+        saved = saved_sectors.get(sector["GUID"])
+        if not isinstance(saved, dict):
+            continue
+        sector_state = SectorRunner.sectors[sector["GUID"]]
+        for key in SECTOR_KEYS:
+            if key in saved:
+                sector_state[key] = saved[key]
+        if sector_state.Mode not in _MODES:
+            sector_state.Mode = "Auto"
+        for channel in hysteresis.CHANNELS:
+            _restore_delay(sector["GUID"], sector_state, channel, saved.get(f"{channel}_deadline"), now)
+        restored += 1
+    return restored
+
+
+def _restore_delay(guid: str, sector_state: SectorState, channel: str, deadline: Any, now: float) -> None:
+    state_key = f"{channel}_state"
+    stage = sector_state.get(state_key, 1)
+    if stage not in (1, 2, 3, 4):
+        sector_state[state_key] = 1
+        return
+    timer = sector_state.pop(f"{channel}_timer", None)
+    if timer is not None:
+        timer.cancel()
+    if stage not in hysteresis.TIMEOUTS:
+        return
+    # A delay that ran out during the downtime (or was not saved) completes right away.
+    remaining = max(0.0, float(deadline) - now) if isinstance(deadline, (int, float)) else 0.0
+    sector_state[f"{channel}_timer"] = SectorRunner.hysteresis_timers.call_later(
+        remaining, SectorRunner.set_hysteresis_state, guid, channel, hysteresis.TIMEOUTS[stage]
+    )
+
+
+def restore_file(path: str | os.PathLike[str]) -> int:
+    """Restore from the snapshot at ``path`` if there is one; returns the restored sector count."""
+
+    snapshot = load(path)
+    if snapshot is None:
+        return 0
+    restored = restore(snapshot)
+    saved = snapshot.get("saved")
+    age = f", saved {clock.now().timestamp() - saved:.0f} s ago" if isinstance(saved, (int, float)) else ""
+    print(f"Restored the state of {restored} sectors from {path}{age}")
+    return restored
+
+
+async def run(path: str | os.PathLike[str], interval: float) -> None:
+    """Save the state to ``path`` now, then every ``interval`` seconds if it changed and when cancelled."""
+
+    written = None
+    try:
+        while True:
+            written = _save_if_changed(path, written)
+            await asyncio.sleep(interval)
+    finally:
+        _save_if_changed(path, written)
+
+
+def _save_if_changed(path: str | os.PathLike[str], written: dict[str, Any] | None) -> dict[str, Any] | None:
+    snapshot = collect()
+    if snapshot == written:
+        return written
+    try:
+        save(path, snapshot)
+    except OSError as exc:
+        print(f"Failed to save the state snapshot to {path}: {exc}")
+        return written
+    return snapshot
+
+
+__all__ = ["SECTOR_KEYS", "VERSION", "collect", "load", "restore", "restore_file", "run", "save"]
@@ -1,29 +1,40 @@
 import datetime
+import math
 import sys
 from pathlib import Path
 
 import pytz
-from pandas import DatetimeIndex
-from pvlib import solarposition
-from pvlib.location import Location
 
 if __package__ in {None, ""}:
     package_root = Path(__file__).resolve().parent.parent
     if str(package_root) not in sys.path:
         sys.path.insert(0, str(package_root))
-    from myapp import configuration  # type: ignore
+    from myapp import bustime, clock, configuration, solar  # type: ignore
+    from myapp.ephemeris import EphemerisTable  # type: ignore
 else:
-    from . import configuration  # type: ignore
+    from . import bustime, clock, configuration, solar  # type: ignore
+    from .ephemeris import EphemerisTable  # type: ignore
 
 
 tz = configuration.az_el_timezone
 
-site = Location(configuration.latitude, configuration.longitude, tz=tz)
+# The pvlib Location, created on first use by _solar_site().
+# With SolarEngine=native (or without pandas/pvlib) myapp.solar is used instead.
+site = None
 
 current_azimuth = 0.0
 current_elevation = -90.0
 
+# BusTime offset (wall clock - bus clock) at the last bus time reading; see offset().
 timedelta = datetime.timedelta(0)
+bus_clock = bustime.BusClock()
+
+# Multi-site mode: slot shared with the other sites at these coordinates (see multisite.SunSlot).
+shared_position = None
+
+_ephemeris = None
+_ephemeris_offset = timedelta
+_pvlib_available = None
 
 
 def calculate_solar_position():
@@ -31,17 +42,110 @@ def calculate_solar_position():
     global current_azimuth
     global current_elevation
     global tz
-    global site
     if configuration.az_el_option == "Internet":
-        times = DatetimeIndex([datetime.datetime.now(pytz.timezone(tz))], tz=tz)
+        time = clock.now(pytz.timezone(tz))
     elif configuration.az_el_option == "BusTime":
-        time = (datetime.datetime.now(pytz.timezone(tz)) - timedelta).replace(tzinfo=None) # Remove tzinfo since it is wrong if the syste time is not in the same time season
-        times = DatetimeIndex([time], tz=tz) # Adjust for time difference from bus
+        time = (clock.now(pytz.timezone(tz)) - offset()).replace(tzinfo=None) # Remove tzinfo since it is wrong if the syste time is not in the same time season
     else:
         return  # Do not calculate if using BusAzEl
-    solpos = site.get_solarposition(times)
-    current_azimuth = solpos['azimuth'].values[0]
-    current_elevation = solpos['elevation'].values[0]
+    if shared_position is not None:
+        # Positions are computed for whole seconds, so sites ticking within the same second share one.
+        zone = pytz.timezone(tz)
+        second = math.floor((time if time.tzinfo is not None else zone.localize(time)).timestamp())
+        current_azimuth, current_elevation = shared_position.position(
+            second, lambda: _position(datetime.datetime.fromtimestamp(second, zone))
+        )
+        return
+    current_azimuth, current_elevation = _position(time)
+
+
+def _position(time):
+    """Azimuth and elevation at ``time`` from the ephemeris, the native engine or pvlib."""
+    if configuration.solar_ephemeris:
+        return _ephemeris_position(time)
+    if _native():
+        if time.tzinfo is None:
+            time = pytz.timezone(tz).localize(time)
+        return solar.solar_position(time.timestamp(), configuration.latitude, configuration.longitude)
+    from pandas import DatetimeIndex
+    times = DatetimeIndex([time], tz=tz) # Adjust for time difference from bus
+    solpos = _solar_site().get_solarposition(times)
+    return solpos['azimuth'].values[0], solpos['elevation'].values[0]
+
+
+def offset():
+    """Current BusTime offset: the last reading plus the estimated drift since then (see bustime.py)."""
+    correction = bus_clock.correction(clock.monotonic())
+    if not correction:
+        return timedelta
+    return timedelta + datetime.timedelta(seconds=correction)
+
+
+def sync_bus_time(measured):
+    """Feed one bus clock reading (wall clock - bus clock, in seconds).
+
+    Updates :data:`timedelta` and returns whether the offset stepped. Only then
+    do the sun position and time programs need to follow right away.
+    """
+    global timedelta
+    new_offset, stepped = bus_clock.update(measured, clock.monotonic(), offset().total_seconds())
+    timedelta = datetime.timedelta(seconds=new_offset)
+    return stepped
+
+
+def preload():
+    """Import pvlib and pandas ahead of the first calculation (nothing to do for BusAzEl or the native engine)."""
+    if configuration.az_el_option != "BusAzEl" and not _native():
+        import pandas  # noqa: F401
+        _solar_site()
+
+
+def _native():
+    """Return whether the native engine calculates the sun position (configured, or pvlib is missing)."""
+    global _pvlib_available
+    if str(configuration.solar_engine).lower() == "native":
+        return True
+    if _pvlib_available is None:
+        try:
+            import pandas  # noqa: F401
+            import pvlib.location  # noqa: F401
+            _pvlib_available = True
+        except ImportError:
+            print("pandas/pvlib are not installed, using the native solar position engine")
+            _pvlib_available = False
+    return not _pvlib_available
+
+
+def _solar_site():
+    global site
+    if site is None:
+        from pvlib.location import Location
+        site = Location(configuration.latitude, configuration.longitude, tz=tz)
+    return site
+
+
+def _ephemeris_position(time):
+    """Interpolate the sun position from the daily table, rebuilding it when needed.
+
+    The table is rebuilt when ``time`` leaves the covered local day (midnight) and
+    when the BusTime offset jumped by more than one table step.
+    """
+    global _ephemeris
+    global _ephemeris_offset
+    if time.tzinfo is None:
+        time = pytz.timezone(tz).localize(time)
+    timestamp = time.timestamp()
+    step = configuration.solar_ephemeris_step
+    offset_jumped = abs((timedelta - _ephemeris_offset).total_seconds()) > step
+    if _ephemeris is None or offset_jumped or not _ephemeris.covers(timestamp):
+        location = solar.Site(configuration.latitude, configuration.longitude, tz) if _native() else _solar_site()
+        if configuration.ephemeris_cache:
+            _ephemeris = EphemerisTable.cached(location, time.date(), step, configuration.ephemeris_cache)
+        else:
+            _ephemeris = EphemerisTable.build(location, time.date(), step)
+        _ephemeris_offset = timedelta
+        if configuration.Debug: print(f"Solar ephemeris rebuilt for {_ephemeris.day} ({len(_ephemeris.times)} samples)")
+    return _ephemeris.lookup(timestamp)
 
 
 #TODO: Everything
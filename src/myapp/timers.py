@@ -0,0 +1,136 @@
+"""A single asyncio timer heap for the many short hysteresis delays.
+
+All delayed callbacks share one heap and at most one armed event-loop timer
+(for the earliest deadline). Cancelling only marks the handle, which is O(1);
+cancelled entries are skipped when they reach the head and the heap is
+compacted once they make up most of it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from collections.abc import Callable
+from typing import Any
+
+
+# Deadlines this close to "now" are treated as due; asyncio may wake us a hair early.
+_DUE_TOLERANCE = 0.001
+_COMPACT_MIN_SIZE = 64
+
+
+class TimerHandle:
+    """A scheduled callback; call :meth:`cancel` to drop it."""
+
+    __slots__ = ("when", "callback", "args", "_heap")
+
+    def __init__(self, heap: "TimerHeap", when: float, callback: Callable[..., Any], args: tuple[Any, ...]) -> None:
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self._heap: TimerHeap | None = heap
+
+    @property
+    def active(self) -> bool:
+        """``True`` until the timer fired or was cancelled."""
+
+        return self._heap is not None
+
+    def cancel(self) -> None:
+        heap = self._heap
+        if heap is not None:
+            self._heap = None
+            heap._cancelled()
+
+
+class TimerHeap:
+    """Min-heap of deadlines driven by one ``loop.call_at`` for the head entry."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._counter = itertools.count()
+        self._pending = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._armed: asyncio.TimerHandle | None = None
+        self._armed_when: float | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of timers that are scheduled and not cancelled."""
+
+        return self._pending
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        """Run ``callback(*args)`` on the event loop after ``delay`` seconds."""
+
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._bind(loop)
+        when = loop.time() + max(0.0, float(delay))
+        handle = TimerHandle(self, when, callback, args)
+        heapq.heappush(self._heap, (when, next(self._counter), handle))
+        self._pending += 1
+        if self._armed_when is None or when < self._armed_when:
+            self._arm(when)
+        return handle
+
+    def remaining(self, handle: TimerHandle) -> float:
+        """Seconds until ``handle`` fires (``0`` once it is due)."""
+
+        if self._loop is None:
+            return 0.0
+        return max(0.0, handle.when - self._loop.time())
+
+    def clear(self) -> None:
+        """Cancel every pending timer."""
+
+        for _, _, handle in self._heap:
+            handle._heap = None
+        self._heap.clear()
+        self._pending = 0
+        if self._armed is not None:
+            self._armed.cancel()
+        self._armed = None
+        self._armed_when = None
+
+    def _bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Timers of a previous (closed) loop can never fire; start over.
+        self.clear()
+        self._loop = loop
+
+    def _arm(self, when: float) -> None:
+        if self._armed is not None:
+            self._armed.cancel()
+        self._armed = self._loop.call_at(when, self._fire)
+        self._armed_when = when
+
+    def _fire(self) -> None:
+        self._armed = None
+        self._armed_when = None
+        heap = self._heap
+        now = self._loop.time() + _DUE_TOLERANCE
+        while heap and heap[0][0] <= now:
+            _, _, handle = heapq.heappop(heap)
+            if handle._heap is None:
+                continue
+            handle._heap = None
+            self._pending -= 1
+            try:
+                handle.callback(*handle.args)
+            except Exception as exc:
+                print(f"Error in timer callback {handle.callback!r}: {exc}")
+        while heap and heap[0][2]._heap is None:
+            heapq.heappop(heap)
+        if heap and (self._armed_when is None or heap[0][0] < self._armed_when):
+            self._arm(heap[0][0])
+
+    def _cancelled(self) -> None:
+        self._pending -= 1
+        heap = self._heap
+        if len(heap) > _COMPACT_MIN_SIZE and len(heap) > 2 * self._pending:
+            heap[:] = [entry for entry in heap if entry[2]._heap is not None]
+            heapq.heapify(heap)
+
+
+__all__ = ["TimerHandle", "TimerHeap"]
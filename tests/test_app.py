@@ -0,0 +1,113 @@
+"""Tests for on-demand configuration loading and lazy imports."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import myapp
+from myapp.app import Application
+
+
+CONFIG = Path(myapp.__file__).with_name("config.xml")
+SRC = Path(myapp.__file__).resolve().parent.parent
+
+_PROBE = """
+import json, sys
+import myapp
+loaded_on_import = "myapp.app" in sys.modules
+import myapp.main
+myapp.sun.preload()
+myapp.sun.calculate_solar_position()
+print(json.dumps({
+    "loaded_on_import": loaded_on_import,
+    "option": myapp.configuration.az_el_option,
+    "pvlib": "pvlib" in sys.modules,
+    "pandas": "pandas" in sys.modules,
+}))
+"""
+
+
+def _probe(config: Path) -> dict[str, object]:
+    environment = dict(os.environ, STAERIUM_CONFIG=str(config), PYTHONPATH=str(SRC))
+    result = subprocess.run([sys.executable, "-c", _PROBE], env=environment, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_bus_az_el_startup_never_imports_pvlib(tmp_path) -> None:
+    """Importing the package parses nothing; BusAzEl servers skip pvlib and pandas."""
+
+    config = tmp_path / "busazel.xml"
+    config.write_text(
+        CONFIG.read_text(encoding="utf-8").replace("<AzElOption>BusTime</AzElOption>", "<AzElOption>BusAzEl</AzElOption>"),
+        encoding="utf-8",
+    )
+    assert _probe(config) == {"loaded_on_import": False, "option": "BusAzEl", "pvlib": False, "pandas": False}
+    assert _probe(CONFIG)["pvlib"] is True
+
+
+def test_native_solar_engine_never_imports_pvlib(tmp_path) -> None:
+    """``SolarEngine=native`` calculates the sun position without pandas and pvlib."""
+
+    config = tmp_path / "native.xml"
+    config.write_text(
+        CONFIG.read_text(encoding="utf-8").replace("<AzElOption>BusTime</AzElOption>", "<AzElOption>BusTime</AzElOption><SolarEngine>native</SolarEngine>"),
+        encoding="utf-8",
+    )
+    assert _probe(config) == {"loaded_on_import": False, "option": "BusTime", "pvlib": False, "pandas": False}
+
+
+def test_star_import_exports_the_configuration_keys() -> None:
+    """``from myapp import *`` still provides the upper-case keys, resolved when it runs."""
+
+    probe = (
+        "import json, sys; import myapp; loaded = 'myapp.app' in sys.modules; namespace = {}; "
+        "exec('from myapp import *', namespace); "
+        "print(json.dumps([loaded, namespace['LATITUDE'], 'SECTORS' in namespace, 'CONFIG' in namespace]))"
+    )
+    environment = dict(os.environ, STAERIUM_CONFIG=str(CONFIG), PYTHONPATH=str(SRC))
+    result = subprocess.run([sys.executable, "-c", probe], env=environment, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.splitlines()[-1]) == [False, myapp.settings.Latitude, True, True]
+    assert "LATITUDE" in myapp.__all__ and myapp.__all__[:3] == ["main", "settings", "CONFIG"]
+
+
+def test_attribute_probes_do_not_load_the_configuration() -> None:
+    """Upper-case attributes resolve only once ``settings``/``CONFIG`` loaded the configuration."""
+
+    probe = (
+        "import json, sys; import myapp; probes = [hasattr(myapp, 'LATITUDE'), hasattr(myapp, 'X')]; "
+        "loaded = 'myapp.app' in sys.modules; myapp.settings; "
+        "print(json.dumps([probes, loaded, myapp.LATITUDE, hasattr(myapp, 'X')]))"
+    )
+    environment = dict(os.environ, STAERIUM_CONFIG=str(CONFIG), PYTHONPATH=str(SRC))
+    result = subprocess.run([sys.executable, "-c", probe], env=environment, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.splitlines()[-1]) == [[False, False], False, myapp.settings.Latitude, False]
+
+
+def test_application_loads_config_on_demand_and_reports_phases(tmp_path) -> None:
+    """The file is read on first access; config time is reported on its own."""
+
+    path = tmp_path / "site.xml"
+    path.write_text(CONFIG.read_text(encoding="utf-8").replace("<Latitude>47.377672</Latitude>", "<Latitude>46.5</Latitude>"), encoding="utf-8")
+    application = Application(path)
+    assert not application.loaded
+    assert application.settings.Latitude == 46.5
+    assert application.config["Latitude"] == 46.5
+    application.mark("modules")
+
+    names = [name for name, _ in application.phases]
+    assert names[-2:] == ["config", "modules"]
+    assert all(seconds >= 0 for _, seconds in application.phases)
+    report = application.report()
+    assert report.startswith("Startup took ") and "config " in report and "modules " in report
+
+
+def test_package_attributes_resolve_through_the_application() -> None:
+    """``settings``, ``CONFIG`` and upper-case keys still read like module globals."""
+
+    assert myapp.VERSION == myapp.settings["Version"] == myapp.CONFIG["Version"]
+    assert myapp.SECTORS == myapp.settings.Sectors
+    assert not hasattr(myapp, "NOT_A_SETTING")
@@ -0,0 +1,39 @@
+"""Tests for the synthetic benchmark configuration generator."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from myapp.config_loader import load_config
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+import sunproj  # noqa: E402
+
+
+def test_generated_config_loads_with_unique_actuator_addresses(tmp_path, monkeypatch) -> None:
+    """The generator writes the loader's schema; STAERIUM_CONFIG selects the file."""
+
+    path = sunproj.write(tmp_path / "building.sunproj", 25, seed=1)
+    monkeypatch.setenv("STAERIUM_CONFIG", str(path))
+    config = load_config()
+
+    sectors = config["Sectors"]
+    assert len(sectors) == 25
+    assert config["AzElOption"] == "BusAzEl"
+    assert all(sector["LouvreTracking"] and len(sector["HorizonPoints"]) == 7 for sector in sectors)
+    actuators = [sector[key] for sector in sectors for key in ("HeightAddress", "LouvreAngleAddress", "SunBoolAddress")]
+    assert len(set(actuators)) == len(actuators)
+    assert len({sector["BrightnessAddress"] for sector in sectors}) == 3
+    assert sum(len(program["Commands"]) for program in config["TimePrograms"]) == 2 * sunproj.COMMANDS_PER_PROGRAM
+
+
+def test_address_space_fits_ten_thousand_sectors() -> None:
+    """Shared sensors keep the largest benchmark size inside the KNX group address range."""
+
+    addresses = sunproj._Addresses()
+    sectors = 10_000
+    needed = sectors * 5 + 2 * sectors // sunproj.SECTORS_PER_SENSOR + sunproj.COMMANDS_PER_PROGRAM * sectors // sunproj.SECTORS_PER_PROGRAM
+    for _ in range(needed):
+        last = addresses()
+    assert int(last.split("/")[0]) <= 31
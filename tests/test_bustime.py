@@ -0,0 +1,104 @@
+"""Tests for BusTime offset tracking with drift estimation."""
+
+from __future__ import annotations
+
+import datetime
+
+import pytest
+import pytz
+
+import myapp.KNX as KNX
+from myapp import TimeProgramRunner, bustime, clock, configuration, sun
+
+
+def test_drift_is_estimated_from_jittery_readings() -> None:
+    """A bus clock running 200 ppm fast, read with jittery delays, gives drift and a sub-second offset."""
+
+    bus_clock = bustime.BusClock()
+    true_offset = lambda t: 3.4 - 2e-4 * t  # noqa: E731 - wall clock minus bus clock
+    delays = [0.03, 0.12, 0.05, 0.2, 0.0, 0.08, 0.15, 0.01]
+    current = 0.0
+    steps = []
+    for index in range(150):
+        # The bus sends its time (whole seconds) on every full minute of its own clock.
+        bus_seconds = 60.0 * index
+        sent = bus_seconds + true_offset(bus_seconds)
+        received = sent + delays[index % len(delays)]
+        current, stepped = bus_clock.update(received - bus_seconds, received, current + bus_clock.correction(received))
+        steps.append(stepped)
+
+    assert steps[0] and not any(steps[1:])
+    assert bus_clock.drift == pytest.approx(-2e-4, abs=4e-5)
+    later = received + 30.0
+    assert abs(current + bus_clock.correction(later) - true_offset(later)) < 0.15
+
+    # The bus clock was set: the next reading steps and the fit starts over.
+    offset, stepped = bus_clock.update(current + 3600, later, current + bus_clock.correction(later))
+    assert stepped and offset == current + 3600 and bus_clock.drift == 0.0
+
+
+def test_frequent_readings_still_cover_the_drift_window() -> None:
+    """Readings every 10 s fill time buckets, so the fit spans hours and finds the drift."""
+
+    bus_clock = bustime.BusClock()
+    true_offset = lambda t: -1.2 + 1.5e-4 * t  # noqa: E731 - the bus clock runs 150 ppm slow
+    delays = [0.02, 0.09, 0.0, 0.14, 0.05]
+    current = 0.0
+    for index in range(6 * 360):  # six hours, more than the fit covers
+        bus_seconds = 10.0 * index
+        received = bus_seconds + true_offset(bus_seconds) + delays[index % len(delays)]
+        current, stepped = bus_clock.update(received - bus_seconds, received, current + bus_clock.correction(received))
+        assert not stepped or index == 0
+        if index == 360 * 2:
+            assert bus_clock.drift == pytest.approx(1.5e-4, abs=1e-5)
+
+    assert len(bus_clock._buckets) == bustime.WINDOW
+    assert bus_clock._buckets[-1][0] - bus_clock._buckets[0][0] < bustime.SPAN + bus_clock.bucket
+    assert bus_clock.drift == pytest.approx(1.5e-4, abs=1e-5)
+    assert abs(current - true_offset(received) - 0.06) < 0.05
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    """BusTime on a virtual clock, counting recalculations and reschedules."""
+
+    zone = pytz.timezone(sun.tz)
+    virtual = clock.VirtualClock(zone.localize(datetime.datetime(2026, 3, 10, 23, 58, 0, 250000)))
+    monkeypatch.setattr(clock, "_clock", virtual)
+    monkeypatch.setattr(configuration, "az_el_option", "BusTime")
+    monkeypatch.setattr(sun, "timedelta", datetime.timedelta(0))
+    monkeypatch.setattr(sun, "bus_clock", bustime.BusClock())
+    calls = {"sun": 0, "notify": 0, "reschedule": 0}
+    monkeypatch.setattr(sun, "calculate_solar_position", lambda: calls.__setitem__("sun", calls["sun"] + 1))
+    monkeypatch.setattr(KNX.SectorRunner, "notify", lambda guid=None: calls.__setitem__("notify", calls["notify"] + 1))
+    monkeypatch.setattr(TimeProgramRunner, "reschedule", lambda: calls.__setitem__("reschedule", calls["reschedule"] + 1))
+    return virtual, zone, calls
+
+
+def _bus_time(moment: datetime.datetime) -> tuple[int, int, int]:
+    return (moment.isoweekday() << 5 | moment.hour, moment.minute, moment.second)
+
+
+def test_only_steps_recalculate_and_midnight_keeps_the_date(bus) -> None:
+    """Jitter and the day change are absorbed; setting the bus clock steps once."""
+
+    virtual, zone, calls = bus
+    ahead = datetime.timedelta(seconds=-75)  # the bus clock is 75 s ahead
+    for index, jitter in enumerate((0.0, 0.4, -0.3, 0.2, 0.9)):
+        bus_now = virtual.now(zone) - ahead + datetime.timedelta(seconds=jitter)
+        KNX._handle_bus_time(_bus_time(bus_now))  # crosses midnight on the bus after the first reading
+        virtual.advance(30)
+        if index == 0:
+            assert calls == {"sun": 1, "notify": 1, "reschedule": 1}
+    assert calls == {"sun": 1, "notify": 1, "reschedule": 1}
+    assert abs(sun.offset().total_seconds() - ahead.total_seconds()) < 1.0
+    assert TimeProgramRunner._current_time(zone) == virtual.now(zone) - sun.offset()
+
+    # Same date again: nothing to do. A different date steps by whole days.
+    bus_now = virtual.now(zone) - sun.offset()
+    KNX._handle_bus_date((bus_now.day, bus_now.month, bus_now.year - 2000))
+    assert calls["sun"] == 1
+    tomorrow = bus_now + datetime.timedelta(days=1)
+    KNX._handle_bus_date((tomorrow.day, tomorrow.month, tomorrow.year - 2000))
+    assert calls == {"sun": 2, "notify": 2, "reschedule": 2}
+    assert round(sun.offset().total_seconds() - ahead.total_seconds()) == -86400
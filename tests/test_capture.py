@@ -0,0 +1,119 @@
+"""Tests for the binary telegram capture and the replay driver."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from xknx.dpt import DPTArray, DPTBinary
+from xknx.telegram import GroupAddress, IndividualAddress, Telegram, TelegramDirection
+from xknx.telegram.apci import GroupValueRead, GroupValueWrite
+
+from myapp import SectorRunner, capture, configuration, replay, sun
+from myapp.sector_state import SectorState
+
+
+def _telegram(address: str, payload, direction=TelegramDirection.INCOMING) -> Telegram:
+    return Telegram(
+        destination_address=GroupAddress(address),
+        source_address=IndividualAddress("1.1.7"),
+        direction=direction,
+        payload=payload,
+    )
+
+
+def test_records_round_trip_through_the_memory_mapped_file(tmp_path) -> None:
+    """Telegrams come back unchanged from fixed-size records."""
+
+    telegrams = [
+        _telegram("2/1/0", GroupValueWrite(DPTArray((0x0C, 0x1A)))),
+        _telegram("2/1/3", GroupValueWrite(DPTBinary(1)), TelegramDirection.OUTGOING),
+        _telegram("1/0/0", GroupValueRead()),
+    ]
+    path = tmp_path / "capture.bin"
+    with capture.CaptureWriter(path) as writer:
+        for telegram in telegrams:
+            writer.record(telegram)
+        writer.record(Telegram(destination_address=IndividualAddress("1.1.1"), payload=GroupValueRead()))
+
+    assert path.stat().st_size == capture.HEADER_SIZE + 3 * capture.RECORD_SIZE == 32 * 4
+    stored = capture.read(path)
+    assert stored.records.dtype.itemsize == capture.RECORD_SIZE
+    assert list(stored.records["direction"]) == [capture.INCOMING, capture.OUTGOING, capture.INCOMING]
+    assert list(stored.records["time"]) == sorted(stored.records["time"])
+    assert [capture.to_telegram(record) for record in stored.records] == telegrams
+
+
+def test_writer_rotates_by_size(tmp_path) -> None:
+    """Full files move to numbered backups and the oldest ones are dropped."""
+
+    path = tmp_path / "capture.bin"
+    max_bytes = capture.HEADER_SIZE + 3 * capture.RECORD_SIZE
+    with capture.CaptureWriter(path, max_bytes=max_bytes, backups=2) as writer:
+        for value in range(10):
+            writer.record(_telegram("2/1/0", GroupValueWrite(DPTArray((0, value)))))
+
+    files = capture.capture_files(path)
+    assert [file.name for file in files] == ["capture.bin.2", "capture.bin.1", "capture.bin"]
+    assert all(file.stat().st_size <= max_bytes for file in files)
+    values = [int(record["payload"][1]) for file in files for record in capture.read(file).records]
+    assert values == [3, 4, 5, 6, 7, 8, 9]
+
+    with pytest.raises(ValueError):
+        (tmp_path / "other.bin").write_bytes(b"x" * 64)
+        capture.read(tmp_path / "other.bin")
+
+
+def test_writer_flushes_on_a_loop_timer_after_traffic_stops(tmp_path, monkeypatch) -> None:
+    """The last records reach the file within the flush interval without further telegrams."""
+
+    monkeypatch.setattr(capture, "_FLUSH_INTERVAL", 0.02)
+    path = tmp_path / "capture.bin"
+
+    async def scenario() -> None:
+        with capture.CaptureWriter(path) as writer:
+            writer.record(_telegram("2/1/0", GroupValueWrite(DPTArray((0, 1)))))
+            writer.record(_telegram("2/1/0", GroupValueWrite(DPTArray((0, 2)))))
+            assert path.stat().st_size == capture.HEADER_SIZE
+            await asyncio.sleep(0.05)
+            assert path.stat().st_size == capture.HEADER_SIZE + 2 * capture.RECORD_SIZE
+            assert writer._flush_timer is None
+
+    asyncio.run(scenario())
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Keep the replay's engine state changes local to the test."""
+
+    monkeypatch.setattr(configuration, "az_el_option", "BusAzEl")
+    monkeypatch.setattr(sun, "current_azimuth", 180.0)
+    monkeypatch.setattr(sun, "current_elevation", 40.0)
+    for guid in SectorRunner.sectors:
+        monkeypatch.setitem(SectorRunner.sectors, guid, SectorState())
+    monkeypatch.setattr(SectorRunner, "louvre_tables", {})
+    return SectorRunner
+
+
+def test_replay_feeds_the_engine_deterministically(engine, tmp_path) -> None:
+    """A capture from server start reproduces the recorded writes, identically on every run."""
+
+    sector = next(s for s in configuration.sectors if s["Name"] == "Sektor 2")
+    path = tmp_path / "capture.bin"
+    with capture.CaptureWriter(path) as writer:
+        # The startup pass publishes every sector's sun state.
+        for other in configuration.sectors:
+            writer.record(_telegram(other["SunBoolAddress"], GroupValueWrite(DPTBinary(0)), TelegramDirection.OUTGOING))
+        writer.record(_telegram(sector["OnAutoAddress"], GroupValueWrite(DPTBinary(0))))
+        writer.record(_telegram(sector["SunBoolAddress"], GroupValueWrite(DPTBinary(1)), TelegramDirection.OUTGOING))
+        writer.record(_telegram(sector["HeightAddress"], GroupValueWrite(DPTArray((255,))), TelegramDirection.OUTGOING))
+
+    first = replay.replay(path)
+    assert first.incoming == 1
+    assert len(first.replayed) == len(first.recorded) == len(configuration.sectors) + 2
+    sun_bool = GroupAddress(sector["SunBoolAddress"]).raw
+    assert (sun_bool, capture.KIND_WRITE, capture.FLAG_BINARY, b"\x01") in [sig for _, sig in first.replayed]
+    assert first.divergent_addresses() == []
+
+    second = replay.replay(path)
+    assert [sig for _, sig in second.replayed] == [sig for _, sig in first.replayed]
@@ -0,0 +1,121 @@
+"""Parity tests for the table-driven DPT codecs."""
+
+from __future__ import annotations
+
+import math
+import struct
+
+import numpy as np
+import pytest
+
+import myapp.KNX as KNX
+from myapp import capture, codec
+
+
+# The per-telegram bit manipulation decoders the codec replaces.
+def _reference_dpt9(byte_pair):
+    hi, lo = byte_pair
+    value = (hi << 8) | lo
+    if value == 0x7FFF:
+        return math.nan
+    E = (value >> 11) & 0xF
+    m_raw = ((value & 0x8000) >> 4) | (value & 0x0700) | (value & 0x00FF)
+    M = m_raw - 0x1000 if (m_raw & 0x800) else m_raw
+    return 0.01 * M * (1 << E)
+
+
+def _reference_dpt8(byte_pair):
+    hi, lo = byte_pair
+    value = (hi << 8) | lo
+    if value > 32767:
+        value -= 65536
+    return value
+
+
+def _reference_dpt14(byte_quad):
+    b = bytes(byte_quad)
+    if len(b) != 4:
+        raise ValueError("DPT14 requires exactly 4 bytes")
+    if struct.unpack("!I", b)[0] == 0x7FFFFFFF:
+        return math.nan
+    return struct.unpack("!f", b)[0]
+
+
+def _same(actual, expected) -> bool:
+    return actual == expected or (math.isnan(actual) and math.isnan(expected))
+
+
+def test_two_byte_decoders_match_the_reference_for_every_payload() -> None:
+    """DPT 9 and DPT 8 agree bit for bit on all 65 536 payloads, scalar and batch."""
+
+    payloads = np.array([(raw >> 8, raw & 0xFF) for raw in range(1 << 16)], dtype=np.uint8)
+    dpt9 = codec.decode_dpt9_array(payloads)
+    dpt8 = codec.decode_dpt8_array(payloads)
+    for raw, (hi, lo) in enumerate(payloads.tolist()):
+        expected = _reference_dpt9((hi, lo))
+        assert _same(codec.decode_dpt9((hi, lo)), expected) and _same(float(dpt9[raw]), expected), raw
+        assert codec.decode_dpt8((hi, lo)) == int(dpt8[raw]) == _reference_dpt8((hi, lo)), raw
+
+    angles = codec.decode_dpt5_angle_array(payloads[:256, 1:])
+    assert [codec.decode_dpt5_angle((byte,)) for byte in range(256)] == [byte / 255 * 360 for byte in range(256)] == angles.tolist()
+
+
+def test_dpt14_matches_the_reference_across_exponents_and_specials() -> None:
+    """Random bit patterns of every exponent, infinities, NaNs and the invalid marker."""
+
+    rng = np.random.default_rng(4)
+    words = rng.integers(0, 1 << 32, 200_000, dtype=np.uint64).tolist()
+    words += [0, 0x80000000, 0x7F800000, 0xFF800000, 0x7FC00000, 0x7FFFFFFF, 0x00000001, 0x7F7FFFFF]
+    payloads = np.array([tuple(struct.pack("!I", word)) for word in words], dtype=np.uint8)
+    batch = codec.decode_dpt14_array(payloads)
+    for index, payload in enumerate(payloads.tolist()):
+        expected = _reference_dpt14(payload)
+        assert _same(codec.decode_dpt14(payload), expected) and _same(float(batch[index]), expected), payload
+    with pytest.raises(ValueError):
+        codec.decode_dpt14((1, 2, 3))
+
+
+def test_encoders_round_trip() -> None:
+    """Encoding a decoded value gives a payload that decodes to the same value; batch and scalar agree."""
+
+    canonical = [value for value in codec.DPT9_TABLE.tolist() if not math.isnan(value)]
+    for value in canonical:
+        assert codec.decode_dpt9(codec.encode_dpt9(value)) == value
+    assert math.isnan(codec.decode_dpt9(codec.encode_dpt9(math.nan)))
+
+    values = np.concatenate([np.random.default_rng(5).uniform(-670_000, 670_000, 5000), [0.0, -0.004, 20.47, 20.48, math.nan]])
+    encoded = codec.encode_dpt9_array(values)
+    assert encoded.tolist() == [list(codec.encode_dpt9(value)) for value in values.tolist()]
+    decoded = codec.decode_dpt9_array(encoded)
+    resolution = np.nan_to_num(0.01 * (1 << ((encoded[:, 0].astype(int) >> 3) & 0xF)))
+    assert np.all(np.abs(np.nan_to_num(decoded - values)) <= resolution / 2 + 1e-9)
+    with pytest.raises(ValueError):
+        codec.encode_dpt9(700_000)
+
+    for value in (-32768, -1, 0, 1, 32767):
+        assert codec.decode_dpt8(codec.encode_dpt8(value)) == value
+    for value in (0.0, -12.5, 123.456, 1e30):
+        assert codec.decode_dpt14(codec.encode_dpt14(value)) == struct.unpack("!f", struct.pack("!f", value))[0]
+    for byte in range(256):
+        assert codec.encode_dpt5_angle(codec.decode_dpt5_angle((byte,))) == (byte,)
+
+
+def test_decoders_are_chosen_per_address_and_apply_to_captures(monkeypatch) -> None:
+    """The dispatch table holds the codec decoder of the configured DPT; captures decode in one call."""
+
+    monkeypatch.setattr(KNX.configuration, "az_el_option", "BusAzEl")
+    monkeypatch.setattr(KNX.configuration, "azimuth_dpt", 8.011)
+    monkeypatch.setattr(KNX.configuration, "elevation_dpt", "5.003")
+    monkeypatch.setattr(KNX, "_dispatch", None)
+    table = KNX.build_dispatch_table()
+    azimuth = KNX.GroupAddress(KNX.configuration.azimuth_address).raw
+    elevation = KNX.GroupAddress(KNX.configuration.elevation_address).raw
+    assert table[azimuth][0][0] is codec.decode_dpt8
+    assert table[elevation][0][0] is codec.decode_dpt5_angle
+    with pytest.raises(ValueError):
+        codec.decoder(9.999)((0, 0))
+    monkeypatch.setattr(KNX, "_dispatch", None)
+
+    records = np.zeros(3, dtype=capture.RECORD_DTYPE)
+    records["payload"][:, :2] = [codec.encode_dpt9(value) for value in (150.0, 40960.0, -3.5)]
+    assert capture.values(records, 9.004).tolist() == [150.0, 40960.0, -3.5]
@@ -1,10 +1,13 @@
 """Tests for the baked-in Staerium configuration defaults."""
 
+import hashlib
 import importlib
+from pathlib import Path
 
 import pytest
 
 import myapp as src
+from myapp import config_loader
 from myapp.config_loader import load_config
 
 
@@ -114,3 +117,74 @@ def test_invalid_physical_address_raises(tmp_path) -> None:
 
     with pytest.raises(ValueError, match="KnxIndividualAddress"):
         load_config(xml)
+
+
+CONFIG_XML = Path(src.__file__).with_name("config.xml")
+
+
+def test_compiled_config_is_cached_by_content_hash(tmp_path, monkeypatch) -> None:
+    """An unchanged file is loaded from the cache; an edited one is parsed again."""
+
+    xml = tmp_path / "config.xml"
+    xml.write_bytes(CONFIG_XML.read_bytes())
+    cache = tmp_path / "cache"
+    parsed = load_config(xml, cache_dir=cache)
+    assert len(list(cache.glob("*.pickle"))) == 1
+
+    def no_parse(data: bytes) -> None:
+        raise AssertionError("cache miss")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(config_loader, "_compile", no_parse)
+        cached = load_config(xml, cache_dir=cache)
+    assert [sector["Name"] for sector in cached["Sectors"]] == [sector["Name"] for sector in parsed["Sectors"]]
+    assert list(cached["Sectors"][0]["HorizonProfile"].xs) == list(parsed["Sectors"][0]["HorizonProfile"].xs)
+
+    xml.write_text(xml.read_text(encoding="utf-8").replace("<Latitude>47.377672</Latitude>", "<Latitude>46.5</Latitude>"), encoding="utf-8")
+    assert load_config(xml, cache_dir=cache)["Latitude"] == 46.5
+    assert len(list(cache.glob("*.pickle"))) == 2
+
+
+def test_corrupt_cache_falls_back_to_parsing(tmp_path, capsys) -> None:
+    """A damaged entry is replaced; the pre-compile tool writes entries up front."""
+
+    cache = tmp_path / "cache"
+    config_loader.main([str(CONFIG_XML), "--cache-dir", str(cache)])
+    entry = config_loader.cache_path(cache, hashlib.sha256(CONFIG_XML.read_bytes()).hexdigest())
+    assert str(entry) in capsys.readouterr().out
+
+    entry.write_bytes(b"not a pickle")
+    assert load_config(CONFIG_XML, cache_dir=cache)["Sectors"]
+    assert entry.read_bytes() != b"not a pickle"
+
+
+def test_cache_entries_from_other_compiler_code_are_not_loaded(tmp_path, monkeypatch) -> None:
+    """A changed loader fingerprint recompiles and replaces the older entry."""
+
+    cache = tmp_path / "cache"
+    load_config(CONFIG_XML, cache_dir=cache)
+    [old_entry] = cache.glob("*.pickle")
+
+    monkeypatch.setattr(config_loader, "compiler_fingerprint", lambda: "0123456789abcdef")
+    compiled: list[bytes] = []
+    compile_ = config_loader._compile
+    monkeypatch.setattr(config_loader, "_compile", lambda data: compiled.append(data) or compile_(data))
+    assert load_config(CONFIG_XML, cache_dir=cache)["Sectors"]
+    assert len(compiled) == 1
+    assert [entry.name.split(".")[1] for entry in cache.glob("*.pickle")] == ["0123456789abcdef"]
+    assert not old_entry.exists()
+
+
+def test_nothing_is_cached_without_a_cache_directory(tmp_path, monkeypatch) -> None:
+    """The cache is opt-in through CONFIG_CACHE_DIR; the home directory is left alone."""
+
+    monkeypatch.delenv("CONFIG_CACHE_DIR", raising=False)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    assert config_loader.default_cache_dir() is None
+    assert load_config(CONFIG_XML)["Sectors"]
+    assert list(tmp_path.rglob("*.pickle")) == []
+
+    monkeypatch.setenv("CONFIG_CACHE_DIR", str(tmp_path / "cache"))
+    load_config(CONFIG_XML)
+    assert len(list((tmp_path / "cache").glob("*.pickle"))) == 1
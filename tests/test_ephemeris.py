@@ -0,0 +1,99 @@
+"""Tests for the precomputed solar ephemeris."""
+
+from __future__ import annotations
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from pvlib.location import Location
+
+import myapp.sun as sun
+from myapp.ephemeris import EphemerisTable
+
+
+def _reference(site: Location, timestamps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    times = pd.DatetimeIndex(pd.to_datetime(timestamps, unit="s", utc=True)).tz_convert(site.tz)
+    solpos = site.get_solarposition(times)
+    return solpos["azimuth"].to_numpy(), solpos["elevation"].to_numpy()
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, timezone, day",
+    [
+        (47.377672, 8.518703, "Europe/Zurich", datetime.date(2026, 6, 21)),
+        (47.377672, 8.518703, "Europe/Zurich", datetime.date(2026, 3, 29)),  # DST switch
+        (-33.9, 18.4, "Africa/Johannesburg", datetime.date(2026, 12, 21)),
+        (69.6, 18.9, "Europe/Oslo", datetime.date(2026, 6, 21)),  # midnight sun
+    ],
+)
+def test_interpolation_matches_pvlib(latitude, longitude, timezone, day) -> None:
+    """With the default 30 s step both angles stay within 0.001 degrees of pvlib."""
+
+    site = Location(latitude, longitude, tz=timezone)
+    table = EphemerisTable.build(site, day, 30)
+    timestamps = np.random.default_rng(1).uniform(table.start, table.end, 2000)
+
+    azimuth, elevation = table.lookup(timestamps)
+    ref_azimuth, ref_elevation = _reference(site, timestamps)
+
+    azimuth_error = np.abs((azimuth - ref_azimuth + 180.0) % 360.0 - 180.0)
+    assert azimuth_error.max() < 1e-3
+    assert np.abs(elevation - ref_elevation).max() < 1e-3
+
+
+def test_azimuth_wraps_across_north() -> None:
+    """Interpolating between 359 and 1 degrees must not sweep through south."""
+
+    site = Location(69.6, 18.9, tz="Europe/Oslo")
+    table = EphemerisTable.build(site, datetime.date(2026, 6, 21), 60)
+    wrapped = table.azimuth % 360.0
+    crossing = int(np.flatnonzero(np.abs(np.diff(wrapped)) > 180.0)[0])
+    midpoint = (table.times[crossing] + table.times[crossing + 1]) / 2
+
+    azimuth, _ = table.lookup(midpoint)
+    ref_azimuth, _ = _reference(site, np.array([midpoint]))
+
+    assert azimuth < 1.0 or azimuth > 359.0
+    assert abs((azimuth - ref_azimuth[0] + 180.0) % 360.0 - 180.0) < 1e-2
+
+
+def test_table_covers_one_local_day() -> None:
+    """The table spans local midnight to midnight, including DST days."""
+
+    site = Location(47.377672, 8.518703, tz="Europe/Zurich")
+    table = EphemerisTable.build(site, datetime.date(2026, 3, 29), 30)
+
+    assert table.end - table.start == 23 * 3600
+    assert table.covers(table.start)
+    assert not table.covers(table.end)
+
+
+def test_sun_rebuilds_table_at_midnight_and_offset_jump(monkeypatch) -> None:
+    """Leaving the covered day or a BusTime jump triggers a rebuild."""
+
+    monkeypatch.setattr(sun.configuration, "solar_ephemeris_step", 30)
+    monkeypatch.setattr(sun, "_ephemeris", None)
+    monkeypatch.setattr(sun, "timedelta", datetime.timedelta(0))
+    builds: list[datetime.date] = []
+    original_build = EphemerisTable.build.__func__
+
+    def counting_build(cls, site, day, step=30.0):
+        builds.append(day)
+        return original_build(cls, site, day, step)
+
+    monkeypatch.setattr(EphemerisTable, "build", classmethod(counting_build))
+    timezone = pytz.timezone(sun.tz)
+
+    sun._ephemeris_position(timezone.localize(datetime.datetime(2026, 6, 21, 12, 0)))
+    sun._ephemeris_position(timezone.localize(datetime.datetime(2026, 6, 21, 23, 59, 59)))
+    assert builds == [datetime.date(2026, 6, 21)]
+
+    sun._ephemeris_position(timezone.localize(datetime.datetime(2026, 6, 22, 0, 0, 1)))
+    assert builds[-1] == datetime.date(2026, 6, 22)
+
+    monkeypatch.setattr(sun, "timedelta", datetime.timedelta(minutes=5))
+    sun._ephemeris_position(datetime.datetime(2026, 6, 22, 8, 0))
+    assert len(builds) == 3
@@ -0,0 +1,106 @@
+"""Tests for geometry classes shared by sectors with the same geometry."""
+
+from __future__ import annotations
+
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+from xknx import XKNX
+
+from myapp import SectorRunner, configuration, louvre, sun
+from myapp.config_loader import load_config
+from myapp.geometry import GeometryClasses, geometry_key
+from myapp.outbound import OutboundQueue
+from myapp.SectorRunner import horizon_limit_check, louvre_angle_calculation
+from myapp.sector_state import SectorState
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+import sunproj  # noqa: E402
+
+
+def _clone(sector: dict, index: int, **changes) -> dict:
+    clone = copy.deepcopy(sector)
+    clone.update(GUID=f"{sector['GUID'][:-4]}{index:04d}", SunBoolAddress=f"9/0/{index}", BrightnessUpperThreshold=1000 + index)
+    clone.update(changes)
+    return clone
+
+
+def test_sectors_are_grouped_by_their_geometry_only() -> None:
+    """Addresses, sensors and thresholds do not split a class; orientation and profiles do."""
+
+    base = next(sector for sector in configuration.sectors if sector["HorizonLimit"] and sector["LouvreTracking"])
+    twin = _clone(base, 1)
+    turned = _clone(base, 2, Orientation=base["Orientation"] + 10)
+    flat = _clone(base, 3, HorizonLimit=False)
+    flat_other_points = _clone(base, 4, HorizonLimit=False, HorizonPoints=[{"X": 0, "Y": 45}])
+    other_louvre_output = _clone(base, 5, LouvreBuffer=base.get("LouvreBuffer", 0) + 7)
+
+    classes = GeometryClasses([base, twin, turned, flat, flat_other_points, other_louvre_output])
+
+    assert len(classes) == 4
+    assert classes.index[base["GUID"]] == classes.index[twin["GUID"]] == 0
+    assert classes.index[flat["GUID"]] == classes.index[flat_other_points["GUID"]]
+    assert len({classes.index[sector["GUID"]] for sector in (base, turned, flat, other_louvre_output)}) == 4
+    assert geometry_key(_clone(base, 6, LouvreTracking=False, LouvreDepth=1)) == geometry_key(_clone(base, 7, LouvreTracking=False))
+
+
+@pytest.mark.parametrize("resolution", [0, 0.5])
+def test_class_results_match_the_per_sector_calculation(tmp_path, resolution) -> None:
+    """Exposure, louvre angle and output bytes equal what each sector computes on its own."""
+
+    sectors = load_config(sunproj.write(tmp_path / "building.sunproj", 40, seed=3, geometries=6), cache=False)["Sectors"]
+    classes = GeometryClasses(sectors, resolution)
+    assert len(classes) == 6
+
+    for azimuth in range(60, 300, 7):
+        for elevation in (-3.0, 0.0, 12.5, 31.0, 58.0, 77.0):
+            exposed = classes.evaluate(float(azimuth), elevation)
+            for sector in sectors:
+                index = classes.index[sector["GUID"]]
+                relative = azimuth - sector["Orientation"]
+                if relative > 180:
+                    relative -= 360
+                expected = (-90 <= relative <= 90 or elevation < 0) and (
+                    not sector["HorizonLimit"] or horizon_limit_check(sector, relative, elevation)
+                )
+                assert exposed[index] == expected, (sector["Name"], azimuth, elevation)
+                if not expected:
+                    continue
+                angle = louvre_angle_calculation(sector["LouvreSpacing"], sector["LouvreDepth"], relative, elevation)
+                if resolution:
+                    assert abs(classes.louvre_angle(index) - angle) <= 2.0
+                    continue
+                assert classes.louvre_angle(index) == angle
+                for direction in louvre.DIRECTIONS:
+                    assert classes.louvre_bytes(index, direction) == louvre.angle_bytes(sector, angle, direction)
+
+
+def test_geometric_work_scales_with_classes_not_sectors(monkeypatch) -> None:
+    """A full pass over 60 sectors of 2 geometries solves the louvre angle twice and sends the same bytes."""
+
+    base = next(sector for sector in configuration.sectors if sector["LouvreTracking"])
+    sectors = [
+        _clone(base, index, Orientation=180 if index % 2 else 230, HorizonLimit=False, LouvreAngleAddress=f"9/1/{index}")
+        for index in range(60)
+    ]
+    monkeypatch.setattr(configuration, "sectors", sectors)
+    monkeypatch.setattr(configuration, "louvre_table_resolution", 0)
+    monkeypatch.setattr(sun, "current_azimuth", 190.0)
+    monkeypatch.setattr(sun, "current_elevation", 35.0)
+    monkeypatch.setattr(SectorRunner, "sectors", {s["GUID"]: SectorState(Mode="On", sun_state=True) for s in sectors})
+    monkeypatch.setattr(SectorRunner, "xknx", XKNX())
+    monkeypatch.setattr(SectorRunner, "outbound_queue", OutboundQueue())
+    monkeypatch.setattr(SectorRunner, "louvre_tables", {})
+    solved = []
+    solve = louvre.cutoff_angle
+    monkeypatch.setattr(louvre, "cutoff_angle", lambda *args: solved.append(args) or solve(*args))
+
+    classes = SectorRunner.prepare()
+    SectorRunner.evaluate_pass(sectors, classes)
+    SectorRunner.evaluate_pass(sectors[:5], classes)  # same sun position: nothing is solved again
+
+    assert len(classes) == 2 and len(solved) == 2
+    sent = {SectorRunner.sectors[s["GUID"]]["angle_bytes_sent"] for s in sectors}
+    assert len(sent) == 2
@@ -0,0 +1,111 @@
+"""Parity tests for compiled horizon and ceiling profiles."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from myapp import configuration
+from myapp.horizon import HorizonLimits, Profile, ProfileSet
+from myapp.SectorRunner import horizon_limit_check
+
+
+def reference_interpolate(points, target_x, is_ceiling=False):
+    """The original per-call interpolation, kept verbatim as the reference."""
+    if not points:
+        return None
+
+    sorted_points = sorted(points, key=lambda point: point.get("X", 0))
+
+    if target_x <= sorted_points[0].get("X", 0):
+        return sorted_points[0].get("Y")
+
+    if target_x >= sorted_points[-1].get("X", 0):
+        return sorted_points[-1].get("Y")
+
+    for lower, upper in zip(sorted_points, sorted_points[1:]):
+        lower_x = lower.get("X", 0)
+        upper_x = upper.get("X", 0)
+
+        if lower_x <= target_x <= upper_x:
+            lower_y = lower.get("Y")
+            upper_y = upper.get("Y")
+
+            if upper_x == lower_x:
+                if is_ceiling:
+                    if upper_y < lower_y:
+                        return lower_y
+                    else:
+                        return upper_y
+                else:
+                    if upper_y < lower_y:
+                        return upper_y
+                    else:
+                        return lower_y
+
+            fraction = (target_x - lower_x) / (upper_x - lower_x)
+            return lower_y + fraction * (upper_y - lower_y)
+
+    return None
+
+
+def _random_points(rng: np.random.Generator) -> list[dict[str, float]]:
+    xs = rng.choice(np.arange(-90, 91, 10), size=rng.integers(1, 9))
+    return [{"X": int(x), "Y": int(y)} for x, y in zip(xs, rng.integers(0, 90, size=len(xs)))]
+
+
+def _targets() -> np.ndarray:
+    return np.concatenate((np.arange(-100.0, 100.5, 0.25), np.arange(-90, 91, 10).astype(float)))
+
+
+def test_config_sectors_have_compiled_profiles() -> None:
+    """The loader attaches compiled profiles next to the raw point lists."""
+
+    for sector in configuration.sectors:
+        assert isinstance(sector["HorizonProfile"], Profile)
+        assert isinstance(sector["CeilingProfile"], Profile)
+        assert list(sector["HorizonProfile"].xs) == sorted(p["X"] for p in sector["HorizonPoints"])
+
+
+@pytest.mark.parametrize("is_ceiling", [False, True])
+def test_profiles_match_reference_including_duplicate_x(is_ceiling) -> None:
+    """Configured profiles (with repeated X values) evaluate exactly like before."""
+
+    key = "CeilingPoints" if is_ceiling else "HorizonPoints"
+    for sector in configuration.sectors:
+        profile = Profile(sector[key])
+        for target in _targets():
+            assert profile(target) == reference_interpolate(sector[key], target, is_ceiling)
+
+
+def test_random_profiles_scalar_and_batch_match_reference() -> None:
+    """Scalar bisection and the vectorised batch agree with the reference."""
+
+    rng = np.random.default_rng(7)
+    point_lists = [_random_points(rng) for _ in range(200)] + [[]]
+    profiles = ProfileSet([Profile(points) for points in point_lists])
+
+    for target in _targets():
+        batch = profiles.evaluate(np.full(len(point_lists), target))
+        for points, value in zip(point_lists, batch):
+            expected = reference_interpolate(points, target)
+            assert Profile(points)(target) == expected
+            if expected is None:
+                assert np.isnan(value)
+            else:
+                assert value == expected
+
+
+def test_horizon_limits_batch_matches_per_sector_check() -> None:
+    """One batch call gives the same verdict as checking every sector."""
+
+    sectors = configuration.sectors
+    limits = HorizonLimits(sectors)
+    for azimuth in range(0, 360, 3):
+        for elevation in range(-5, 91, 5):
+            batch = limits.check(float(azimuth), float(elevation))
+            for index, sector in enumerate(sectors):
+                relative = azimuth - sector["Orientation"]
+                if relative > 180:
+                    relative -= 360
+                assert batch[index] == horizon_limit_check(sector, relative, elevation)
@@ -0,0 +1,88 @@
+"""Tests for the hysteresis state machine and its timer heap."""
+
+from __future__ import annotations
+
+import asyncio
+
+from myapp import hysteresis
+from myapp.timers import TimerHeap
+
+
+SECTOR = {
+    "GUID": "sector",
+    "BrightnessUpperThreshold": 100,
+    "BrightnessLowerThreshold": 50,
+    "BrightnessUpperDelay": 0.05,
+    "BrightnessLowerDelay": 0.1,
+}
+
+
+def test_transitions_follow_the_table() -> None:
+    """States 1-4 move exactly as the former if/elif chain did."""
+
+    async def scenario() -> None:
+        timers = TimerHeap()
+        state: dict[str, object] = {}
+        expired: list[tuple[str, str, int]] = []
+
+        def on_timeout(guid: str, channel: str, next_state: int) -> None:
+            expired.append((guid, channel, next_state))
+            state[f"{channel}_state"] = next_state
+
+        def feed(value: float) -> bool:
+            return hysteresis.apply(SECTOR, state, "brightness", value, timers, on_timeout)
+
+        assert feed(75) is False  # between thresholds
+        assert feed(150) is True
+        assert state["brightness_state"] == 3 and timers.pending == 1
+        assert feed(20) is True  # back down before the on-delay expired
+        assert state["brightness_state"] == 1 and timers.pending == 0
+
+        feed(150)
+        await asyncio.sleep(0.1)
+        assert expired == [("sector", "brightness", 4)]
+        assert state["brightness_state"] == 4
+
+        assert feed(20) is True
+        assert state["brightness_state"] == 2 and timers.pending == 1
+        assert feed(150) is True  # recovered before the off-delay expired
+        assert state["brightness_state"] == 4 and timers.pending == 0
+        await asyncio.sleep(0.15)
+        assert expired == [("sector", "brightness", 4)]
+
+    asyncio.run(scenario())
+
+
+def test_timer_heap_fires_in_deadline_order_and_cancels() -> None:
+    """One heap serves many timers; cancelled ones never fire or count."""
+
+    async def scenario() -> None:
+        timers = TimerHeap()
+        fired: list[int] = []
+        handles = [timers.call_later(0.01 * (5 - index), fired.append, index) for index in range(5)]
+        handles[1].cancel()
+        handles[1].cancel()
+        assert timers.pending == 4
+
+        await asyncio.sleep(0.1)
+        assert fired == [4, 3, 2, 0]
+        assert timers.pending == 0
+        assert not any(handle.active for handle in handles)
+
+    asyncio.run(scenario())
+
+
+def test_timer_heap_compacts_mass_cancellation() -> None:
+    """Cancelling most timers keeps the heap from growing without bound."""
+
+    async def scenario() -> None:
+        timers = TimerHeap()
+        handles = [timers.call_later(60, lambda: None) for _ in range(1000)]
+        for handle in handles[:-10]:
+            handle.cancel()
+        assert timers.pending == 10
+        assert len(timers._heap) < 100
+        timers.clear()
+        assert timers.pending == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,104 @@
+"""Tests for the received telegram ring buffer."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from xknx.dpt import DPTArray, DPTBinary
+from xknx.telegram import GroupAddress, Telegram
+from xknx.telegram.apci import GroupValueWrite
+
+import myapp.KNX as KNX
+from myapp import codec, ingest, metrics
+from myapp.sector_state import SectorState
+
+
+def _write(address: str, value) -> Telegram:
+    return Telegram(destination_address=GroupAddress(address), payload=GroupValueWrite(value))
+
+
+def test_consumer_handles_telegrams_in_order_and_yields_between_batches() -> None:
+    """``put`` only buffers; the consumer task hands everything over in arrival order."""
+
+    queue = ingest.IngestQueue(1000)
+    handled: list[Telegram] = []
+    telegrams = [_write(f"1/0/{index}", DPTBinary(index % 2)) for index in range(200)]
+
+    async def scenario() -> int:
+        task = asyncio.create_task(queue.run(handled.append))
+        await asyncio.sleep(0)
+        for telegram in telegrams:
+            queue.put(telegram)
+        assert handled == [] and queue.depth == 200
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        after_two_ticks = len(handled)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return after_two_ticks
+
+    after_two_ticks = asyncio.run(scenario())
+
+    assert 0 < after_two_ticks < 200 and after_two_ticks % ingest.BATCH_SIZE == 0
+    assert handled == telegrams
+    assert queue.stats() == {"depth": 0, "high_water": 200, "received": 200, "handled": 200, "coalesced": 0, "dropped": 0}
+
+
+def test_full_buffer_coalesces_sensor_values_and_drops_the_oldest_otherwise(monkeypatch) -> None:
+    """A newer sensor value replaces the waiting one in place; other telegrams push out the oldest."""
+
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    brightness = GroupAddress("2/0/1")
+    queue = ingest.IngestQueue(3, {brightness.raw: "brightness", GroupAddress("2/0/2").raw: "mode"})
+
+    queue.put(_write("2/0/2", DPTBinary(1)))
+    queue.put(_write("2/0/1", DPTArray((0x0C, 0x00))))
+    queue.put(_write("2/0/3", DPTBinary(0)))
+    queue.put(_write("2/0/1", DPTArray((0x0C, 0x1A))))  # full: replaces the waiting brightness value
+    queue.put(_write("2/0/2", DPTBinary(0)))  # full, not a sensor: drops the oldest (2/0/2 = 1)
+
+    batch = queue.take(10)
+    assert [(str(t.destination_address), t.payload.value.value) for t in batch] == [
+        ("2/0/1", (0x0C, 0x1A)),
+        ("2/0/3", 0),
+        ("2/0/2", 0),
+    ]
+    assert (queue.coalesced, queue.dropped, queue.high_water) == (1, 1, 3)
+    rendered = metrics.render()
+    assert 'staerium_ingest_overflow_total{outcome="coalesced"} 1' in rendered
+    assert 'staerium_ingest_overflow_total{outcome="dropped"} 1' in rendered
+
+    # Once the waiting value has been taken, the next one is queued normally.
+    queue.put(_write("2/0/1", DPTArray((0x0C, 0x00))))
+    assert queue.depth == 1 and queue.coalesced == 1
+    metrics.reset()
+
+
+def test_sensor_burst_reaches_the_sector_through_the_consumer(monkeypatch) -> None:
+    """A brightness burst larger than the buffer leaves the sector with the latest reading."""
+
+    sector = KNX.configuration.sectors[0]
+    monkeypatch.setattr(KNX.configuration, "az_el_option", "Internet")
+    monkeypatch.setitem(KNX.SectorRunner.sectors, sector["GUID"], SectorState())
+    monkeypatch.setattr(KNX.SectorRunner, "notify", lambda guid=None: None)
+    monkeypatch.setattr(KNX, "_dispatch", None)
+    KNX.build_dispatch_table()
+    queue = ingest.IngestQueue(8, KNX._address_classes)
+    values = [(0x0C, low) for low in range(50)]
+
+    async def scenario() -> None:
+        task = asyncio.create_task(queue.run(KNX.telegram_received))
+        await asyncio.sleep(0)
+        for value in values:
+            queue.put(_write(sector["BrightnessAddress"], DPTArray(value)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert KNX.SectorRunner.sectors[sector["GUID"]]["Brightness"] == pytest.approx(codec.decode_dpt9(values[-1]))
+    assert queue.coalesced == len(values) - 8 and queue.dropped == 0
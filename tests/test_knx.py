@@ -0,0 +1,109 @@
+"""Tests for incoming telegram dispatch."""
+
+from __future__ import annotations
+
+import copy
+
+import pytest
+from xknx.dpt import DPTArray, DPTBinary
+from xknx.telegram import GroupAddress, Telegram
+from xknx.telegram.apci import GroupValueRead, GroupValueWrite
+
+import myapp.KNX as KNX
+from myapp import codec
+from myapp.sector_state import SectorState
+
+
+def _write(address: str, value) -> Telegram:
+    return Telegram(destination_address=GroupAddress(address), payload=GroupValueWrite(value))
+
+
+@pytest.fixture
+def shared_sensor(monkeypatch):
+    """Two sectors subscribed to the same brightness sensor."""
+
+    base = KNX.configuration.sectors[0]
+    first = copy.deepcopy(base)
+    second = copy.deepcopy(base)
+    second.update(GUID="second", Name="Second", OnAutoAddress="4/0/4", OffAutoAddress="4/0/5")
+    sectors = [first, second]
+
+    monkeypatch.setattr(KNX.configuration, "sectors", sectors)
+    monkeypatch.setattr(KNX.configuration, "az_el_option", "Internet")
+    for sector in sectors:
+        monkeypatch.setitem(KNX.SectorRunner.sectors, sector["GUID"], SectorState())
+    monkeypatch.setattr(KNX.SectorRunner, "notify", lambda guid=None: None)
+    monkeypatch.setattr(KNX, "_dispatch", None)
+    return sectors
+
+
+def test_shared_address_fans_out_and_decodes_once(shared_sensor, monkeypatch) -> None:
+    """Every subscriber sees the value while the DPT 9 decoder runs once."""
+
+    calls: list[tuple[int, int]] = []
+    original = codec.decode_dpt9
+
+    def counting_decoder(byte_pair):
+        calls.append(tuple(byte_pair))
+        return original(byte_pair)
+
+    monkeypatch.setattr(codec, "decode_dpt9", counting_decoder)
+    table = KNX.build_dispatch_table()
+    address = GroupAddress(shared_sensor[0]["BrightnessAddress"])
+    assert len(table[address.raw]) == 2
+
+    KNX.telegram_received(_write(str(address), DPTArray((0x0C, 0x1A))))
+
+    assert len(calls) == 1
+    for sector in shared_sensor:
+        assert KNX.SectorRunner.sectors[sector["GUID"]]["Brightness"] == pytest.approx(original((0x0C, 0x1A)))
+
+
+def test_sensor_telegrams_are_only_logged_with_debug(shared_sensor, monkeypatch, capsys) -> None:
+    """Brightness values are applied silently; Debug logs them with their unit."""
+
+    address = shared_sensor[0]["BrightnessAddress"]
+    monkeypatch.setattr(KNX.configuration, "Debug", False)
+    KNX.telegram_received(_write(address, DPTArray((0x0C, 0x1A))))
+    assert capsys.readouterr().out == ""
+
+    monkeypatch.setattr(KNX.configuration, "Debug", True)
+    KNX.telegram_received(_write(address, DPTArray((0x0C, 0x1A))))
+    assert f"Brightness from bus for {shared_sensor[1]['Name']}: {codec.decode_dpt9((0x0C, 0x1A))} Lux" in capsys.readouterr().out
+
+
+def test_mode_telegrams_reach_only_their_sector(shared_sensor) -> None:
+    """On/Off auto addresses are routed to the owning sector only."""
+
+    first, second = shared_sensor
+    KNX.telegram_received(_write(second["OffAutoAddress"], DPTBinary(0)))
+
+    assert KNX.SectorRunner.sectors[first["GUID"]]["Mode"] == "Auto"
+    assert KNX.SectorRunner.sectors[second["GUID"]]["Mode"] == "Off"
+
+
+def test_unknown_addresses_and_reads_are_ignored(shared_sensor, capsys) -> None:
+    """Unsubscribed addresses and read requests never reach a handler."""
+
+    KNX.telegram_received(_write("31/7/255", DPTBinary(1)))
+    KNX.telegram_received(
+        Telegram(destination_address=GroupAddress(shared_sensor[0]["BrightnessAddress"]), payload=GroupValueRead())
+    )
+
+    assert capsys.readouterr().out == ""
+    assert "Brightness" not in KNX.SectorRunner.sectors[shared_sensor[0]["GUID"]]
+
+
+def test_bus_azimuth_uses_configured_dpt(monkeypatch) -> None:
+    """The azimuth decoder is chosen from the configuration, not per telegram."""
+
+    monkeypatch.setattr(KNX.configuration, "az_el_option", "BusAzEl")
+    monkeypatch.setattr(KNX.configuration, "azimuth_address", "1/0/2")
+    monkeypatch.setattr(KNX.configuration, "azimuth_dpt", 5.003)
+    monkeypatch.setattr(KNX.SectorRunner, "notify", lambda guid=None: None)
+    monkeypatch.setattr(KNX.sun, "current_azimuth", 0.0)
+    monkeypatch.setattr(KNX, "_dispatch", None)
+
+    KNX.telegram_received(_write("1/0/2", DPTArray((128,))))
+
+    assert KNX.sun.current_azimuth == pytest.approx(128 / 255 * 360)
@@ -0,0 +1,78 @@
+"""Parity tests for the louvre cut-off solver and lookup tables."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from myapp import louvre
+from myapp.SectorRunner import louvre_angle_calculation
+
+
+def scan_louvre_angle(louvre_spacing, louvre_depth, relative_azimuth, current_elevation):
+    """The original linear scan, kept verbatim as the reference implementation."""
+    current_elevation_rad = math.radians(current_elevation)
+    relative_azimuth_rad = math.radians(relative_azimuth)
+    tany = math.tan(current_elevation_rad)/math.cos(relative_azimuth_rad)
+    for i in range(511, 0, -1):
+        louvre_angle_rad = math.radians(i * 90 / 511)
+        if tany > (louvre_spacing - math.cos(louvre_angle_rad) * louvre_depth) / (math.sin(louvre_angle_rad) * louvre_depth):
+            return i * 90 / 511
+    return 90
+
+
+GEOMETRIES = [(70, 80), (80, 70), (50, 100), (100, 50), (70, 70), (0.5, 120.0)]
+
+
+@pytest.mark.parametrize("spacing, depth", GEOMETRIES)
+def test_solver_matches_scan_over_full_grid(spacing, depth) -> None:
+    """Every (relative azimuth, elevation) pair on a 1 degree grid matches exactly."""
+
+    for relative_azimuth in range(-180, 181):
+        for elevation in range(-10, 91):
+            expected = scan_louvre_angle(spacing, depth, relative_azimuth, elevation)
+            assert louvre_angle_calculation(spacing, depth, relative_azimuth, elevation) == expected, (relative_azimuth, elevation)
+
+
+@pytest.mark.parametrize("spacing, depth", GEOMETRIES[:3])
+def test_solver_matches_scan_at_random_points(spacing, depth) -> None:
+    """Off-grid inputs hit the same quantised step as the scan."""
+
+    rng = np.random.default_rng(4)
+    for relative_azimuth, elevation in zip(rng.uniform(-90, 90, 5000), rng.uniform(0, 90, 5000)):
+        assert louvre.cutoff_angle(spacing, depth, relative_azimuth, elevation) == scan_louvre_angle(spacing, depth, relative_azimuth, elevation)
+
+
+@pytest.mark.parametrize("zero, hundred", [(90, 3), (0, 90), (45, 45)])
+def test_lookup_table_matches_solver_on_grid(zero, hundred) -> None:
+    """Table bytes equal the solver followed by the sector mapping at every grid cell."""
+
+    sector = {
+        "LouvreSpacing": 70,
+        "LouvreDepth": 80,
+        "LouvreAngleAtZero": zero,
+        "LouvreAngleAtHundred": hundred,
+        "LouvreMinimumChange": 20,
+        "LouvreBuffer": 5,
+    }
+    table = louvre.LouvreTable(sector, 1.0)
+
+    for relative_azimuth in range(-90, 91):
+        for elevation in range(0, 91):
+            step = table.lookup(relative_azimuth, elevation)
+            angle_deg = louvre.cutoff_angle(70, 80, relative_azimuth, elevation)
+            assert step * 90 / louvre.ANGLE_STEPS == pytest.approx(angle_deg, abs=90 / 511)
+            for direction in louvre.DIRECTIONS:
+                expected = louvre.angle_bytes(sector, step * 90 / louvre.ANGLE_STEPS, direction)
+                assert table.angle_bytes(step, direction) == expected
+                assert 0 <= expected <= 255
+
+
+def test_lookup_table_outside_grid_falls_back() -> None:
+    """Below the horizon or behind the facade the table defers to the solver."""
+
+    table = louvre.LouvreTable({"LouvreSpacing": 70, "LouvreDepth": 80}, 0.5)
+    assert table.lookup(120.0, 30.0) is None
+    assert table.lookup(10.0, -2.0) is None
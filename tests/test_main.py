@@ -99,7 +99,7 @@ def test_connect_knx_builds_tunneling_config(monkeypatch) -> None:
     assert config_kwargs["auto_reconnect"] is False
     assert config_kwargs["auto_reconnect_wait"] == 5
     assert captured["daemon_mode"] is False
-    assert captured["telegram_cb"] is module.KNX.telegram_received
+    assert captured["telegram_cb"] == module.KNX.ingest_queue.put
 
 
 def test_connect_knx_rejects_unknown_type(monkeypatch) -> None:
@@ -0,0 +1,97 @@
+"""Tests for the optional metrics endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from xknx.dpt import DPTArray
+from xknx.telegram import GroupAddress, Telegram
+from xknx.telegram.apci import GroupValueWrite
+
+from myapp import KNX, configuration, metrics
+
+
+@pytest.fixture
+def collecting(monkeypatch):
+    """Enable collection with empty metrics."""
+
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    """Buckets are cumulative and end with +Inf, sum and count."""
+
+    histogram = metrics.Histogram("demo_seconds", "Demo.", (0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.render()[2:] == [
+        'demo_seconds_bucket{le="0.1"} 1',
+        'demo_seconds_bucket{le="1"} 3',
+        'demo_seconds_bucket{le="+Inf"} 4',
+        "demo_seconds_sum 4.05",
+        "demo_seconds_count 4",
+    ]
+
+
+def test_received_telegrams_and_decode_errors_are_counted(collecting) -> None:
+    """Brightness telegrams count by class; a malformed DPT 9 payload counts as a decode error."""
+
+    sector = next(s for s in configuration.sectors if s["UseBrightness"])
+    address = GroupAddress(sector["BrightnessAddress"])
+    KNX.build_dispatch_table()
+
+    KNX.telegram_received(Telegram(destination_address=address, payload=GroupValueWrite(DPTArray((0x0C, 0x1A)))))
+    KNX.telegram_received(Telegram(destination_address=address, payload=GroupValueWrite(DPTArray((0x0C,)))))
+    KNX.telegram_received(Telegram(destination_address=GroupAddress("31/7/255"), payload=GroupValueWrite(DPTArray((1,)))))
+
+    assert collecting.telegrams_received.values == {"brightness": 2, "other": 1}
+    assert collecting.decode_errors.values == {"9": 1}
+    text = collecting.render()
+    assert 'staerium_decode_errors_total{dpt="9"} 1' in text
+    assert 'staerium_telegrams_received_total{class="brightness"} 2' in text
+
+
+def test_disabled_metrics_collect_nothing() -> None:
+    """With the endpoint off, the hot paths leave every metric untouched."""
+
+    metrics.reset()
+    sector = next(s for s in configuration.sectors if s["UseBrightness"])
+    KNX.build_dispatch_table()
+    KNX.telegram_received(
+        Telegram(destination_address=GroupAddress(sector["BrightnessAddress"]), payload=GroupValueWrite(DPTArray((0x0C,))))
+    )
+    assert not metrics.enabled
+    assert not metrics.telegrams_received.values and not metrics.decode_errors.values
+
+
+def test_endpoint_serves_prometheus_text() -> None:
+    """GET /metrics returns registered gauges; other paths are 404."""
+
+    async def fetch(port: int, path: str) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def scenario() -> None:
+        metrics.gauge("staerium_test_gauge", "Test gauge.", lambda: 7)
+        server = await asyncio.start_server(metrics._handle_request, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            ok = await fetch(port, "/metrics")
+            missing = await fetch(port, "/other")
+        assert ok.startswith(b"HTTP/1.1 200 OK")
+        assert b"\nstaerium_test_gauge 7\n" in ok
+        assert b"staerium_event_loop_lag_seconds_count" in ok
+        assert missing.startswith(b"HTTP/1.1 404")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        metrics._gauges[:] = [entry for entry in metrics._gauges if entry[0] != "staerium_test_gauge"]
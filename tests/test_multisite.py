@@ -0,0 +1,126 @@
+"""Tests for multi-site mode and the shared ephemeris cache."""
+
+from __future__ import annotations
+
+import datetime
+import json
+import time
+from pathlib import Path
+
+import pytest
+import pytz
+from pvlib.location import Location
+
+from myapp import clock, configuration, multisite, sun
+from myapp.ephemeris import EphemerisTable
+
+
+CONFIG = Path(multisite.__file__).with_name("config.xml")
+
+
+def _site(directory: Path, name: str, latitude: float, option: str = "BusTime") -> Path:
+    text = CONFIG.read_text(encoding="utf-8").replace("<AzElOption>BusTime</AzElOption>", f"<AzElOption>{option}</AzElOption>")
+    path = directory / f"{name}.xml"
+    path.write_text(text.replace("<Latitude>47.377672</Latitude>", f"<Latitude>{latitude}</Latitude>"), encoding="utf-8")
+    return path
+
+
+def test_discover_expands_directories_and_rejects_duplicates(tmp_path) -> None:
+    """Site names come from the file stems and must be unique."""
+
+    _site(tmp_path, "north", 47.0)
+    _site(tmp_path, "south", 46.0)
+    (tmp_path / "notes.txt").write_text("ignored")
+    sites = multisite.discover([tmp_path])
+    assert list(sites) == ["north", "south"]
+
+    with pytest.raises(ValueError):
+        multisite.discover([tmp_path, tmp_path / "north.xml"])
+
+
+def test_sites_run_isolated_in_forked_processes(tmp_path) -> None:
+    """Each site process loads its own configuration into the engine modules."""
+
+    sites = multisite.discover([_site(tmp_path, "north", 47.5), _site(tmp_path, "south", 45.25)])
+    out = tmp_path / "out"
+    out.mkdir()
+
+    def target(name: str, config: Path, index: int) -> None:
+        multisite.load_site(name, config, index)
+        from myapp import SectorRunner, configuration, sun
+
+        (out / f"{name}.json").write_text(
+            json.dumps(
+                {
+                    "latitude": configuration.latitude,
+                    "site": sun._solar_site().latitude,
+                    "sectors": len(SectorRunner.sectors),
+                    "shared": isinstance(sun.shared_position, multisite.SunSlot),
+                }
+            )
+        )
+
+    supervisor = multisite.Supervisor(sites, target)
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 60
+        while len(list(out.iterdir())) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        supervisor.stop()
+
+    results = {path.stem: json.loads(path.read_text()) for path in out.iterdir()}
+    assert results["north"]["latitude"] == results["north"]["site"] == 47.5
+    assert results["south"]["latitude"] == results["south"]["site"] == 45.25
+    assert results["north"]["sectors"] == results["south"]["sectors"] > 0
+    assert results["north"]["shared"] and results["south"]["shared"]
+
+
+def test_ephemeris_cache_is_shared_by_identical_sites(tmp_path, monkeypatch) -> None:
+    """The second site with the same coordinates memory-maps the first one's table."""
+
+    site = Location(47.377672, 8.518703, tz="Europe/Zurich")
+    day = datetime.date(2024, 6, 21)
+    built = EphemerisTable.cached(site, day, 300.0, tmp_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("table was recomputed")
+
+    monkeypatch.setattr(EphemerisTable, "build", fail)
+    shared = EphemerisTable.cached(Location(47.377672, 8.518703, tz="Europe/Zurich"), day, 300.0, tmp_path)
+    timestamp = built.start + 12.5 * 3600
+    assert shared.lookup(timestamp) == built.lookup(timestamp)
+    assert shared.elevation.base is not None  # backed by the memory-mapped file
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+
+
+def test_sites_with_identical_coordinates_share_the_sun_position(tmp_path, monkeypatch) -> None:
+    """One computation per second and coordinate group, whatever the solar settings of the sites."""
+
+    sites = multisite.discover(
+        [_site(tmp_path, "a", 47.5), _site(tmp_path, "b", 47.5), _site(tmp_path, "c", 46.0), _site(tmp_path, "d", 47.5, "BusAzEl")]
+    )
+    assert list(multisite.sun_groups(sites).values()) == [["a", "b"], ["c"]]
+
+    zone = pytz.timezone(sun.tz)
+    virtual = clock.VirtualClock(zone.localize(datetime.datetime(2024, 6, 21, 12, 0, 0, 300000)))
+    monkeypatch.setattr(clock, "_clock", virtual)
+    monkeypatch.setattr(configuration, "az_el_option", "Internet")
+    monkeypatch.setattr(configuration, "solar_ephemeris", False)
+    positions = multisite.SunPositions(1)
+    monkeypatch.setattr(sun, "shared_position", positions.slot(0))
+    computed = []
+    original = sun._position
+    monkeypatch.setattr(sun, "_position", lambda time: computed.append(time) or original(time))
+
+    sun.calculate_solar_position()  # first site of the group in this second
+    first = (sun.current_azimuth, sun.current_elevation)
+    virtual.advance(0.5)
+    sun.calculate_solar_position()  # another site, same second
+    assert (sun.current_azimuth, sun.current_elevation) == first
+    assert computed == [zone.localize(datetime.datetime(2024, 6, 21, 12, 0, 0))]
+    assert first == pytest.approx(original(computed[0]))
+
+    virtual.advance(1.0)
+    sun.calculate_solar_position()
+    assert len(computed) == 2 and positions.stats(0) == (2, 1)
@@ -0,0 +1,231 @@
+"""Tests for the coalescing outbound write queue."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from xknx import XKNX
+from xknx.devices import NumericValue, Switch
+
+from myapp.outbound import PRIORITY_LOUVRE, PRIORITY_PROGRAM, OutboundQueue
+
+
+class SlowDevice:
+    """Device stub whose writes block until released."""
+
+    def __init__(self, name: str, address: str | None, log: list, gate: asyncio.Event) -> None:
+        self.name = name
+        self._addresses = [] if address is None else [_Address(address)]
+        self.log = log
+        self.gate = gate
+        self.active = 0
+        self.peak = 0
+
+    def group_addresses(self):
+        return self._addresses
+
+    async def set(self, value) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.log.append(("start", self.name, value))
+        await self.gate.wait()
+        self.log.append(("done", self.name, value))
+        self.active -= 1
+
+
+class _Address:
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+
+
+def _drain(xknx: XKNX) -> list[tuple[str, object]]:
+    telegrams = []
+    while not xknx.telegrams.empty():
+        telegram = xknx.telegrams.get_nowait()
+        telegrams.append((str(telegram.destination_address), telegram.payload.value.value))
+    return telegrams
+
+
+def test_superseded_writes_are_dropped() -> None:
+    """Only the newest pending value per group address reaches the bus."""
+
+    async def scenario() -> None:
+        xknx = XKNX()
+        louvre = NumericValue(xknx, "louvre", group_address="1/1/1", value_type=5)
+        shared = NumericValue(xknx, "louvre_2", group_address="1/1/1", value_type=5)
+        sun = Switch(xknx, "sun", group_address="1/1/2")
+        queue = OutboundQueue()
+
+        queue.submit(louvre, 10)
+        queue.submit(sun, True)
+        queue.submit(louvre, 20)
+        queue.submit(shared, 30)
+        assert queue.depth == 2
+
+        sender = asyncio.create_task(queue.run())
+        await asyncio.sleep(0.01)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+        sent = _drain(xknx)
+        assert sorted(sent) == [("1/1/1", (30,)), ("1/1/2", 1)]
+        assert queue.stats()["superseded"] == 2
+        assert queue.sent == 2 and queue.depth == 0
+
+    asyncio.run(scenario())
+
+
+def test_uncoalesced_writes_are_all_sent_in_order() -> None:
+    """``coalesce=False`` keeps every value for the address."""
+
+    async def scenario() -> None:
+        xknx = XKNX()
+        device = NumericValue(xknx, "value", group_address="2/0/1", value_type=5)
+        queue = OutboundQueue()
+        sender = asyncio.create_task(queue.run())
+        for value in (1, 2, 3):
+            queue.submit(device, value, coalesce=False)
+        await asyncio.sleep(0.01)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+        assert _drain(xknx) == [("2/0/1", (1,)), ("2/0/1", (2,)), ("2/0/1", (3,))]
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_is_bounded_and_addresses_never_overlap() -> None:
+    """A slow write holds its slot; other addresses proceed up to the bound."""
+
+    async def scenario() -> None:
+        log: list = []
+        gate = asyncio.Event()
+        devices = [SlowDevice(f"d{i}", f"3/0/{i}", log, gate) for i in range(5)]
+        queue = OutboundQueue(concurrency=2)
+        sender = asyncio.create_task(queue.run())
+
+        for device in devices:
+            queue.submit(device, 1)
+        await asyncio.sleep(0.01)
+        assert queue.in_flight == 2
+        assert queue.depth == 3
+
+        # d0 is still in flight, so its next value waits behind it.
+        queue.submit(devices[0], 2)
+        await asyncio.sleep(0.01)
+        assert queue.depth == 4
+        assert [entry for entry in log if entry[0] == "start"] == [("start", "d0", 1), ("start", "d1", 1)]
+
+        gate.set()
+        await asyncio.sleep(0.01)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+        first = log.index(("done", "d0", 1))
+        assert log.index(("start", "d0", 2)) > first
+        assert max(device.peak for device in devices) == 1
+        stats = queue.stats()
+        assert stats["sent"] == 6 and stats["depth"] == 0
+        assert 0 < stats["latency_mean"] <= stats["latency_max"]
+
+    asyncio.run(scenario())
+
+
+def test_priorities_and_token_bucket() -> None:
+    """Sun writes jump the queue, the budget paces sends and program writes survive."""
+
+    async def scenario() -> None:
+        xknx = XKNX()
+        queue = OutboundQueue(rate=50, burst=1)
+        program = NumericValue(xknx, "program", group_address="4/0/1", value_type=5)
+        louvre = NumericValue(xknx, "louvre", group_address="4/0/2", value_type=5)
+        sun = Switch(xknx, "sun", group_address="4/0/3")
+
+        for value in (1, 2):
+            queue.submit(program, value, priority=PRIORITY_PROGRAM, coalesce=False)
+        queue.submit(louvre, 10, priority=PRIORITY_LOUVRE)
+        queue.submit(louvre, 11, priority=PRIORITY_LOUVRE)
+        queue.submit(sun, True)
+        assert queue.backlog == {"sun": 1, "louvre": 1, "program": 2}
+
+        started = time.monotonic()
+        sender = asyncio.create_task(queue.run())
+        while queue.depth or queue.in_flight:
+            await asyncio.sleep(0.005)
+        elapsed = time.monotonic() - started
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+        assert _drain(xknx) == [("4/0/3", 1), ("4/0/2", (11,)), ("4/0/1", (1,)), ("4/0/1", (2,))]
+        # One token up front, then 20 ms per telegram.
+        assert elapsed >= 0.055
+        assert queue.stats()["send_rate"] == pytest.approx(0.4)
+
+    asyncio.run(scenario())
+
+
+def test_writes_behind_an_in_flight_address_are_parked_and_readmitted_in_order() -> None:
+    """Picking a write never rescans the backlog; parked writes keep their per-address order."""
+
+    async def scenario() -> None:
+        log: list = []
+        gate = asyncio.Event()
+        busy = SlowDevice("busy", "5/0/0", log, gate)
+        queue = OutboundQueue(concurrency=4)
+        sender = asyncio.create_task(queue.run())
+        queue.submit(busy, 0)
+        await asyncio.sleep(0.01)
+
+        for value in range(1, 1001):
+            queue.submit(busy, value, priority=PRIORITY_PROGRAM, coalesce=False)
+        queue.submit(busy, "urgent", coalesce=False)
+        other = SlowDevice("other", "5/0/1", log, gate)
+        queue.submit(other, 1)
+        await asyncio.sleep(0.01)
+        # Every write to the busy address was moved aside once; the other address went ahead.
+        assert [entry for entry in log if entry[0] == "start"] == [("start", "busy", 0), ("start", "other", 1)]
+        assert len(queue._parked["5/0/0"]) == 1001 and not any(queue._queues)
+
+        gate.set()
+        while queue.depth or queue.in_flight:
+            await asyncio.sleep(0.005)
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+        values = [value for kind, name, value in log if kind == "start" and name == "busy"]
+        assert values == [0, "urgent", *range(1, 1001)]
+        assert busy.peak == 1 and queue._parked == {} and queue.sent == 1003
+
+    asyncio.run(scenario())
+
+
+def test_a_token_is_refunded_when_no_write_can_be_taken() -> None:
+    """A token acquired for a write that is no longer sendable is not lost."""
+
+    async def scenario() -> None:
+        xknx = XKNX()
+        queue = OutboundQueue(rate=5, burst=1)
+        take = queue._take
+        misses = []
+
+        def take_after_a_miss():
+            if not misses:
+                misses.append(True)
+                return None
+            return take()
+
+        queue._take = take_after_a_miss
+        queue.submit(Switch(xknx, "sun", group_address="4/0/3"), True)
+        started = time.monotonic()
+        sender = asyncio.create_task(queue.run())
+        while not queue.sent:
+            await asyncio.sleep(0.005)
+        elapsed = time.monotonic() - started
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+        assert misses and elapsed < 0.1  # a lost token would delay the send by 200 ms
+
+    asyncio.run(scenario())
@@ -0,0 +1,189 @@
+"""Tests for hot reloading the configuration."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+from pathlib import Path
+
+import pytest
+from xknx import XKNX
+
+import myapp
+from myapp import KNX, SectorRunner, TimeProgramRunner, configuration, reloader, sun
+from myapp.app import Application
+from myapp.config_loader import load_config
+from myapp.outbound import OutboundQueue
+from myapp.sector_state import SectorState
+
+
+CONFIG = Path(myapp.__file__).with_name("config.xml")
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """The sector engine and time programs on an unconnected xKNX, with restorable globals."""
+
+    monkeypatch.setattr(configuration, "az_el_option", "BusAzEl")
+    monkeypatch.setattr(configuration, "sectors", load_config(CONFIG, cache=False)["Sectors"])
+    monkeypatch.setattr(configuration, "time_programs", configuration.time_programs)
+    monkeypatch.setattr(sun, "current_azimuth", 180.0)
+    monkeypatch.setattr(sun, "current_elevation", 40.0)
+    monkeypatch.setattr(SectorRunner, "sectors", {s["GUID"]: SectorState() for s in configuration.sectors})
+    monkeypatch.setattr(SectorRunner, "xknx", XKNX())
+    monkeypatch.setattr(SectorRunner, "outbound_queue", OutboundQueue())
+    monkeypatch.setattr(SectorRunner, "_sectors_by_guid", {})
+    monkeypatch.setattr(SectorRunner, "_geometry", None)
+    monkeypatch.setattr(KNX, "_dispatch", None)
+    application = Application(CONFIG)
+    application.load()
+    monkeypatch.setattr(reloader, "application", application)
+    return SectorRunner
+
+
+def _sent(xknx: XKNX) -> list[str]:
+    telegrams = []
+    while not xknx.telegrams.empty():
+        telegrams.append(str(xknx.telegrams.get_nowait().destination_address))
+    return telegrams
+
+
+def test_reload_applies_only_the_sector_diff(engine) -> None:
+    """Unchanged sectors keep their state and stay silent; added ones start, removed ones go."""
+
+    first, second = configuration.sectors
+
+    async def scenario() -> None:
+        tasks = [asyncio.create_task(engine.outbound_queue.run()), asyncio.create_task(engine.run())]
+        await asyncio.sleep(0.05)
+        engine.sectors[first["GUID"]]["Mode"] = "On"
+        engine.notify(first["GUID"])
+        await asyncio.sleep(0.05)
+        _sent(engine.xknx)
+
+        config = load_config(CONFIG, cache=False)
+        unchanged, edited = config["Sectors"]
+        edited["BrightnessUpperThreshold"] += 1000
+        added = dict(edited, GUID="9d0c5c35-0000-4000-8000-000000000001", Name="Sektor 3", SunBoolAddress="7/7/1", HeightAddress="7/7/2", LouvreAngleAddress="7/7/3")
+        config["Sectors"].append(added)
+        summary = reloader.reload(config)
+        await asyncio.sleep(0.05)
+
+        assert summary["sectors_added"] == [added["GUID"]]
+        assert summary["sectors_changed"] == [second["GUID"]] and summary["sectors_removed"] == []
+        assert summary["restart_required"] == []
+        assert _sent(engine.xknx) == ["7/7/1"]  # only the new sector announces its state
+        assert engine.sectors[first["GUID"]]["Mode"] == "On"
+        assert configuration.sectors[0] is first
+        assert configuration.sectors[1]["BrightnessUpperThreshold"] == edited["BrightnessUpperThreshold"]
+        assert KNX._dispatch is not None and any(
+            args[0] is configuration.sectors[1] for handlers in KNX._dispatch.values() for _, _, args in handlers if args
+        )
+
+        config = load_config(CONFIG, cache=False)
+        config["Sectors"] = config["Sectors"][1:]
+        config["Latitude"] = 10.0
+        summary = reloader.reload(config)
+        await asyncio.sleep(0.05)
+        assert summary["sectors_removed"] == [first["GUID"], added["GUID"]] and summary["sectors_added"] == []
+        assert summary["restart_required"] == ["Latitude"]
+        assert first["GUID"] not in engine.sectors
+        assert f"{first['GUID']}_height" not in engine.xknx.devices
+        assert _sent(engine.xknx) == []
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_reload_reschedules_only_edited_time_program_commands(engine) -> None:
+    """Unchanged commands keep their schedule entry; edited and removed ones are replaced."""
+
+    async def scenario() -> None:
+        task = asyncio.create_task(TimeProgramRunner.run())
+        await asyncio.sleep(0.05)
+        before = {entry["key"]: entry for entry in TimeProgramRunner._schedule.entries}
+        assert len(before) == 6
+
+        programs = load_config(CONFIG, cache=False)["TimePrograms"]
+        programs[0]["Commands"][1]["Time"] = "23:59"
+        del programs[1]
+        assert TimeProgramRunner.reconfigure(programs) == (1, 4)
+
+        after = {entry["key"]: entry for entry in TimeProgramRunner._schedule.entries}
+        assert set(after) == {key for key in before if key[0] == programs[0]["GUID"]}
+        changed = (programs[0]["GUID"], 1)
+        assert (after[changed]["hour"], after[changed]["minute"]) == (23, 59)
+        assert all(after[key] is before[key] for key in after if key != changed)
+        assert len(TimeProgramRunner._schedule) == 3
+        assert sum(1 for device in engine.xknx.devices if device.name.startswith("time_program_")) == 3
+
+        await asyncio.sleep(0.05)  # let the scheduler pick up the new head before stopping it
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_time_programs_without_guid_are_matched_by_position_and_stop_with_the_scheduler(engine) -> None:
+    """Same-named programs without a GUID keep their own entries; a stopped scheduler ignores reloads."""
+
+    command = {"Type": "1bit", "Time": "08:00", "GroupAddress": "1/1/1", "Value": 1}
+    programs = [{"Name": "Blinds", "Commands": [dict(command)]}, {"Name": "Blinds", "Commands": [dict(command, Time="20:00")]}]
+    configuration.time_programs = programs
+
+    async def scenario() -> None:
+        task = asyncio.create_task(TimeProgramRunner.run())
+        await asyncio.sleep(0.05)
+        before = list(TimeProgramRunner._schedule.entries)
+        assert [entry["key"] for entry in before] == [(0, 0), (1, 0)]
+
+        assert TimeProgramRunner.reconfigure([dict(program) for program in programs]) == (0, 0)
+        assert all(after is entry for after, entry in zip(TimeProgramRunner._schedule.entries, before))
+
+        await asyncio.sleep(0.05)  # let the scheduler pick up the new head before stopping it
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert TimeProgramRunner._schedule is None
+        assert TimeProgramRunner.reconfigure(programs[:1]) == (0, 0)
+        assert len(before) == 2 and configuration.time_programs == programs[:1]
+
+    asyncio.run(scenario())
+
+
+def test_watcher_reloads_on_file_change_and_sighup(tmp_path, monkeypatch) -> None:
+    """A modified file or SIGHUP triggers a reload; a broken file keeps the running config."""
+
+    path = tmp_path / "config.xml"
+    path.write_bytes(CONFIG.read_bytes())
+    monkeypatch.setattr(configuration, "config_watch_interval", 0.02)
+    monkeypatch.setenv("CONFIG_CACHE_DIR", "")
+    reloaded: list[float] = []
+    monkeypatch.setattr(reloader, "reload", lambda config: reloaded.append(config["Latitude"]))
+
+    async def scenario() -> None:
+        task = asyncio.create_task(reloader.run(path))
+        await asyncio.sleep(0.05)
+        assert reloaded == []
+
+        path.write_text(CONFIG.read_text(encoding="utf-8").replace("<Latitude>47.377672</Latitude>", "<Latitude>46.5</Latitude>"), encoding="utf-8")
+        await asyncio.sleep(0.2)
+        assert reloaded == [46.5]
+
+        path.write_text("<Konfiguration><TimeAddress>32/0/0</TimeAddress></Konfiguration>", encoding="utf-8")
+        await asyncio.sleep(0.2)
+        assert reloaded == [46.5]
+
+        path.write_bytes(CONFIG.read_bytes())
+        await asyncio.sleep(0.2)
+        os.kill(os.getpid(), signal.SIGHUP)
+        await asyncio.sleep(0.2)
+        assert reloaded == [46.5, 47.377672, 47.377672]
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,124 @@
+"""Tests for the event-driven sector engine."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from xknx import XKNX
+
+import myapp.SectorRunner as SectorRunner
+from myapp.outbound import OutboundQueue
+from myapp.sector_state import SectorState
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Run the sector engine against an unconnected xKNX instance."""
+
+    monkeypatch.setattr(SectorRunner.configuration, "az_el_option", "BusAzEl")
+    monkeypatch.setattr(SectorRunner.sun, "current_azimuth", 180.0)
+    monkeypatch.setattr(SectorRunner.sun, "current_elevation", 40.0)
+    for guid in SectorRunner.sectors:
+        monkeypatch.setitem(SectorRunner.sectors, guid, SectorState())
+    monkeypatch.setattr(SectorRunner, "xknx", XKNX())
+    monkeypatch.setattr(SectorRunner, "loop_count", 0)
+    monkeypatch.setattr(SectorRunner, "outbound_queue", OutboundQueue())
+    return SectorRunner
+
+
+def _start(engine) -> list[asyncio.Task[None]]:
+    return [asyncio.create_task(engine.outbound_queue.run()), asyncio.create_task(engine.run())]
+
+
+async def _stop(tasks: list[asyncio.Task[None]]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _sent(xknx: XKNX) -> list[str]:
+    telegrams = []
+    while not xknx.telegrams.empty():
+        telegrams.append(str(xknx.telegrams.get_nowait().destination_address))
+    return telegrams
+
+
+def test_engine_idles_until_an_input_changes(engine) -> None:
+    """Only the startup pass runs while nothing changes."""
+
+    async def scenario() -> None:
+        tasks = _start(engine)
+        await asyncio.sleep(0.05)
+        assert engine.loop_count == 1
+        assert _sent(engine.xknx) == [s["SunBoolAddress"] for s in engine.configuration.sectors]
+
+        await asyncio.sleep(0.2)
+        assert engine.loop_count == 1
+        assert _sent(engine.xknx) == []
+
+        await _stop(tasks)
+
+    asyncio.run(scenario())
+
+
+def test_stopping_the_engine_stops_the_rate_report(engine) -> None:
+    """The 10 s pass-rate report runs on the loop and ends with the engine; no thread is left behind."""
+
+    threads = threading.active_count()
+
+    async def scenario() -> None:
+        tasks = _start(engine)
+        await asyncio.sleep(0.05)
+        reporters = [task for task in asyncio.all_tasks() if task.get_coro().__name__ == "_lps_reporter"]
+        assert len(reporters) == 1
+        await _stop(tasks)
+        await asyncio.sleep(0)
+        assert reporters[0].cancelled()
+
+    asyncio.run(scenario())
+    assert threading.active_count() == threads
+
+
+def test_mode_change_reevaluates_sector(engine) -> None:
+    """Forcing a sector on publishes sun state and height once."""
+
+    sector = next(s for s in engine.configuration.sectors if s["Name"] == "Sektor 2")
+
+    async def scenario() -> None:
+        tasks = _start(engine)
+        await asyncio.sleep(0.05)
+        _sent(engine.xknx)
+
+        engine.sectors[sector["GUID"]]["Mode"] = "On"
+        engine.notify(sector["GUID"])
+        await asyncio.sleep(0.05)
+        assert engine.loop_count == 2
+        assert _sent(engine.xknx) == [sector["SunBoolAddress"], sector["HeightAddress"]]
+
+        engine.notify(sector["GUID"])
+        await asyncio.sleep(0.05)
+        assert _sent(engine.xknx) == []
+
+        await _stop(tasks)
+
+    asyncio.run(scenario())
+
+
+def test_notify_from_other_thread_wakes_engine(engine) -> None:
+    """Hysteresis timers fire on worker threads and must still wake the engine."""
+
+    sector = engine.configuration.sectors[0]
+
+    async def scenario() -> None:
+        tasks = _start(engine)
+        await asyncio.sleep(0.05)
+
+        await asyncio.to_thread(engine.set_hysteresis_state, sector["GUID"], "brightness", 4)
+        await asyncio.sleep(0.05)
+        assert engine.loop_count == 2
+
+        await _stop(tasks)
+
+    asyncio.run(scenario())
@@ -0,0 +1,58 @@
+"""Tests for the slotted per-sector runtime state."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+
+import pytest
+
+from myapp import SectorRunner, hysteresis
+from myapp.sector_state import DEFAULTS, SectorState
+from myapp.timers import TimerHeap
+
+
+def test_fields_start_at_their_defaults_and_behave_like_the_former_dict() -> None:
+    """Defaults are readable directly, ``in``/``pop`` see only changed fields and unknown keys are rejected."""
+
+    state = SectorState(Mode="On")
+    assert state.brightness_state == 1 and state.angle_bytes_sent == 180 and state.sun_state is None
+    assert list(state) == ["Mode"] and "Brightness" not in state
+    assert state == {"Mode": "On"} and state != {"Mode": "Auto"} and SectorState() == {"Mode": "Auto"}
+
+    state["Brightness"] = 12000.0
+    assert state.get("Brightness") == 12000.0 and "Brightness" in state
+    assert state.pop("Brightness") == 12000.0 and state.Brightness is None
+    assert state.pop("Brightness", "gone") == "gone"
+    with pytest.raises(KeyError):
+        state["brightness"] = 1
+    with pytest.raises(AttributeError):
+        state.extra = 1
+    assert not hasattr(state, "__dict__")
+
+    # A fully populated record is far smaller than the dict it replaces.
+    values = dict(DEFAULTS, Mode="On", Brightness=1.0, Irradiance=2.0, sun_state=True, angle_deg=30.0)
+    assert sys.getsizeof(SectorState(**values)) < sys.getsizeof(values) / 2
+    assert not hasattr(SectorRunner, "sectors_lock")
+
+
+def test_hysteresis_runs_on_a_sector_state() -> None:
+    """The hysteresis state machine stores stages and timers in the record's fields."""
+
+    sector = {
+        "GUID": "sector",
+        "BrightnessUpperThreshold": 1000,
+        "BrightnessLowerThreshold": 500,
+        "BrightnessUpperDelay": 60,
+        "BrightnessLowerDelay": 60,
+    }
+    state = SectorState()
+
+    async def scenario() -> None:
+        heap = TimerHeap()
+        assert hysteresis.apply(sector, state, "brightness", 2000, heap, lambda *args: None)
+        assert state.brightness_state == 3 and state.brightness_timer is not None and heap.pending == 1
+        assert hysteresis.apply(sector, state, "brightness", 100, heap, lambda *args: None)
+        assert state.brightness_state == 1 and state.brightness_timer is None and heap.pending == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+"""Tests for sector evaluation sharded across worker processes."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from xknx import XKNX
+from xknx.dpt import DPTBinary
+from xknx.telegram import GroupAddress, Telegram
+from xknx.telegram.apci import GroupValueWrite
+
+from myapp import KNX, SectorRunner, configuration, shards, sun
+from myapp.outbound import OutboundQueue
+from myapp.sector_state import SectorState
+
+
+def test_partition_is_contiguous_and_balanced() -> None:
+    """Every sector lands in exactly one slice; slice sizes differ by at most one."""
+
+    sectors = [{"GUID": str(index)} for index in range(10)]
+    slices = shards.partition(sectors, 3)
+    assert [len(part) for part in slices] == [4, 3, 3]
+    assert [sector for part in slices for sector in part] == sectors
+    assert len(shards.partition(sectors[:2], 8)) == 2
+
+
+@pytest.fixture
+def sharded(monkeypatch):
+    """Two workers forked from an engine set up like the single-process tests."""
+
+    monkeypatch.setattr(configuration, "az_el_option", "BusAzEl")
+    monkeypatch.setattr(sun, "current_azimuth", 180.0)
+    monkeypatch.setattr(sun, "current_elevation", 40.0)
+    for guid in SectorRunner.sectors:
+        monkeypatch.setitem(SectorRunner.sectors, guid, SectorState())
+    monkeypatch.setattr(SectorRunner, "xknx", XKNX())
+    monkeypatch.setattr(SectorRunner, "outbound_queue", OutboundQueue())
+    shards.start(2)
+    yield SectorRunner
+    shards.stop()
+
+
+async def _until_idle(timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not shards.idle() or SectorRunner.outbound_queue.depth or SectorRunner.outbound_queue.in_flight:
+        assert time.monotonic() < deadline, shards.stats()
+        await asyncio.sleep(0.01)
+
+
+def _sent(xknx: XKNX) -> list[tuple[str, object]]:
+    telegrams = []
+    while not xknx.telegrams.empty():
+        telegram = xknx.telegrams.get_nowait()
+        telegrams.append((str(telegram.destination_address), telegram.payload.value))
+    return telegrams
+
+
+def test_workers_evaluate_their_shards_and_receive_routed_telegrams(sharded) -> None:
+    """Writes come back from the workers; mode telegrams and sun updates reach the owners."""
+
+    sectors = configuration.sectors
+    sector = next(s for s in sectors if s["Name"] == "Sektor 2")
+
+    async def scenario() -> None:
+        tasks = [asyncio.create_task(sharded.outbound_queue.run()), asyncio.create_task(shards.run())]
+        await _until_idle()
+        assert sorted(address for address, _ in _sent(sharded.xknx)) == sorted(s["SunBoolAddress"] for s in sectors)
+        assert sum(shards.stats()["evaluated"]) == len(sectors)
+
+        KNX.telegram_received(
+            Telegram(destination_address=GroupAddress(sector["OnAutoAddress"]), payload=GroupValueWrite(DPTBinary(0)))
+        )
+        await _until_idle()
+        assert [address for address, _ in _sent(sharded.xknx)] == [sector["SunBoolAddress"], sector["HeightAddress"]]
+
+        evaluated = sum(shards.stats()["evaluated"])
+        sun.current_elevation = 30.0
+        SectorRunner.notify()
+        await asyncio.wait_for(shards.wait_idle(), 20.0)
+        assert sum(shards.stats()["evaluated"]) == evaluated + len(sectors)
+        assert all(cpu > 0 for cpu in shards.stats()["cpu_seconds"])
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_sun_read_gives_up_while_the_writer_holds_the_block(monkeypatch) -> None:
+    """An odd sequence (write in progress) is retried a bounded number of times, then skipped."""
+
+    monkeypatch.setattr(shards, "_sun_view", np.array([3.0, 90.0, 10.0]))
+    begin = time.monotonic()
+    assert shards._read_sun() is None
+    assert time.monotonic() - begin < 1.0
+
+    shards._sun_view[0] = 4.0
+    assert shards._read_sun() == (90.0, 10.0)
@@ -0,0 +1,85 @@
+"""Tests for the virtual clock and the simulation mode."""
+
+from __future__ import annotations
+
+import datetime
+import io
+
+import pytest
+import pytz
+
+from myapp import SectorRunner, clock, configuration, simulate, sun
+from myapp.sector_state import SectorState
+
+
+TZ = pytz.timezone(sun.tz)
+
+
+@pytest.fixture
+def engine_state(monkeypatch):
+    """Keep the simulation's engine state changes local to the test."""
+
+    for guid in SectorRunner.sectors:
+        monkeypatch.setitem(SectorRunner.sectors, guid, SectorState())
+    monkeypatch.setattr(SectorRunner, "louvre_tables", {})
+    return SectorRunner
+
+
+def test_virtual_clock_drives_the_sun_position(monkeypatch) -> None:
+    """sun.calculate_solar_position reads the injected clock, not the system time."""
+
+    monkeypatch.setattr(configuration, "az_el_option", "Internet")
+    monkeypatch.setattr(configuration, "solar_ephemeris", False)
+    virtual = clock.VirtualClock(TZ.localize(datetime.datetime(2024, 6, 21, 13, 30)))
+    clock.set_clock(virtual)
+    try:
+        assert clock.now(TZ).hour == 13
+        sun.calculate_solar_position()
+        assert 170 < sun.current_azimuth < 190 and sun.current_elevation > 60
+
+        virtual.advance(12 * 3600)
+        assert clock.now(TZ) == TZ.localize(datetime.datetime(2024, 6, 22, 1, 30))
+        sun.calculate_solar_position()
+        assert sun.current_elevation < 0
+    finally:
+        clock.set_clock(None)
+    assert isinstance(clock.get_clock(), clock.SystemClock)
+
+
+def test_simulated_day_produces_sector_and_program_timeline(engine_state) -> None:
+    """A clear summer day switches sectors on and off and fires the time programs on time."""
+
+    start = TZ.localize(datetime.datetime(2024, 6, 21))
+    queue = SectorRunner.outbound_queue
+    writes = simulate.simulate(start, start + datetime.timedelta(days=1))
+
+    assert clock.get_clock().__class__ is clock.SystemClock
+    assert SectorRunner.outbound_queue is queue
+    assert configuration.az_el_option == "BusTime"
+
+    grouped = simulate.timeline(writes)
+    for sector in configuration.sectors:
+        states = [write.value for write in grouped[sector["Name"]] if write.kind == "sun"]
+        assert states[0] is False and True in states
+        assert all(previous != value for previous, value in zip(states, states[1:]))
+        assert [w.time for w in grouped[sector["Name"]]] == sorted(w.time for w in grouped[sector["Name"]])
+
+    programs = [write for write in writes if write.kind == "program"]
+    assert programs and all(write.time.strftime("%H:%M:%S") == "20:43:00" for write in programs)
+
+    stream = io.StringIO()
+    simulate.write_csv(writes, stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "time,sector,kind,address,value"
+    assert len(lines) == len(writes) + 1
+
+
+def test_non_positive_step_is_rejected(engine_state) -> None:
+    """A step that would never advance the simulation fails fast instead of looping forever."""
+
+    start = TZ.localize(datetime.datetime(2024, 6, 21))
+    for step in (0, -60.0, float("nan")):
+        with pytest.raises(ValueError):
+            simulate.simulate(start, start + datetime.timedelta(days=1), step)
+    with pytest.raises(SystemExit):
+        simulate.main(["--start", "2024-06-21", "--step", "0"])
@@ -0,0 +1,107 @@
+"""Tests for sector state snapshots and warm restarts."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import json
+
+import pytest
+from xknx import XKNX
+
+from myapp import SectorRunner, configuration, hysteresis, snapshot, sun
+from myapp.outbound import OutboundQueue
+from myapp.sector_state import SectorState
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Fresh sector state on an unconnected xKNX instance."""
+
+    monkeypatch.setattr(configuration, "az_el_option", "BusTime")
+    monkeypatch.setattr(sun, "current_azimuth", 180.0)
+    monkeypatch.setattr(sun, "current_elevation", 40.0)
+    monkeypatch.setattr(sun, "timedelta", datetime.timedelta(0))
+    monkeypatch.setattr(sun, "calculate_solar_position", lambda: None)
+    monkeypatch.setattr(SectorRunner, "sectors", {s["GUID"]: SectorState() for s in configuration.sectors})
+    monkeypatch.setattr(SectorRunner, "hysteresis_timers", SectorRunner.timers.TimerHeap())
+    monkeypatch.setattr(SectorRunner, "xknx", XKNX())
+    monkeypatch.setattr(SectorRunner, "outbound_queue", OutboundQueue())
+    monkeypatch.setattr(SectorRunner, "_sectors_by_guid", {})
+    monkeypatch.setattr(SectorRunner, "_geometry", None)
+    return SectorRunner
+
+
+def _sent(xknx: XKNX) -> list[str]:
+    telegrams = []
+    while not xknx.telegrams.empty():
+        telegrams.append(str(xknx.telegrams.get_nowait().destination_address))
+    return telegrams
+
+
+def test_snapshot_round_trip_keeps_modes_and_running_delays(engine, tmp_path) -> None:
+    """Mode, hysteresis stage, remaining delay and bus time offset survive a save/restore."""
+
+    first, second = configuration.sectors
+    path = tmp_path / "state" / "state.json"
+
+    async def save() -> None:
+        state = engine.sectors[first["GUID"]]
+        state["Mode"] = "Off"
+        # Above the upper threshold: stage 3 (rising) with the upper delay running.
+        value = first["BrightnessUpperThreshold"] + 1
+        hysteresis.apply(first, state, "brightness", value, engine.hysteresis_timers, engine.set_hysteresis_state)
+        sun.timedelta = datetime.timedelta(seconds=-90)
+        snapshot.save(path)
+
+    asyncio.run(save())
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["bus_time_offset"] == -90
+    assert saved["sectors"][first["GUID"]]["brightness_state"] == 3
+    assert list(path.parent.iterdir()) == [path]  # no temporary files left behind
+
+    async def restore() -> None:
+        engine.sectors[first["GUID"]] = SectorState()
+        sun.timedelta = datetime.timedelta(0)
+        assert snapshot.restore_file(path) == 2
+        state = engine.sectors[first["GUID"]]
+        assert state["Mode"] == "Off" and state["brightness_state"] == 3
+        assert engine.sectors[second["GUID"]] == {"Mode": "Auto"}
+        assert sun.timedelta == datetime.timedelta(seconds=-90)
+        timer = state["brightness_timer"]
+        assert abs(engine.hysteresis_timers.remaining(timer) - first["BrightnessUpperDelay"]) <= 1.5
+
+    asyncio.run(restore())
+
+
+def test_warm_start_sends_only_changed_outputs(engine, tmp_path) -> None:
+    """After a restore the startup pass is silent unless an output actually changes."""
+
+    first, second = configuration.sectors
+    path = tmp_path / "state.json"
+
+    async def run_engine(seconds: float) -> list[str]:
+        tasks = [asyncio.create_task(engine.outbound_queue.run()), asyncio.create_task(engine.run())]
+        await asyncio.sleep(seconds)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return _sent(engine.xknx)
+
+    assert sorted(asyncio.run(run_engine(0.05))) == sorted(s["SunBoolAddress"] for s in configuration.sectors)
+    engine.sectors[second["GUID"]]["Mode"] = "On"
+
+    async def save() -> None:
+        task = asyncio.create_task(snapshot.run(path, 3600))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(save())
+
+    for guid in engine.sectors:
+        engine.sectors[guid] = SectorState()
+    engine.xknx = XKNX()
+    assert snapshot.restore_file(path) == 2
+    # Sector 1 is unchanged and stays silent; sector 2 was switched on after its last write.
+    assert asyncio.run(run_engine(0.05)) == [second["SunBoolAddress"], second["HeightAddress"]]
@@ -0,0 +1,89 @@
+"""Tests for the native solar position engine."""
+
+from __future__ import annotations
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from pvlib.location import Location
+
+import myapp.sun as sun
+from myapp import clock, configuration
+from myapp.ephemeris import EphemerisTable
+from myapp.solar import Site, solar_position
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, timezone",
+    [
+        (47.377672, 8.518703, "Europe/Zurich"),
+        (-33.9, 18.4, "Africa/Johannesburg"),
+        (69.6, 18.9, "Europe/Oslo"),
+        (1.3, 103.8, "Asia/Singapore"),
+        (40.7, -74.0, "America/New_York"),
+    ],
+)
+def test_native_engine_matches_pvlib_over_fifty_years(latitude, longitude, timezone) -> None:
+    """Elevation and the on-sky azimuth error stay within 0.01 degrees of pvlib for 2000-2050."""
+
+    site = Location(latitude, longitude, tz=timezone)
+    start = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+    end = datetime.datetime(2051, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+    timestamps = np.random.default_rng(1).uniform(start, end, 5000)
+    reference = site.get_solarposition(pd.DatetimeIndex(pd.to_datetime(timestamps, unit="s", utc=True)))
+    ref_azimuth = reference["azimuth"].to_numpy()
+    ref_elevation = reference["elevation"].to_numpy()
+
+    azimuth, elevation = solar_position(timestamps, latitude, longitude)
+
+    azimuth_error = np.abs((azimuth - ref_azimuth + 180.0) % 360.0 - 180.0)
+    assert np.abs(elevation - ref_elevation).max() < 0.01
+    assert (azimuth_error * np.cos(np.radians(ref_elevation))).max() < 0.01
+    assert azimuth_error[np.abs(ref_elevation) < 70].max() < 0.04
+
+    scalar = solar_position(float(timestamps[0]), latitude, longitude)
+    assert isinstance(scalar[0], float)
+    assert scalar == pytest.approx((azimuth[0], elevation[0]), abs=1e-9)
+
+
+def test_sun_uses_the_native_engine_when_selected_or_pvlib_is_missing(monkeypatch) -> None:
+    """``SolarEngine=native`` and a missing pvlib both route the calculation to myapp.solar."""
+
+    moment = pytz.timezone("Europe/Zurich").localize(datetime.datetime(2026, 6, 21, 15, 30))
+    monkeypatch.setattr(clock, "now", lambda tz=None: moment.astimezone(tz))
+    monkeypatch.setattr(configuration, "az_el_option", "BusTime")
+    monkeypatch.setattr(configuration, "solar_ephemeris", False)
+    monkeypatch.setattr(sun, "timedelta", datetime.timedelta(hours=1))
+    expected = solar_position(moment.timestamp() - 3600, configuration.latitude, configuration.longitude)
+
+    monkeypatch.setattr(configuration, "solar_engine", "pvlib")
+    sun.calculate_solar_position()
+    assert (sun.current_azimuth, sun.current_elevation) == pytest.approx(expected, abs=0.02)
+    assert (sun.current_azimuth, sun.current_elevation) != expected
+
+    monkeypatch.setattr(configuration, "solar_engine", "native")
+    sun.calculate_solar_position()
+    assert (sun.current_azimuth, sun.current_elevation) == expected
+
+    monkeypatch.setattr(configuration, "solar_engine", "pvlib")
+    monkeypatch.setattr(sun, "_pvlib_available", False)
+    sun.calculate_solar_position()
+    assert (sun.current_azimuth, sun.current_elevation) == expected
+
+
+def test_ephemeris_builds_from_a_native_site() -> None:
+    """Daily tables come from the native engine without pandas and cover the whole day."""
+
+    site = Site(47.377672, 8.518703, "Europe/Zurich")
+    table = EphemerisTable.build(site, datetime.date(2026, 3, 29), 30)  # 23 hour day (DST switch)
+    assert table.times[0] == table.start and table.times[-1] >= table.end
+    timestamps = np.random.default_rng(2).uniform(table.start, table.end, 500)
+
+    azimuth, elevation = table.lookup(timestamps)
+    ref_azimuth, ref_elevation = site.position(timestamps)
+
+    assert np.abs((azimuth - ref_azimuth + 180.0) % 360.0 - 180.0).max() < 1e-3
+    assert np.abs(elevation - ref_elevation).max() < 1e-3
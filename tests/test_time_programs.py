@@ -0,0 +1,88 @@
+"""Tests for the time program scheduler."""
+
+from __future__ import annotations
+
+import datetime
+import random
+
+import pytz
+
+from myapp import TimeProgramRunner
+from myapp.TimeProgramRunner import Schedule, _compute_next_run
+
+
+TZ = pytz.timezone("Europe/Berlin")
+
+
+def reference_next_run(entry, now):
+    """The original up-to-eight-day scan, kept verbatim as the reference."""
+    for offset in range(8):
+        candidate_base = now + datetime.timedelta(days=offset)
+        candidate = candidate_base.replace(
+            hour=entry["hour"],
+            minute=entry["minute"],
+            second=entry["second"],
+            microsecond=0,
+        )
+        if candidate <= now:
+            continue
+        if TimeProgramRunner._weekday_enabled(entry["weekdays"], candidate):
+            return candidate
+
+    return now + datetime.timedelta(days=1)
+
+
+def _entry(hour, minute, second=0, weekdays=0b1111111, name="p"):
+    return {"program": name, "hour": hour, "minute": minute, "second": second, "weekdays": weekdays}
+
+
+def test_next_run_matches_reference_scan() -> None:
+    """The weekday-offset table gives the same next run as scanning day by day."""
+
+    rng = random.Random(3)
+    base = TZ.localize(datetime.datetime(2024, 3, 20, 0, 0))
+    for _ in range(5000):
+        entry = _entry(rng.randrange(24), rng.randrange(60), rng.randrange(60), rng.randrange(128))
+        now = base + datetime.timedelta(seconds=rng.randrange(400 * 86400), microseconds=rng.randrange(10**6))
+        assert _compute_next_run(entry, TZ, reference=now) == reference_next_run(entry, now)
+
+
+def _schedule(entries, now):
+    for entry in entries:
+        entry["next_run"] = _compute_next_run(entry, TZ, reference=now)
+    return Schedule(entries, TZ)
+
+
+def test_pop_due_fires_in_order_and_reschedules() -> None:
+    """Due entries come out in time order and are pushed back for their next day."""
+
+    now = TZ.localize(datetime.datetime(2024, 6, 3, 7, 0))  # a Monday
+    late, early, weekend = _entry(8, 30, name="late"), _entry(8, 0, name="early"), _entry(8, 15, weekdays=0b1100000, name="weekend")
+    schedule = _schedule([late, early, weekend], now)
+
+    assert schedule.next_run() == now.replace(hour=8)
+    assert schedule.pop_due(now) == []
+
+    fired = schedule.pop_due(now.replace(hour=9))
+    assert [entry["program"] for entry in fired] == ["early", "late"]
+    assert early["next_run"] == now.replace(day=4, hour=8)
+    assert weekend["next_run"] == now.replace(day=8, hour=8, minute=15)
+    assert len(schedule) == 3
+
+
+def test_rebuild_follows_bus_time_without_repeating_runs() -> None:
+    """Moving the bus clock back does not fire a command twice; forward skips ahead."""
+
+    now = TZ.localize(datetime.datetime(2024, 6, 3, 12, 0, 0, 500000))
+    noon, evening = _entry(12, 0, name="noon"), _entry(18, 0, name="evening")
+    schedule = _schedule([noon, evening], now - datetime.timedelta(hours=1))
+    assert [entry["program"] for entry in schedule.pop_due(now)] == ["noon"]
+
+    earlier = now - datetime.timedelta(seconds=2)
+    schedule.rebuild(earlier)
+    assert schedule.pop_due(earlier + datetime.timedelta(seconds=1)) == []
+    assert noon["next_run"] == now.replace(day=4, microsecond=0)
+
+    evening["next_run"] = now.replace(day=10, hour=18, microsecond=0)
+    schedule.rebuild(now)
+    assert schedule.next_run() == now.replace(hour=18, microsecond=0)